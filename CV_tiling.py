@@ -0,0 +1,122 @@
+# Tiled (out-of-core) execution of the CV_utils filters
+# open_raw, open_output, PILImageReader, apply_tiled
+# TiledConv2D, TiledCornerDetection, TiledNonMaxSuppression
+#
+# the image is processed in tiles, each read lazily (from a memory-mapped raw file,
+# a lazily decoded image, or any array) together with a halo - the extra border the
+# filter's kernel / window needs - and the results are stitched into an output array,
+# which may itself be memory-mapped. tiles run in parallel in a thread pool (numpy
+# releases the GIL in the heavy work), and only a few tiles are in memory at a time.
+#
+# a tile's halo is clipped at the image's borders, so there the filter applies its own
+# padding exactly as it does for the whole image; every output pixel is computed from
+# the same input pixels either way, so the stitched result is seam-free. it equals the
+# result of processing the whole image at once exactly for integer inputs (and for
+# NonMaxSuppression, which only compares), and within floating-point tolerance for float
+# inputs, whose sums may be rounded differently in a tile (e.g. an FFT of another size).
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+import numpy as np
+from CV_utils import thread_scratch, Conv2D, CornerDetection, NonMaxSuppression
+
+TILE_SIZE = 1024
+
+def open_raw(filename, shape, dtype='uint8', offset=0):
+  # memory-map a raw (headerless) grayscale image file, read-only; pixels are read on access
+  return np.memmap(filename, dtype=dtype, mode='r', shape=shape, offset=offset)
+
+def open_output(filename, shape, dtype=np.float64):
+  # create a memory-mapped .npy file for the results (readable later with np.load(mmap_mode='r'))
+  return np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+
+class PILImageReader:
+  """
+  lazy tile access to an image file: only the requested region is cropped and converted,
+  as an array of dtype (int32 by default, as CV_utils.load_image does for the whole image).
+  note that for formats PIL can't decode partially (e.g. PNG) the first crop still decodes
+  the whole file; for images larger than memory use a raw file and open_raw
+  """
+  def __init__(self, filename, dtype='int32'):
+    self.dtype = dtype
+    self.image = Image.open(filename)
+    self.shape = (self.image.height, self.image.width)
+    # PIL decodes lazily, and isn't safe to use from several threads at once
+    self.lock = threading.Lock()
+
+  def __getitem__(self, index):
+    rows, cols = index
+    box = (cols.start, rows.start, cols.stop, rows.stop)
+    with self.lock:
+      tile = self.image.crop(box)
+    return np.asarray(tile, dtype=self.dtype)
+
+def _tiles(shape, tile_size):
+  N, M = shape
+  for i in range(0, N, tile_size):
+    for j in range(0, M, tile_size):
+      yield i, min(i + tile_size, N), j, min(j + tile_size, M)
+
+def apply_tiled(func, images, halo, out=None, tile_size=TILE_SIZE, workers=None, dtype=np.float64):
+  """
+  func - filter applied to every tile: func(*tiles) -> output tile of the same shape
+  images - an image, or a tuple of same-shaped images (e.g. Ix, Iy), each a numpy array,
+           np.memmap or any object sliceable by [rows, cols] (e.g. PILImageReader)
+  halo - number of extra pixels each output pixel depends on, around it
+  out - output array, or a filename for a memory-mapped .npy output; a new array by default
+  tile_size - size of the (square) output tiles
+  workers - number of threads, os.cpu_count() by default
+
+  returns out: func over the whole image - exactly for integer inputs, within
+  floating-point tolerance for float ones
+  """
+  if not isinstance(images, tuple):
+    images = (images,)
+  shape = tuple(images[0].shape)
+  N, M = shape
+  if out is None:
+    out = np.empty(shape, dtype=dtype)
+  elif isinstance(out, str):
+    out = open_output(out, shape, dtype)
+
+  def run(tile):
+    i0, i1, j0, j1 = tile
+    # the tile with its halo, clipped at the image's borders
+    r0, r1 = max(i0 - halo, 0), min(i1 + halo, N)
+    c0, c1 = max(j0 - halo, 0), min(j1 + halo, M)
+    result = func(*(np.asarray(image[r0:r1, c0:c1]) for image in images))
+    out[i0:i1, j0:j1] = result[i0-r0:i1-r0, j0-c0:j1-c0]
+
+  with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+    # consume the results (raising any worker exception); tiles are written by the workers
+    for _ in pool.map(run, _tiles(shape, tile_size)):
+      pass
+
+  if isinstance(out, np.memmap):
+    out.flush()
+  return out
+
+def _tile_buffer(shape, dtype):
+  # the filters run with the worker thread's Scratch, and write their result into it too:
+  # apply_tiled copies every result tile out right away
+  scratch = thread_scratch()
+  return dict(out=scratch.get('tile', shape, dtype), scratch=scratch)
+
+def TiledConv2D(image, kernel, out=None, tile_size=TILE_SIZE, workers=None, dtype=np.float64):
+  # Conv2D, tile by tile (see apply_tiled)
+  halo = (np.asarray(kernel).shape[0] - 1) // 2
+  conv = lambda tile: Conv2D(tile, kernel, **_tile_buffer(tile.shape, dtype))
+  return apply_tiled(conv, image, halo, out, tile_size, workers, dtype)
+
+def TiledCornerDetection(Ix, Iy, w, k, out=None, tile_size=TILE_SIZE, workers=None, dtype=np.float64):
+  # CornerDetection, tile by tile (see apply_tiled)
+  corners = lambda x, y: CornerDetection(x, y, w, k, **_tile_buffer(x.shape, dtype))
+  return apply_tiled(corners, (Ix, Iy), (w - 1) // 2, out, tile_size, workers, dtype)
+
+def TiledNonMaxSuppression(img, w, out=None, tile_size=TILE_SIZE, workers=None, dtype=np.float64):
+  # NonMaxSuppression, tile by tile (see apply_tiled)
+  nms = lambda tile: NonMaxSuppression(tile, w, **_tile_buffer(tile.shape, dtype))
+  return apply_tiled(nms, img, (w - 1) // 2, out, tile_size, workers, dtype)
@@ -1,124 +1,343 @@
-# Computer Vision Utility Functions
-# PIL functions: load_image, save_image, show_image, convert_to_PIL
-# Conv2D, EdgeThresholding, CornerDetection, NonMaxSuppression
-
-from PIL import Image
-import numpy as np
-
-def load_image(filename):
-  img = Image.open(filename)
-  img.load()
-  data = np.asarray( img, dtype="int32" )
-  return data
-
-def save_image(npdata, filename):
-  img = Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
-  img.save(filename)
-
-def show_image(npdata):
-  img = Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
-  
-def convert_to_PIL(npdata):
-  return Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
-  
- 
-def Conv2D(in_image, kernel):
-  # assume kernel is a square matrix with un-even size
-  N, M = in_image.shape
-  k, _ = kernel.shape
-  p = (k-1) // 2
-
-  image = in_image
-  out_image = np.zeros(in_image.shape)
-  if p>0:
-    image = np.zeros((N+2*p, M+2*p))
-
-    # center
-    image[p:-p, p:-p] = in_image
-    # top and bottom
-    image[:p,p:-p] = in_image[0,:]
-    image[-p:, p:-p] = in_image[-1,:]
-    # left and right
-    image[p:-p,:p] = in_image[:,0].reshape(N,1)
-    image[p:-p,-p:] = in_image[:,-1].reshape(N,1)
-    # corners
-    image[:p,:p] = in_image[0,0]
-    image[:p,-p:] = in_image[0,-1]
-    image[-p:,:p] = in_image[-1, 0]
-    image[-p:,-p:] = in_image[-1,-1]
-    
-  for i in range(N):
-    for j in range(M):
-      im_slice = image[i:i+k, j:j+k]
-      out_image[i,j] = np.sum(kernel * im_slice)
-
-  return out_image
-  
-def EdgeThresholding(img, Tmin, Tmax):
-  """
-  Edge Thresholding with Histeresis
-  """
-  
-  img = np.where(img >= Tmax, 1, img)
-  img = np.where(img <= Tmin, 0, img)
-
-  for i in range(img.shape[0]):
-    for j in range(img.shape[1]):
-      if img[i,j] > Tmin and img[i,j] < Tmax:
-        i_min = max(0, i-1)
-        i_max = min(img.shape[0], i+2)
-        j_min = max(0, j-1)
-        j_max = min(img.shape[1], j+2)
-        if np.max(img[i_min:i_max, j_min:j_max]) == 1:
-          img[i,j] = 1
-        else: img[i,j] = 0
-  return img
-
-def CornerDetection(Ix, Iy, w, k):
-  # Ix, Iy - first spatial derivatives in x and y axes, same size
-  # w - int, square window size on which to look for corners, assumed odd, and >=3
-  # k - harry corner detection coefficient 0.04<=k<=0.06
-  N, M = Ix.shape
-  
-  # padding
-  p = (w - 1) // 2
-  Ixp = np.zeros((N+2*p, M+2*p))
-  Ixp[p:-p, p:-p] = Ix
-  Iyp = np.zeros((N+2*p, M+2*p))
-  Iyp[p:-p, p:-p] = Iy
-      
-  R = np.zeros((N,M))
-  for i in range(N):
-    for j in range(M):
-      Ix_slice = Ixp[i:i+w, j:j+w]
-      Iy_slice = Iyp[i:i+w, j:j+w]
-      # computing coefficients
-      a = np.sum(Ix_slice**2)
-      c = np.sum(Iy_slice**2)
-      b = 2*np.sum(Ix_slice*Iy_slice)
-
-      l1 = .5 * (a + c + np.sqrt(b**2 + (a-c)**2))
-      l2 = .5 * (a + c - np.sqrt(b**2 + (a-c)**2))
-
-      R[i,j] = l1 * l2 - k * (l1 + l2)**2
-  return R
-  
-def NonMaxSuppression(img, w):
-  # img - image, with minimum element value 0
-  # w - window size, assumed to be odd
-
-  N, M = img.shape
-  # padding
-  p = (w - 1) // 2
-  img_p = np.zeros((N+2*p, M+2*p))
-  img_p[p:-p, p:-p] = img
-  
-  # initializing output
-  out_img = np.zeros((N,M))
-
-  for i in range(N):
-    for j in range(M):
-     img_slice = img_p[i:i+w, j:j+w]
-     if img[i,j] == np.max(img_slice): out_img[i,j] = img[i,j]
-  
-  return out_img
\ No newline at end of file
+# Computer Vision Utility Functions
+# PIL functions: load_image, save_image, show_image, convert_to_PIL
+# Conv2D, EdgeThresholding, CornerDetection, NonMaxSuppression, TopCorners
+# Scratch, thread_scratch: reusable work buffers for the filters
+
+import threading
+
+from PIL import Image
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def load_image(filename, dtype="int32"):
+  # dtype - of the returned pixels; "uint8" keeps 8-bit images at one byte per pixel
+  img = Image.open(filename)
+  img.load()
+  data = np.asarray( img, dtype=dtype )
+  return data
+
+def save_image(npdata, filename):
+  img = Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
+  img.save(filename)
+
+def show_image(npdata):
+  img = Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
+  
+def convert_to_PIL(npdata):
+  return Image.fromarray(np.asarray(np.clip(npdata,0,255), dtype="uint8"), "L")
+  
+ 
+# kernels of this size and above are convolved via FFT (when method='auto')
+FFT_MIN_KERNEL = 15
+
+class Scratch:
+  """
+  named work buffers, reused from call to call: pass the same Scratch to the filters (scratch=)
+  in a frame loop and, once the first frame has been processed, they allocate nothing more.
+  a buffer is reallocated only when it's requested with a different shape or dtype.
+  not thread-safe - use one per thread (see thread_scratch)
+  """
+  def __init__(self):
+    self.buffers = {}
+
+  def get(self, name, shape, dtype=np.float64):
+    buffer = self.buffers.get(name)
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+      buffer = self.buffers[name] = np.empty(shape, dtype)
+    return buffer
+
+  def nbytes(self):
+    return sum(buffer.nbytes for buffer in self.buffers.values())
+
+_local = threading.local()
+
+def thread_scratch():
+  # the calling thread's own Scratch
+  if not hasattr(_local, 'scratch'):
+    _local.scratch = Scratch()
+  return _local.scratch
+
+def _working_dtype(dtype, out):
+  # the filters work in dtype, or in out's dtype, float64 by default
+  if dtype is not None:
+    return np.dtype(dtype)
+  return out.dtype if out is not None else np.dtype(np.float64)
+
+def _as_dtype(image, dtype, scratch, name):
+  # image as a dtype array, converted into a scratch buffer if needed
+  image = np.asarray(image)
+  if image.dtype == dtype:
+    return image
+  converted = scratch.get(name, image.shape, dtype)
+  converted[...] = image
+  return converted
+
+def _pad_edge(in_image, p, dtype, scratch):
+  # pad the image by replicating its border pixels (into a scratch buffer)
+  image = np.asarray(in_image)
+  if p == 0:
+    return _as_dtype(image, dtype, scratch, 'conv_padded')
+  N, M = image.shape
+  padded = scratch.get('conv_padded', (N+2*p, M+2*p), dtype)
+  padded[p:p+N, p:p+M] = image
+  padded[:p, p:p+M] = image[0]
+  padded[p+N:, p:p+M] = image[-1]
+  padded[:, :p] = padded[:, p:p+1]
+  padded[:, p+M:] = padded[:, p+M-1:p+M]
+  return padded
+
+def _separable_factors(kernel, rtol=1e-12):
+  # returns (column, row) vectors with kernel == outer(column, row), or None
+  # if the kernel isn't separable (rank 1).
+  # row is taken from the kernel's row with the smallest entries. an integer kernel is
+  # factored into integer vectors (that row divided by the gcd of its entries, and the
+  # matching column), which must reproduce it exactly - so the two passes add up exact
+  # integers and give the same sums as direct (for integer images). a float kernel is
+  # factored within rtol, and the passes' rounding differs from direct's in the last bits
+  magnitude = np.abs(kernel).max(axis=1)
+  if not magnitude.any():
+    return None
+  i0 = np.argmin(np.where(magnitude > 0, magnitude, np.inf))
+  row = kernel[i0]
+  if np.issubdtype(kernel.dtype, np.integer):
+    row = row // np.gcd.reduce(row)
+    j0 = np.argmax(np.abs(row))
+    column, remainder = np.divmod(kernel[:, j0], row[j0])
+    if remainder.any() or not np.array_equal(np.outer(column, row), kernel):
+      return None
+    return column, row
+  j0 = np.argmax(np.abs(row))
+  column = kernel[:, j0] / row[j0]
+  if not np.allclose(np.outer(column, row), kernel, rtol=rtol, atol=0):
+    return None
+  return column, row
+
+def _conv_direct(image, kernel, out):
+  # sliding k x k windows over the padded image (a view, no copies), contracted with the kernel
+  windows = sliding_window_view(image, kernel.shape)
+  return np.einsum('ijkl,kl->ij', windows, kernel, out=out)
+
+def _conv_separable(image, column, row, out, scratch):
+  # two 1-D passes: along rows, then along columns
+  k = len(row)
+  tmp = scratch.get('conv_tmp', (image.shape[0], out.shape[1]), out.dtype)
+  np.einsum('ijk,k->ij', sliding_window_view(image, k, axis=1), row, out=tmp)
+  return np.einsum('ijk,k->ij', sliding_window_view(tmp, k, axis=0), column, out=out)
+
+def _conv_fft(image, kernel, N, M, out):
+  # correlation is a convolution with the flipped kernel; keep only the 'valid' part
+  shape = image.shape
+  spectrum = np.fft.rfft2(image, shape) * np.fft.rfft2(kernel[::-1, ::-1], shape)
+  k = kernel.shape[0]
+  out[...] = np.fft.irfft2(spectrum, shape)[k-1:k-1+N, k-1:k-1+M]
+  return out
+
+def Conv2D(in_image, kernel, method='auto', out=None, dtype=None, scratch=None):
+  # assume kernel is a square matrix with un-even size
+  # image borders are handled by replicating the edge pixels
+  # method - 'direct': sliding-window contraction, the same sums as the per-pixel
+  #          np.sum(kernel * im_slice) (bit-identical for integer images and kernels);
+  #          'separable': two 1-D passes, for rank-1 kernels (exact for integer images
+  #          and kernels, see _separable_factors);
+  #          'fft': via the FFT, for large kernels;
+  #          'auto': separable if the kernel is separable, fft if k >= FFT_MIN_KERNEL,
+  #          direct otherwise. float separable and fft results agree with direct up to float rounding
+  # out - optional array of the image's shape to write the result into
+  # dtype - working (and result) dtype: float64 or float32; out's dtype by default
+  # scratch - Scratch to take the padded image and intermediate buffers from
+  N, M = in_image.shape
+  dtype = _working_dtype(dtype, out)
+  scratch = scratch or Scratch()
+  # factored in its own dtype, so an integer kernel gets integer factors
+  factored = np.asarray(kernel)
+  kernel = factored.astype(np.float64)
+  k, _ = kernel.shape
+  p = (k-1) // 2
+  if out is None:
+    out = np.empty((N, M), dtype)
+
+  image = _pad_edge(in_image, p, dtype, scratch)
+
+  if method == 'auto':
+    factors = _separable_factors(factored) if k > 1 else None
+    if factors is not None:
+      return _conv_separable(image, *(f.astype(dtype) for f in factors), out, scratch)
+    method = 'fft' if k >= FFT_MIN_KERNEL else 'direct'
+
+  if method == 'direct':
+    return _conv_direct(image, kernel.astype(dtype), out)
+  if method == 'separable':
+    factors = _separable_factors(factored)
+    if factors is None:
+      raise ValueError('kernel is not separable')
+    return _conv_separable(image, *(f.astype(dtype) for f in factors), out, scratch)
+  if method == 'fft':
+    return _conv_fft(image, kernel.astype(dtype), N, M, out)
+  raise ValueError(f"unknown method '{method}'")
+
+def EdgeThresholding(img, Tmin, Tmax, out=None, dtype=None, scratch=None):
+  """
+  Edge Thresholding with Histeresis
+  pixels >= Tmax are (strong) edges, pixels <= Tmin are not. a weak pixel (in between) is an edge
+  if it's connected to a strong edge (8-connectivity) through a path of weak pixels, however long.
+
+  a breadth-first flood from all the strong pixels at once, over the weak ones, visits every pixel
+  at most once (linear time). returns a 0/1 image, of dtype (e.g. uint8), float64 by default
+  """
+  img = np.asarray(img)
+  N, M = img.shape
+  dtype = _working_dtype(dtype, out)
+  scratch = scratch or Scratch()
+
+  # flat byte buffers with a 1-pixel border, so that the 8 neighbours of any inner pixel are at
+  # fixed offsets and never out of bounds. the masks are computed straight into them (as bool views)
+  W = M + 2
+  edges = scratch.get('edges_strong', (N+2, W), np.uint8)
+  # weak pixels not reached yet
+  pending = scratch.get('edges_weak', (N+2, W), np.uint8)
+  for buffer in (edges, pending):
+    buffer[0] = buffer[-1] = 0
+    buffer[:, 0] = buffer[:, -1] = 0
+  strong = edges[1:-1, 1:-1].view(bool)
+  weak = pending[1:-1, 1:-1].view(bool)
+  np.greater_equal(img, Tmax, out=strong)
+  # weak: above Tmin and not strong
+  np.greater(img, Tmin, out=weak)
+  np.greater(weak, strong, out=weak)
+
+  # the queue starts with all the strong pixels; the loop also runs over pixels appended to it
+  queue = np.flatnonzero(edges).tolist()
+  flat_edges = memoryview(edges.reshape(-1))
+  flat_pending = memoryview(pending.reshape(-1))
+  neighbours = (-W-1, -W, -W+1, -1, 1, W-1, W, W+1)
+  for v in queue:
+    for d in neighbours:
+      u = v + d
+      if flat_pending[u]:
+        flat_pending[u] = 0
+        flat_edges[u] = 1
+        queue.append(u)
+
+  if out is None:
+    out = np.empty((N, M), dtype)
+  out[...] = edges[1:-1, 1:-1]
+  return out
+
+def _box_sum(x, y, w, out, scratch):
+  # sum of x*y over every w x w window (centered, zero outside the image) into out, using an
+  # integral image (summed-area table): 4 lookups per pixel, whatever w is.
+  # the table is accumulated in float64 whatever out's dtype is (float32 prefix sums over a large
+  # image would swamp the window sums); for integer-valued inputs the sums are exact (as long as
+  # the total stays below 2**53)
+  N, M = x.shape
+  p = (w - 1) // 2
+  sat = scratch.get('harris_sat', (N+2*p+1, M+2*p+1), np.float64)
+  sat[:1+p] = 0
+  sat[1+p+N:] = 0
+  sat[:, :1+p] = 0
+  sat[:, 1+p+M:] = 0
+  np.multiply(x, y, out=sat[1+p:1+p+N, 1+p:1+p+M])
+  np.cumsum(sat, axis=0, out=sat)
+  np.cumsum(sat, axis=1, out=sat)
+
+  window = out if out.dtype == sat.dtype else scratch.get('harris_window', (N, M), sat.dtype)
+  np.subtract(sat[w:w+N, w:w+M], sat[:N, w:w+M], out=window)
+  window -= sat[w:w+N, :M]
+  window += sat[:N, :M]
+  if window is not out:
+    out[...] = window
+  return out
+
+def CornerDetection(Ix, Iy, w, k, out=None, dtype=None, scratch=None):
+  # Ix, Iy - first spatial derivatives in x and y axes, same size
+  # w - int, square window size on which to look for corners, assumed odd, and >=3
+  # k - harry corner detection coefficient 0.04<=k<=0.06
+  # out, dtype, scratch - as in Conv2D
+  dtype = _working_dtype(dtype, out)
+  scratch = scratch or Scratch()
+  Ix = _as_dtype(Ix, dtype, scratch, 'harris_Ix')
+  Iy = _as_dtype(Iy, dtype, scratch, 'harris_Iy')
+  shape = Ix.shape
+
+  # window sums of the structure tensor's entries (zero padding around the image)
+  a = _box_sum(Ix, Ix, w, scratch.get('harris_a', shape, dtype), scratch)
+  c = _box_sum(Iy, Iy, w, scratch.get('harris_c', shape, dtype), scratch)
+  b = _box_sum(Ix, Iy, w, scratch.get('harris_b', shape, dtype), scratch)
+
+  # R = l1*l2 - k*(l1+l2)**2, where the eigenvalues' product and sum are the
+  # tensor's determinant and trace (computed in place: a*c - b**2 - k*(a + c)**2)
+  R = out if out is not None else np.empty(shape, dtype)
+  np.multiply(a, c, out=R)
+  b *= b
+  R -= b
+  a += c
+  a *= a
+  a *= k
+  R -= a
+  return R
+
+def _running_max(img, w, axis, out, scratch):
+  # max over every length-w window (centered, zero padded) along axis, using
+  # van Herk/Gil-Werman: prefix maxima g and suffix maxima h within blocks of
+  # w, so each window max is max(h[start], g[end]) - ~3 comparisons per pixel
+  # whatever w is. img is copied into the padded buffer first, so out may be img
+  a = np.moveaxis(img, axis, -1)
+  n = a.shape[-1]
+  p = (w - 1) // 2
+  blocks = -(-(n + 2*p) // w)
+  block_shape = a.shape[:-1] + (blocks, w)
+  padded = scratch.get(f'nms_padded{axis}', block_shape, out.dtype)
+  flat = padded.reshape(a.shape[:-1] + (blocks * w,))
+  flat[..., :p] = 0
+  flat[..., p+n:] = 0
+  flat[..., p:p+n] = a
+
+  g = scratch.get(f'nms_prefix{axis}', block_shape, out.dtype)
+  h = scratch.get(f'nms_suffix{axis}', block_shape, out.dtype)
+  np.maximum.accumulate(padded, axis=-1, out=g)
+  np.maximum.accumulate(padded[..., ::-1], axis=-1, out=h[..., ::-1])
+  g = g.reshape(flat.shape)
+  h = h.reshape(flat.shape)
+
+  np.maximum(h[..., :n], g[..., w-1:w-1+n], out=np.moveaxis(out, axis, -1))
+  return out
+
+def NonMaxSuppression(img, w, out=None, dtype=None, scratch=None):
+  # img - image, with minimum element value 0
+  # w - window size, assumed to be odd
+  # keeps only the pixels that are the maximum of their w x w window (the
+  # window max is separable: a running max along rows, then along columns)
+  # out, dtype, scratch - as in Conv2D; only comparisons are made, so dtype may also be
+  # an integer type (e.g. uint8 images in and out). out must not be img
+  dtype = _working_dtype(dtype, out)
+  scratch = scratch or Scratch()
+  img = _as_dtype(img, dtype, scratch, 'nms_image')
+
+  window_max = scratch.get('nms_max', img.shape, dtype)
+  _running_max(img, w, 1, window_max, scratch)
+  _running_max(window_max, w, 0, window_max, scratch)
+  keep = scratch.get('nms_keep', img.shape, bool)
+  np.equal(img, window_max, out=keep)
+
+  if out is None:
+    out = np.empty(img.shape, dtype)
+  out[...] = 0
+  np.copyto(out, img, where=keep)
+  return out
+
+def TopCorners(R, K, threshold=0):
+  # R - corner response (e.g. after NonMaxSuppression)
+  # K - maximal number of corners to return
+  # returns the (row, column) coordinates, as a (K, 2) array, and the scores of
+  # the K highest responses above threshold, in decreasing order of score.
+  # uses partial selection (np.argpartition, O(N*M)) instead of a full sort
+  candidates = np.flatnonzero(R > threshold)
+  scores = R.ravel()[candidates]
+  if K <= 0:
+    candidates, scores = candidates[:0], scores[:0]
+  elif K < len(candidates):
+    top = np.argpartition(scores, len(scores) - K)[len(scores) - K:]
+    candidates, scores = candidates[top], scores[top]
+  order = np.argsort(-scores, kind='stable')
+  coords = np.column_stack(np.unravel_index(candidates[order], R.shape))
+  return coords, scores[order]
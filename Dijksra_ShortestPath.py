@@ -1,89 +1,523 @@
-import heapq
-
-def get_file(filepath):
-    """
-    each line in the input file is a list of edges directed from the
-    raw-numbered vertex.
-    each edge contains a tuple of two numbers: the first is the 'head' vertex
-    and the second is the value/weight of the edge.
-
-    returns the adjacency list as a python dict, with keys as the 'source'
-    vertices and values as tuples of (head-vertex, weight)
-    """
-
-    with open(filepath, 'r') as f:
-        file_lines = f.readlines()
-    f.close()
-
-    adj_list = {}
-
-    for line in file_lines:
-        line = line.strip('\n').split('\t')[:-1]
-        s = int(line[0])
-        adj_list[s] = []
-        for edge in line[1:]:
-            adj_list[s].append(tuple(map(int, edge.split(','))))
-
-    return adj_list
-
-
-def shortestPath(adj_list):
-    N = len(adj_list)
-
-    # defining source node index
-    source = 1
-
-    # intialize the shortest path list in order to track processed
-    # vertices and their shortest path
-    processed = [-1 for _ in range(N + 1)]
-    # path to source node
-    processed[source] = 0
-
-    # this dictionary will map between vertices and 'best' weights found so
-    # far, in order to access that info in O(1)
-    weights = {}
-    # priority queue to sort by next vertex with the shortest path
-    frontier = []
-    # first, consider only vertices that are directly connected to source node
-    for head, weight in adj_list[source]:
-        weights[head] = weight
-        heapq.heappush(frontier, (weight, head))
-
-    while frontier:
-        # take out the node with the smallest Dijkstra's score (=key)
-        key, node = heapq.heappop(frontier)
-
-        if processed[node] != -1:
-            # node already processed
-            continue
-
-        # mark as processed
-        processed[node] = key
-
-        # update heap values for all vertices that have edges directed from
-        # the processed node
-        for head, weight in adj_list[node]:
-            if key+weight < weights.get(head, 100000):
-                # current path shorter than known before
-                weights[head] = key + weight
-
-                # add path to queue with O(log n)
-                heapq.heappush(frontier, (key+weight, head))
-
-    return processed
-
-if __name__ == '__main__':
-    adj_list = get_file('dijkstraData.txt')
-
-    vertex_scores = shortestPath(adj_list)
-
-    # extract certain nodes:
-    nodes = [7,37,59,82,99,115,133,165,188,197]
-    out = []
-    for node in nodes:
-        out.append(vertex_scores[node])
-
-    print(out)
-    print(f'results match: {out == [2599,2610,2947,2052,2367,2399,2029,2442,2505,3068]}')
-
-
+import heapq
+from array import array
+from collections import OrderedDict
+
+from csr_graph import as_csr, VERTEX_TYPE
+from graph_io import load_adjacency
+from indexed_heap import IndexedHeap
+from search_stats import phase
+
+INF = float('inf')
+
+def get_file(filepath):
+    """
+    each line in the input file is a list of edges directed from the
+    raw-numbered vertex.
+    each edge contains a tuple of two numbers: the first is the 'head' vertex
+    and the second is the value/weight of the edge.
+
+    returns the adjacency list as a python dict, with keys as the 'source'
+    vertices and values as tuples of (head-vertex, weight)
+
+    see also graph_io.load_adjacency, which loads the same format directly
+    into a (cached) CSRGraph
+    """
+
+    with open(filepath, 'r') as f:
+        file_lines = f.readlines()
+    f.close()
+
+    adj_list = {}
+
+    for line in file_lines:
+        line = line.strip('\n').split('\t')[:-1]
+        s = int(line[0])
+        adj_list[s] = []
+        for edge in line[1:]:
+            adj_list[s].append(tuple(map(int, edge.split(','))))
+
+    return adj_list
+
+
+class ShortestPathSearch:
+    """
+    a reusable Dijkstra engine over a single graph, for answering many queries.
+
+    the distance / processed buffers are allocated once, in the constructor.
+    instead of clearing them before every query (O(n)), each query gets a new
+    'generation' number and a vertex's entries are valid only if its stamp
+    equals the current generation, so starting a query is O(1) and its cost
+    depends only on the part of the graph it explores.
+
+    with predecessors=True, the search also records the shortest-path tree
+    (the previous vertex on the shortest path to each vertex), so the paths
+    themselves can be reconstructed from the same run (see path()).
+
+    heap - 'lazy': heapq with lazy deletion (a vertex may have several entries
+           in the heap, stale ones are skipped when popped), or
+           'indexed': an IndexedHeap with true decrease-key, which holds at
+           most n entries. arity sets the indexed heap's d (2 = binary heap).
+           lazy is the default and usually the faster one: heapq sifts in C,
+           the IndexedHeap in python (about 2x slower on a sparse graph of 100k
+           vertices and 1M edges, d=4 narrows it). indexed bounds the heap's
+           memory, and only catches up on dense graphs (m >> n)
+    stats - optional search_stats.SearchStats, counting the heap operations,
+            settled vertices and relaxations of every run, and timing the
+            'setup' (the constructor) and 'search' phases
+    """
+
+    def __init__(self, graph, predecessors=False, heap='lazy', arity=2, stats=None):
+        self.stats = stats
+        with phase(stats, 'setup'):
+            self._setup(graph, predecessors, heap, arity)
+
+    def _setup(self, graph, predecessors, heap, arity):
+        self.graph = as_csr(graph)
+        n = self.graph.n
+
+        # best distance found so far, valid only where reached[v] == generation
+        self.dist = [INF] * n
+        # generation stamps of reached (in the heap) and processed vertices
+        self.reached = array('q', [0]) * n
+        self.processed = array('q', [0]) * n
+        self.generation = 0
+        # priority queue, reused between queries
+        if heap == 'lazy':
+            self.frontier = []
+        elif heap == 'indexed':
+            self.frontier = IndexedHeap(n, arity)
+        else:
+            raise ValueError(f"unknown heap type '{heap}', expected 'lazy' or 'indexed'")
+        # shortest-path tree, valid only where processed[v] == generation
+        self.pred = array(VERTEX_TYPE, [-1]) * n if predecessors else None
+
+    def run(self, sources, targets=None):
+        """
+        run Dijkstra from sources.
+        sources - a vertex, or an iterable of vertices which all start at
+                  distance 0 (i.e. edges of weight 0 from a virtual super-source)
+        targets - optional iterable of vertices; the search stops as soon as
+                  all of them are processed, instead of settling the whole graph
+
+        the results are read with distance() / distances() / target_distances()
+        """
+        if isinstance(sources, int):
+            sources = (sources,)
+        graph = self.graph
+        offsets, targets_arr, edge_weights = graph.offsets, graph.targets, graph.weights
+        dist, reached, processed, pred = self.dist, self.reached, self.processed, self.pred
+
+        self.generation += 1
+        gen = self.generation
+
+        frontier = self.frontier
+        frontier.clear()
+        indexed = isinstance(frontier, IndexedHeap)
+        for source in sources:
+            dist[source] = 0
+            reached[source] = gen
+            if pred is not None:
+                pred[source] = -1
+            if indexed:
+                frontier.push_or_decrease(source, 0)
+            else:
+                frontier.append((0, source))
+        if not indexed:
+            heapq.heapify(frontier)
+        stats = self.stats
+        if stats is not None:
+            stats.pushes += len(frontier)
+            stats.track_depth('max_heap', len(frontier))
+
+        # vertices still to be processed before stopping early
+        remaining = None
+        if targets is not None:
+            remaining = set(targets)
+            if not remaining:
+                return
+
+        with phase(stats, 'search'):
+            if indexed:
+                self._run_indexed(remaining)
+            else:
+                self._run_lazy(remaining)
+
+    def _run_lazy(self, remaining):
+        """ the main loop of run(), using heapq with lazy deletion """
+        graph = self.graph
+        offsets, targets_arr, edge_weights = graph.offsets, graph.targets, graph.weights
+        dist, reached, processed, pred = self.dist, self.reached, self.processed, self.pred
+        gen = self.generation
+        frontier = self.frontier
+
+        # the heap operations and the scan of a vertex's edges, counted with stats
+        stats = self.stats
+        push, pop, scan = heapq.heappush, heapq.heappop, range
+        if stats is not None:
+            push, pop, scan = stats.heappush(), stats.heappop(), stats.scan()
+            unsettled = stats.pops - stats.settled
+
+        while frontier:
+            # take out the node with the smallest Dijkstra's score (=key)
+            key, node = pop(frontier)
+
+            if processed[node] == gen:
+                # node already processed
+                continue
+
+            # mark as processed
+            processed[node] = gen
+
+            if remaining is not None and node in remaining:
+                remaining.remove(node)
+                if not remaining:
+                    # all the targets are settled
+                    if stats is not None:
+                        stats.settled += 1
+                    break
+
+            # update heap values for all vertices that have edges directed from
+            # the processed node. the edges of node are contiguous in the CSR arrays
+            for e in scan(offsets[node], offsets[node + 1]):
+                head = targets_arr[e]
+                score = key + edge_weights[e]
+                if reached[head] != gen or score < dist[head]:
+                    # current path shorter than known before
+                    reached[head] = gen
+                    dist[head] = score
+                    if pred is not None:
+                        pred[head] = node
+
+                    # add path to queue with O(log n)
+                    push(frontier, (score, head))
+
+        if stats is not None:
+            stats.stale_pops += stats.pops - stats.settled - unsettled
+
+    def _run_indexed(self, remaining):
+        """ the main loop of run(), using the IndexedHeap with decrease-key """
+        graph = self.graph
+        offsets, targets_arr, edge_weights = graph.offsets, graph.targets, graph.weights
+        dist, reached, processed, pred = self.dist, self.reached, self.processed, self.pred
+        gen = self.generation
+        frontier = self.frontier
+
+        stats = self.stats
+        scan = range
+        if stats is not None:
+            frontier, scan = stats.indexed_heap(frontier), stats.scan()
+
+        while frontier:
+            # every vertex is in the heap at most once, so no stale entries
+            key, node = frontier.pop()
+            processed[node] = gen
+
+            if remaining is not None and node in remaining:
+                remaining.remove(node)
+                if not remaining:
+                    if stats is not None:
+                        stats.settled += 1
+                    break
+
+            for e in scan(offsets[node], offsets[node + 1]):
+                head = targets_arr[e]
+                score = key + edge_weights[e]
+                if reached[head] != gen:
+                    # first time head is reached
+                    reached[head] = gen
+                    dist[head] = score
+                    if pred is not None:
+                        pred[head] = node
+                    frontier.push(head, score)
+                elif score < dist[head] and processed[head] != gen:
+                    # shorter path to a vertex in the heap - decrease its key
+                    dist[head] = score
+                    if pred is not None:
+                        pred[head] = node
+                    frontier.decrease_key(head, score)
+
+    def distance(self, v):
+        """ shortest path to v found by the last run, -1 if v wasn't processed """
+        return self.dist[v] if self.processed[v] == self.generation else -1
+
+    def distances(self):
+        """ list of the shortest paths of all the vertices (-1 if not processed) """
+        gen, dist = self.generation, self.dist
+        return [d if p == gen else -1 for d, p in zip(dist, self.processed)]
+
+    def target_distances(self, targets):
+        return [self.distance(v) for v in targets]
+
+    def predecessors(self):
+        """
+        array of the previous vertex on the shortest path to every vertex,
+        -1 for the sources and for vertices that weren't processed
+        """
+        if self.pred is None:
+            raise ValueError('the search was created without predecessors=True')
+        gen = self.generation
+        return array(VERTEX_TYPE, (v if p == gen else -1 for v, p in zip(self.pred, self.processed)))
+
+    def path(self, v):
+        """
+        the shortest path found by the last run, as a list of vertices from
+        its source to v, or None if v wasn't processed
+        """
+        if self.pred is None:
+            raise ValueError('the search was created without predecessors=True')
+        if self.processed[v] != self.generation:
+            return None
+        return _walk(self.pred, v)
+
+    def query(self, sources, targets=None):
+        """
+        run a query and return the distances of targets (in the given order),
+        or of all the vertices if targets is None
+        """
+        if targets is None:
+            self.run(sources)
+            return self.distances()
+        targets = list(targets)
+        self.run(sources, targets)
+        return self.target_distances(targets)
+
+
+def reconstructPath(predecessors, target, distances):
+    """
+    predecessors, distances - as returned by shortestPath(..., predecessors=True)
+    returns the list of vertices on the shortest path from the source to target,
+    or None if target is unreachable (both an unreachable vertex and a source have
+    no predecessor, so the distances tell them apart)
+    """
+    if distances[target] == -1:
+        return None
+    return _walk(predecessors, target)
+
+
+def _walk(predecessors, target):
+    # the vertices from the root of target's shortest-path tree to target
+    path = [target]
+    v = predecessors[target]
+    while v != -1:
+        path.append(v)
+        v = predecessors[v]
+    path.reverse()
+    return path
+
+
+def shortestPath(adj_list, source=1, targets=None, predecessors=False, heap='lazy', arity=2, stats=None):
+    """
+    adj_list - the graph, either a CSRGraph or an adjacency list as returned by
+               get_file (converted to CSR form on the fly)
+    source - the source vertex, or an iterable of source vertices (multi-source,
+             the distance to the nearest one of them)
+    targets - optional iterable of vertices; stop once they are all processed.
+              other vertices not processed by then are reported as -1
+    predecessors - also return the shortest-path tree
+    heap, arity - priority queue implementation, 'lazy' or 'indexed' (see ShortestPathSearch)
+    stats - optional search_stats.SearchStats to instrument the search with
+
+    returns a list of the shortest path from the source vertex to every
+    vertex, with -1 for unreachable vertices.
+    with predecessors=True returns a tuple of that list and an array of the
+    previous vertex on each shortest path (-1 for sources and unreachable
+    vertices), for use with reconstructPath
+    """
+    search = ShortestPathSearch(adj_list, predecessors, heap, arity, stats)
+    search.run(source, targets)
+    if predecessors:
+        return search.distances(), search.predecessors()
+    return search.distances()
+
+
+def batchShortestPaths(adj_list, queries):
+    """
+    answer a batch of independent queries on the same graph, reusing one set of
+    buffers (see ShortestPathSearch).
+    queries - iterable of (sources, targets) pairs, as in ShortestPathSearch.query
+
+    yields, per query, the list of target distances (-1 for unreachable)
+    """
+    search = ShortestPathSearch(adj_list)
+    for sources, targets in queries:
+        yield search.query(sources, targets)
+
+
+class ShortestPathCache:
+    """
+    memoized single-source shortest paths over a graph that changes rarely: the
+    distances from a source are computed once (a full Dijkstra run) and kept as a
+    compact array (8 bytes per vertex), so repeated queries from the same hot
+    sources are O(1).
+
+    entries are keyed by (graph version, source). changing the graph through its
+    methods (CSRGraph.set_weight / update_edges / touch) increments its version,
+    which invalidates all the cached entries. they're evicted least-recently-used
+    first, to keep the cached arrays within max_bytes.
+
+    hits, misses and evictions count the lookups and evicted entries.
+    """
+
+    def __init__(self, graph, max_bytes=64 << 20, heap='lazy', arity=2):
+        """
+        graph - the graph, as in ShortestPathSearch. a CSRGraph is used as is, so its
+                later changes are seen; an adjacency list is converted once
+        max_bytes - bound of the memory of the cached distance arrays
+        """
+        self.search = ShortestPathSearch(graph, heap=heap, arity=arity)
+        self.graph = self.search.graph
+        self.max_bytes = max_bytes
+        # (version, source) -> distances array, in least-recently-used first order
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, source):
+        return (self.graph.version, source) in self.entries
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def distances(self, source):
+        """
+        the shortest paths from source to every vertex (-1 for unreachable
+        vertices), as a read-only view of the cached array
+        """
+        key = (self.graph.version, source)
+        dist = self.entries.get(key)
+        if dist is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return memoryview(dist).toreadonly()
+
+        self.misses += 1
+        if self.entries and next(iter(self.entries))[0] != key[0]:
+            # the graph has changed - no entry can be hit again
+            self.clear()
+        self.search.run(source)
+        # integer distances for integer weights (of any width), doubles otherwise
+        typecode = 'd' if self.graph.weight_type in ('f', 'd') else 'q'
+        dist = array(typecode, self.search.distances())
+        size = len(dist) * dist.itemsize
+        if size <= self.max_bytes:
+            while self.bytes + size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted) * evicted.itemsize
+                self.evictions += 1
+            self.entries[key] = dist
+            self.bytes += size
+        return memoryview(dist).toreadonly()
+
+    def distance(self, source, target):
+        """ shortest path from source to target, -1 if unreachable """
+        return self.distances(source)[target]
+
+
+def bidirectionalShortestPath(adj_list, source, target):
+    """
+    point-to-point shortest path, searching forward from source and backward
+    (on the reversed graph) from target at the same time, always advancing
+    the side with the smaller key. the search stops when the two frontiers
+    meet, i.e. once the smallest keys of both sides add up to at least the
+    best source-target path found so far, so it typically settles a small
+    fraction of the vertices a full shortestPath run does.
+
+    returns the shortest path distance, or -1 if target is unreachable
+    """
+    graph = as_csr(adj_list)
+    if source == target:
+        return 0
+
+    sides = []
+    for g, start in ((graph, source), (graph.reverse(), target)):
+        # (graph arrays, tentative distances, processed vertices, heap)
+        sides.append((g.offsets, g.targets, g.weights, {start: 0}, set(), [(0, start)]))
+
+    # best source-target distance found so far
+    best = INF
+    while sides[0][5] and sides[1][5]:
+        if sides[0][5][0][0] + sides[1][5][0][0] >= best:
+            # no shorter path can go through the remaining frontiers
+            break
+
+        # advance the side with the smaller key
+        side = 0 if sides[0][5][0][0] <= sides[1][5][0][0] else 1
+        offsets, targets, weights, dist, processed, frontier = sides[side]
+        other_dist = sides[1 - side][3]
+
+        key, node = heapq.heappop(frontier)
+        if node in processed:
+            continue
+        processed.add(node)
+
+        for e in range(offsets[node], offsets[node + 1]):
+            head = targets[e]
+            score = key + weights[e]
+            if score < dist.get(head, INF):
+                dist[head] = score
+                heapq.heappush(frontier, (score, head))
+            if head in other_dist:
+                # a source-target path through the edge (node, head)
+                best = min(best, score + other_dist[head])
+
+    return best if best < INF else -1
+
+
+def astarShortestPath(adj_list, source, target, heuristic=None):
+    """
+    point-to-point shortest path using A*: vertices are taken out of the heap
+    by their distance from source plus heuristic(v), an estimate of the
+    distance from v to target, which steers the search towards target.
+
+    heuristic - callable(v), must be admissible (never over-estimate the
+                remaining distance) for the result to be exact. a vertex is
+                re-opened if a shorter path to it is found later, so the
+                heuristic doesn't have to be consistent. None means h=0, i.e.
+                plain Dijkstra with early termination at target
+
+    returns the shortest path distance, or -1 if target is unreachable
+    """
+    graph = as_csr(adj_list)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    if heuristic is None:
+        heuristic = lambda v: 0
+
+    dist = {source: 0}
+    frontier = [(heuristic(source), 0, source)]
+    while frontier:
+        _, key, node = heapq.heappop(frontier)
+        if key > dist[node]:
+            # stale entry, a shorter path to node was found meanwhile
+            continue
+        if node == target:
+            return key
+
+        for e in range(offsets[node], offsets[node + 1]):
+            head = targets[e]
+            score = key + weights[e]
+            if score < dist.get(head, INF):
+                dist[head] = score
+                heapq.heappush(frontier, (score + heuristic(head), score, head))
+
+    return -1
+
+
+if __name__ == '__main__':
+    adj_list = load_adjacency('dijkstraData.txt')
+
+    vertex_scores = shortestPath(adj_list)
+
+    # extract certain nodes:
+    nodes = [7,37,59,82,99,115,133,165,188,197]
+    out = []
+    for node in nodes:
+        out.append(vertex_scores[node])
+
+    print(out)
+    print(f'results match: {out == [2599,2610,2947,2052,2367,2399,2029,2442,2505,3068]}')
+
+
@@ -0,0 +1,296 @@
+"""
+Benchmark suite: times shortestPath (Dijkstra), primMST, Kosaraju's compute_scc,
+closestSquaredDistance (both engines) and the CV_utils filters on seeded synthetic
+inputs (synthetic_data: random, power-law, road-like and deep-chain graphs, uniform,
+clustered and duplicate-heavy points, images) of several sizes, and reports for every benchmark and size
+  - the running time (best of a few runs)
+  - the peak memory allocated while running (tracemalloc, numpy included)
+  - the empirical scaling exponent: the slope of log(time) over log(size), e.g.
+    ~1 for linear, ~1.1 for n log n
+
+results are saved as JSON, and a later run can be compared against such a baseline,
+failing (exit code 1) on any slowdown or memory growth beyond a tolerance.
+
+usage: python benchmark.py [--scale smoke|quick|full] [--only NAME ...]
+                           [--save FILE] [--compare FILE] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from Dijksra_ShortestPath import shortestPath
+from prims_algorithm import primMST
+from scc_kosaraju_algorithm import compute_scc
+from closestPair import closestSquaredDistance
+from CV_utils import Conv2D, CornerDetection, NonMaxSuppression, EdgeThresholding
+from harris_pipeline import SOBEL_5x5
+from synthetic_data import (random_graph, power_law_graph, road_graph, chain_graph, build_csr,
+                            uniform_points, clustered_points, duplicate_points, synthetic_image)
+
+BASELINE_VERSION = 1
+# timings this short are too noisy to be compared against a baseline
+MIN_TIME = 0.005
+
+# sizes of every benchmark, by scale: numbers of edges for graphs, of points for point
+# sets, and (height, width) of images. 'full' goes up to millions of edges and points, and 4K
+GRAPH_SIZES = {'smoke': [2000, 8000], 'quick': [25000, 100000, 400000],
+               'full': [250000, 1000000, 4000000]}
+POINT_SIZES = {'smoke': [1000, 4000], 'quick': [10000, 30000, 100000],
+               'full': [300000, 1000000, 3000000]}
+IMAGE_SIZES = {'smoke': [(64, 64), (128, 128)], 'quick': [(256, 256), (512, 512), (1024, 1024)],
+               'full': [(720, 1280), (1080, 1920), (2160, 3840)]}
+# average out-degree of the synthetic graphs
+DEGREE = 8
+
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes):
+    """
+    registers a benchmark: setup(size, seed) builds its input and returns (n, run), where n
+    is the input's size as a number (for the scaling exponent) and run() is what's timed
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, sizes)
+        return setup
+    return register
+
+
+# the benchmarks, on seeded synthetic inputs (synthetic_data)
+
+def _lattice_side(m):
+    # side of a square lattice with about m (directed) edges
+    return max(int((m / 4) ** 0.5), 2)
+
+
+@benchmark('shortest_path', GRAPH_SIZES)
+def _shortest_path(m, seed):
+    n = m // DEGREE
+    graph = build_csr(n, random_graph(n, m, seed))
+    return m, lambda: shortestPath(graph, 0)
+
+
+@benchmark('shortest_path_power_law', GRAPH_SIZES)
+def _shortest_path_power_law(m, seed):
+    n = m // DEGREE
+    graph = build_csr(n, power_law_graph(n, m, seed))
+    return m, lambda: shortestPath(graph, 0)
+
+
+@benchmark('shortest_path_road', GRAPH_SIZES)
+def _shortest_path_road(m, seed):
+    side = _lattice_side(m)
+    graph = build_csr(side * side, road_graph(side, side, seed))
+    return graph.m, lambda: shortestPath(graph, 0)
+
+
+@benchmark('prim_mst', GRAPH_SIZES)
+def _prim_mst(m, seed):
+    side = _lattice_side(m)
+    graph = build_csr(side * side, road_graph(side, side, seed))
+    return graph.m, lambda: primMST(graph, 0)
+
+
+@benchmark('kosaraju_scc', GRAPH_SIZES)
+def _kosaraju_scc(m, seed):
+    n = m // DEGREE
+    graph = build_csr(n, random_graph(n, m, seed))
+    return m, lambda: compute_scc(graph)
+
+
+@benchmark('kosaraju_scc_chain', GRAPH_SIZES)
+def _kosaraju_scc_chain(m, seed):
+    graph = build_csr(m, chain_graph(m, seed))
+    return m, lambda: compute_scc(graph)
+
+
+@benchmark('closest_pair_divide', POINT_SIZES)
+def _closest_pair_divide(n, seed):
+    x, y = uniform_points(n, seed)
+    x, y = x.tolist(), y.tolist()
+    return n, lambda: closestSquaredDistance(x, y, 'divide')
+
+
+@benchmark('closest_pair_grid', POINT_SIZES)
+def _closest_pair_grid(n, seed):
+    x, y = uniform_points(n, seed)
+    return n, lambda: closestSquaredDistance(x, y, 'grid')
+
+
+@benchmark('closest_pair_grid_clustered', POINT_SIZES)
+def _closest_pair_grid_clustered(n, seed):
+    x, y = clustered_points(n, seed)
+    return n, lambda: closestSquaredDistance(x, y, 'grid')
+
+
+@benchmark('closest_pair_grid_duplicates', POINT_SIZES)
+def _closest_pair_grid_duplicates(n, seed):
+    x, y = duplicate_points(n, seed)
+    return n, lambda: closestSquaredDistance(x, y, 'grid')
+
+
+@benchmark('conv2d', IMAGE_SIZES)
+def _conv2d(shape, seed):
+    img = synthetic_image(shape, seed)
+    return img.size, lambda: Conv2D(img, SOBEL_5x5)
+
+
+@benchmark('corner_detection', IMAGE_SIZES)
+def _corner_detection(shape, seed):
+    img = synthetic_image(shape, seed)
+    Ix, Iy = Conv2D(img, SOBEL_5x5), Conv2D(img, SOBEL_5x5.T)
+    return img.size, lambda: CornerDetection(Ix, Iy, 7, 0.06)
+
+
+@benchmark('non_max_suppression', IMAGE_SIZES)
+def _non_max_suppression(shape, seed):
+    img = synthetic_image(shape, seed)
+    R = CornerDetection(Conv2D(img, SOBEL_5x5), Conv2D(img, SOBEL_5x5.T), 7, 0.06)
+    R = (R - R.min()) / (R.max() - R.min())
+    return img.size, lambda: NonMaxSuppression(R, 5)
+
+
+@benchmark('edge_thresholding', IMAGE_SIZES)
+def _edge_thresholding(shape, seed):
+    img = synthetic_image(shape, seed)
+    magnitude = np.hypot(Conv2D(img, SOBEL_5x5), Conv2D(img, SOBEL_5x5.T))
+    magnitude /= magnitude.max()
+    return img.size, lambda: EdgeThresholding(magnitude, 0.1, 0.3)
+
+
+# measuring
+
+def measure(run, repeat=3):
+    """ returns (best running time in seconds, peak memory allocated by one run in bytes) """
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    # a separate run for the memory, as tracing slows the allocations down
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def scaling_exponent(sizes, times):
+    """ least-squares slope of log(time) over log(size), None with fewer than 2 sizes """
+    if len(sizes) < 2:
+        return None
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    sxx = sum((x - x_mean) ** 2 for x in xs)
+    sxy = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    return sxy / sxx
+
+
+def _size_label(size):
+    return 'x'.join(map(str, size)) if isinstance(size, tuple) else str(size)
+
+
+def run_benchmarks(names=None, scale='quick', repeat=3, seed=0, report=print):
+    """
+    names - benchmarks to run (all of BENCHMARKS by default)
+    scale - 'smoke' (seconds, e.g. for tests), 'quick' or 'full'
+    report - called with a line of text for every result (None - silent)
+
+    returns the results, as saved by save_results
+    """
+    results = {'version': BASELINE_VERSION,
+               'platform': {'python': platform.python_version(), 'machine': platform.machine(),
+                            'system': platform.system(), 'numpy': np.__version__},
+               'scale': scale, 'seed': seed, 'benchmarks': {}}
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            raise ValueError(f"unknown benchmark '{name}', expected one of {sorted(BENCHMARKS)}")
+        setup, sizes = BENCHMARKS[name]
+        entries = []
+        for size in sizes[scale]:
+            n, run = setup(size, seed)
+            elapsed, peak = measure(run, repeat)
+            entries.append({'size': _size_label(size), 'n': n, 'time': elapsed, 'peak_bytes': peak})
+            if report:
+                report(f'{name:28} {_size_label(size):>10} {1000*elapsed:10.1f}msec {peak / 2**20:10.1f}MiB')
+
+        exponent = scaling_exponent([e['n'] for e in entries], [e['time'] for e in entries])
+        results['benchmarks'][name] = {'sizes': entries, 'exponent': exponent}
+        if report and exponent is not None:
+            report(f'{name:28} scaling exponent {exponent:.2f}')
+    return results
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get('version') != BASELINE_VERSION:
+        raise ValueError(f"'{path}' is not a version {BASELINE_VERSION} benchmark baseline")
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    compares results against a baseline (both as returned by run_benchmarks), size by size.
+    returns a list of regressions, as text: a running time or a peak memory more than
+    (1 + tolerance) times the baseline's. times shorter than MIN_TIME are not compared
+    """
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            continue
+        reference = {entry['size']: entry for entry in reference['sizes']}
+        for entry in result['sizes']:
+            base = reference.get(entry['size'])
+            if base is None:
+                continue
+            if max(entry['time'], base['time']) >= MIN_TIME and entry['time'] > (1 + tolerance) * base['time']:
+                regressions.append(f"{name} [{entry['size']}]: time {1000*entry['time']:.1f}msec, "
+                                   f"baseline {1000*base['time']:.1f}msec ({entry['time'] / base['time']:.2f}x)")
+            if entry['peak_bytes'] > (1 + tolerance) * base['peak_bytes']:
+                regressions.append(f"{name} [{entry['size']}]: peak memory {entry['peak_bytes']} bytes, "
+                                   f"baseline {base['peak_bytes']} bytes "
+                                   f"({entry['peak_bytes'] / max(base['peak_bytes'], 1):.2f}x)")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark the algorithms on synthetic inputs')
+    parser.add_argument('--scale', choices=['smoke', 'quick', 'full'], default='quick')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help=f'any of {", ".join(BENCHMARKS)}')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='FILE', help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='fail on regressions against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.scale, args.repeat, args.seed)
+    if args.save:
+        save_results(results, args.save)
+    if args.compare:
+        baseline = load_results(args.compare)
+        if baseline['platform'] != results['platform']:
+            print(f"note: the baseline was measured on {baseline['platform']}")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+        print('no regressions')
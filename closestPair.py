@@ -1,151 +1,405 @@
-import random
-import time
-import os
-
-def closestSquaredDistance(x, y):
-    """
-    The O(n log n) implementation of 2-D closest pair
-
-    input:   two lists of x- and corresponding y-coordinates
-             corrects for (ignores) duplicate points
-    returns: a tuple of L2-distance and the closest pair:
-             (dist, [point1, point2])
-    """
-
-    def l2dist(p1, p2):
-        return pow(pow(p1[0] - p2[0], 2) + pow(p1[1] - p2[1], 2), 0.5)
-
-    def closestSplitPair(Px, Py, delta):
-        # screen only x-coordinates within delta distance from mean(x)
-        # using Px (sorted by x-coordinates)
-        x_mean = Px[len(Px) // 2][0]
-
-        # only relevant points (within delta from x_mean), sorted by y-coordinate
-        # O(n)
-        Sy = [(x, y) for x, y in Py if abs(x - x_mean) <= delta]
-        if len(Sy) < 2:
-            return None, None
-
-        # find the closest pair within 8 points
-        # first, initialize min_distance with the highest possible,
-        # then run over the next 8 points to find closer pairs
-        min_dist = pow(pow(Sy[0][1] - Sy[-1][1], 2) + pow((2 * delta), 2), .5)
-
-        pair = (None, None)
-        for i in range(len(Sy)):
-            j = i + 1
-            while j < min(i + 9, len(Sy)):
-                dist = l2dist(Sy[i], Sy[j])
-                if dist < min_dist:
-                    min_dist = dist
-                    pair = (Sy[i], Sy[j])
-                j += 1
-
-        return pair
-
-    def closestPair(Px, Py):
-        """
-        Px - all points sorted by x-coordinate
-        Py - all points sorted by y-coordinate
-        returns a tuple of two points ( (x,y) coordinates ) of the closest pair
-        """
-        # first, handle degenerate cases
-        if len(Px) == 2: return Px[0], Px[1]
-        if len(Px) == 3:
-            dist1 = l2dist(Px[0], Px[1])
-            dist2 = l2dist(Px[1], Px[2])
-            dist3 = l2dist(Px[0], Px[2])
-            return sorted(list(zip([dist1, dist2, dist3],
-                                   [(Px[0], Px[1]), (Px[1], Px[2]),
-                                    (Px[0], Px[2])])))[0][1]
-
-        # split (sorted) data into left and right of x-coordinates
-        # this is O(n), due to Py provided (sorted by y)-- Qy,Ry also sorted
-        ns = len(Px) // 2
-
-        Qx, Rx = Px[:ns], Px[ns:]
-        Qy, Ry = [], []
-
-        x_median = Px[ns][0]
-        for (x, y) in Py:
-            if x <= x_median:
-                Qy.append((x, y))
-            else:
-                Ry.append((x, y))
-
-        # recursively find the closest pair on each side
-        (p1, q1) = closestPair(Qx, Qy)
-        (p2, q2) = closestPair(Rx, Ry)
-
-        d1, d2 = l2dist(p1, q1), l2dist(p2, q2)
-        delta = min(d1, d2)
-
-        # look for closest pair in between the two sides
-        (p3, q3) = closestSplitPair(Px, Py, delta)
-
-        if not p3 or not q3:
-            d3 = float("inf")
-        else:
-            d3 = l2dist(p3, q3)
-
-        min_pairs = list(zip([d1, d2, d3], [(p1, q1), (p2, q2), (p3, q3)]))
-
-        return sorted(min_pairs)[0][1]
-
-    # make sure no duplicates
-    points = list(set(zip(x, y)))
-
-    # sort by x- and y- coordinates
-    # O(n log n)
-    Px = sorted(points)
-    Py = sorted(points, key=lambda x: x[1])
-
-    (p1, p2) = closestPair(Px, Py)
-
-    return l2dist(p1, p2), [p1, p2]
-
-if __name__ == '__main__':
-    N = 1000
-    M = 50
-
-    for k in range(M):
-        os.system('cls')
-        print(f'running with set size of {N}, over {M} iterations...')
-        print(f'iteration {k+1}')
-
-        # generate random points
-        x = [random.randint(-1000, 1000) for _ in range(N)]
-        y = [random.randint(-1000, 1000) for _ in range(N)]
-
-        # initialize timers
-        base_time = 0
-        algo_time = 0
-
-        # find the closest pair
-        start = time.time()
-        min_dist = float('inf')
-        for i in range(len(x)):
-            for j in range(i+1, len(x)):
-                # points need to be distinct
-                if (x[i], y[i]) == (x[j], y[j]):
-                    continue
-                min_dist = min(min_dist,
-                               pow(pow(x[i] - x[j], 2) + pow(y[i] - y[j], 2), .5))
-        base_time += time.time() - start
-
-        # test algorithm O(n log n)
-        start = time.time()
-        dist, pair = closestSquaredDistance(x, y)
-        algo_time += time.time() - start
-        # print(time.time() - start)
-
-        if dist != min_dist:
-            print('!!mismatch!!')
-            print(f'x={x}')
-            print(f'y={y}')
-            break
-    # contrast running time
-    os.system('cls')
-    print(f'running with set size of {N}, over {M} iterations... Done!')
-    print(f'naive approach: average of {1000*base_time / (k+1)}msec per iteration')
-    print(f'algorithm:      average of {1000*algo_time / (k+1)}msec per iteration')
\ No newline at end of file
+import heapq
+import math
+import random
+import time
+import os
+
+import numpy as np
+from spatial_index import GridIndex, squared_distances
+
+# point sets this small are compared all-pairs by the grid engine
+BRUTE_FORCE_SIZE = 64
+
+def divideClosestPair(x, y):
+    """
+    The O(n log n) implementation of 2-D closest pair
+
+    input:   two lists of x- and corresponding y-coordinates
+             corrects for (ignores) duplicate points
+    returns: a tuple of L2-distance and the closest pair:
+             (dist, [point1, point2])
+    """
+
+    def l2dist(p1, p2):
+        return pow(pow(p1[0] - p2[0], 2) + pow(p1[1] - p2[1], 2), 0.5)
+
+    def closestSplitPair(Px, Py, delta):
+        # screen only x-coordinates within delta distance from mean(x)
+        # using Px (sorted by x-coordinates)
+        x_mean = Px[len(Px) // 2][0]
+
+        # only relevant points (within delta from x_mean), sorted by y-coordinate
+        # O(n)
+        Sy = [(x, y) for x, y in Py if abs(x - x_mean) <= delta]
+        if len(Sy) < 2:
+            return None, None
+
+        # find the closest pair within 8 points
+        # first, initialize min_distance with the highest possible,
+        # then run over the next 8 points to find closer pairs
+        min_dist = pow(pow(Sy[0][1] - Sy[-1][1], 2) + pow((2 * delta), 2), .5)
+
+        pair = (None, None)
+        for i in range(len(Sy)):
+            j = i + 1
+            while j < min(i + 9, len(Sy)):
+                dist = l2dist(Sy[i], Sy[j])
+                if dist < min_dist:
+                    min_dist = dist
+                    pair = (Sy[i], Sy[j])
+                j += 1
+
+        return pair
+
+    def closestPair(Px, Py):
+        """
+        Px - all points sorted by x-coordinate
+        Py - all points sorted by y-coordinate
+        returns a tuple of two points ( (x,y) coordinates ) of the closest pair
+        """
+        # first, handle degenerate cases
+        if len(Px) == 2: return Px[0], Px[1]
+        if len(Px) == 3:
+            dist1 = l2dist(Px[0], Px[1])
+            dist2 = l2dist(Px[1], Px[2])
+            dist3 = l2dist(Px[0], Px[2])
+            return sorted(list(zip([dist1, dist2, dist3],
+                                   [(Px[0], Px[1]), (Px[1], Px[2]),
+                                    (Px[0], Px[2])])))[0][1]
+
+        # split (sorted) data into left and right of x-coordinates
+        # this is O(n), due to Py provided (sorted by y)-- Qy,Ry also sorted
+        ns = len(Px) // 2
+
+        Qx, Rx = Px[:ns], Px[ns:]
+        Qy, Ry = [], []
+
+        x_median = Px[ns][0]
+        for (x, y) in Py:
+            if x <= x_median:
+                Qy.append((x, y))
+            else:
+                Ry.append((x, y))
+
+        # recursively find the closest pair on each side
+        (p1, q1) = closestPair(Qx, Qy)
+        (p2, q2) = closestPair(Rx, Ry)
+
+        d1, d2 = l2dist(p1, q1), l2dist(p2, q2)
+        delta = min(d1, d2)
+
+        # look for closest pair in between the two sides
+        (p3, q3) = closestSplitPair(Px, Py, delta)
+
+        if not p3 or not q3:
+            d3 = float("inf")
+        else:
+            d3 = l2dist(p3, q3)
+
+        min_pairs = list(zip([d1, d2, d3], [(p1, q1), (p2, q2), (p3, q3)]))
+
+        return sorted(min_pairs)[0][1]
+
+    # make sure no duplicates
+    points = list(set(zip(x, y)))
+
+    # sort by x- and y- coordinates
+    # O(n log n)
+    Px = sorted(points)
+    Py = sorted(points, key=lambda x: x[1])
+
+    (p1, p2) = closestPair(Px, Py)
+
+    return l2dist(p1, p2), [p1, p2]
+
+def _unique_points(x, y):
+    # (n, 2) array of the distinct points (sorted by x, then y)
+    x, y = np.asarray(x), np.asarray(y)
+    P = np.column_stack((x, y))[np.lexsort((y, x))]
+    distinct = np.ones(len(P), dtype=bool)
+    distinct[1:] = (P[1:] != P[:-1]).any(axis=1)
+    return P[distinct]
+
+def _brute_force_pair(P):
+    # closest pair of a small point set, comparing all pairs: (squared distance, i, j)
+    i, j = np.triu_indices(len(P), 1)
+    d2 = squared_distances(P, i, j)
+    k = np.argmin(d2)
+    return d2[k], i[k], j[k]
+
+def _grid_closest(P, rng):
+    # (squared distance, i, j) of the closest pair of the distinct points P
+    n = len(P)
+    if n <= BRUTE_FORCE_SIZE:
+        return _brute_force_pair(P)
+
+    # the closest distance within a random sample of n**(2/3) points is an upper bound on the
+    # closest distance, and a grid of that cell size has O(n) pairs of points in the same or
+    # neighbouring cells, in expectation (Rabin)
+    sample = rng.choice(n, int(n ** (2/3)), replace=False)
+    best, i, j = _grid_closest(P[sample], rng)
+    i, j = sample[i], sample[j]
+
+    # any closer pair is in the same cell or in neighbouring ones. the cells are made a bit
+    # larger than the distance, so that rounding can't put such a pair two cells apart
+    grid = GridIndex(P[:, 0], P[:, 1], cell=float(best) ** 0.5 * (1 + 1e-9))
+    for pi, pj in grid.neighbour_pairs():
+        if len(pi) == 0:
+            continue
+        d2 = squared_distances(P, pi, pj)
+        k = np.argmin(d2)
+        if d2[k] < best:
+            best, i, j = d2[k], pi[k], pj[k]
+    return best, i, j
+
+def gridClosestPair(x, y, seed=None):
+    """
+    Randomized, expected O(n) implementation of 2-D closest pair
+    (Rabin's grid method, as in Khuller & Matias): the distance of the closest pair
+    within a random sample gives the cell size of a grid, and only points in the same
+    or neighbouring cells are compared.
+    the coordinates are kept in numpy arrays and compared as squared distances
+    (exact for integer coordinates below 2**30)
+
+    input:   two lists (or arrays) of x- and corresponding y-coordinates
+             corrects for (ignores) duplicate points
+             seed - of the random sampling (the distance found doesn't depend on it)
+    returns: a tuple of L2-distance and the closest pair:
+             (dist, [point1, point2])
+    """
+    P = _unique_points(x, y)
+    if len(P) < 2:
+        raise ValueError('at least two distinct points are needed')
+    d2, i, j = _grid_closest(P, np.random.default_rng(seed))
+    return d2.item() ** 0.5, [tuple(P[i].tolist()), tuple(P[j].tolist())]
+
+ENGINES = {
+    'divide': divideClosestPair,
+    'grid': gridClosestPair,
+}
+
+def closestSquaredDistance(x, y, engine='divide'):
+    """
+    input:   two lists of x- and corresponding y-coordinates
+             engine - 'divide' (divide and conquer, O(n log n)) or 'grid' (randomized
+             grid hashing, expected O(n), for large point sets)
+    returns: a tuple of L2-distance and the closest pair:
+             (dist, [point1, point2])
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown closest pair engine '{engine}', expected one of {sorted(ENGINES)}")
+    return ENGINES[engine](x, y)
+
+class DynamicClosestPair:
+    """
+    closest pair of a changing set of 2-D points (e.g. moving objects), under insertions,
+    deletions and moves, without recomputing it from scratch.
+
+    the points are bucketed in a grid whose cells are about twice the closest distance, and
+    every pair of points in neighbouring cells that's within a cell size of each other is
+    kept in a heap ("near pairs"), which always holds the closest pair. a change only looks
+    at the 3 x 3 cells around the point, and the heap's stale entries are dropped lazily.
+
+    the grid is rebuilt, in O(n), when the closest distance has moved far from the cell
+    size:
+      - shrunk below a quarter of it (by an insertion): the heap is still right, only the
+        cells get crowded, so the rebuild waits until the work since the last one (updates,
+        and points compared in the cells) reaches a constant fraction of n
+      - grown past it (deletions left no near pair): at a query. the new cell is more than
+        twice the old one, so there are at most log2(spread of the distances) of these
+        between two of the former
+    which makes an update amortized O(log(spread)), and O(1) unless the points keep
+    spreading apart.
+
+    points are referred to by ids, returned by insert. as in closestSquaredDistance,
+    coinciding points are ignored (never a pair)
+    """
+
+    def __init__(self, x=(), y=()):
+        # id -> (x, y), and a version per id, stamped on its heap entries
+        self.position = {}
+        self.version = {}
+        self.next_id = 0
+        self.cell = 1.0
+        self.grid = {}
+        self.heap = []
+        for id, point in enumerate(zip(x, y)):
+            self.position[id] = point
+            self.version[id] = 0
+        self.next_id = len(self.position)
+        self._rebuild()
+
+    def __len__(self):
+        return len(self.position)
+
+    def __contains__(self, id):
+        return id in self.position
+
+    def _cell(self, x, y):
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def _add(self, id, x, y):
+        self.position[id] = (x, y)
+        v = self.version[id] = self.version.get(id, -1) + 1
+        cx, cy = self._cell(x, y)
+        c2 = self.cell * self.cell
+        grid, position, version, heap = self.grid, self.position, self.version, self.heap
+        work = 1
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                members = grid.get((i, j), ())
+                work += len(members)
+                for other in members:
+                    ox, oy = position[other]
+                    d2 = (x - ox) * (x - ox) + (y - oy) * (y - oy)
+                    if 0 < d2 <= c2:
+                        heapq.heappush(heap, (d2, id, v, other, version[other]))
+                        if 16 * d2 < c2:
+                            self.dirty = True
+        grid.setdefault((cx, cy), []).append(id)
+        self.work += work
+
+        if self.dirty and self.work >= self.budget:
+            self._rebuild()
+        # drop the stale entries once they're the majority
+        elif len(heap) > self.heap_limit:
+            self.heap = [entry for entry in heap if self._valid(entry)]
+            heapq.heapify(self.heap)
+            self.heap_limit = 2 * max(len(self.heap), len(position), 16)
+
+    def _remove(self, id):
+        x, y = self.position.pop(id)
+        key = self._cell(x, y)
+        members = self.grid[key]
+        members.remove(id)
+        if not members:
+            del self.grid[key]
+        self.work += 1
+
+    def _valid(self, entry):
+        # deleted points have no version
+        _, a, va, b, vb = entry
+        version = self.version
+        return version.get(a) == va and version.get(b) == vb
+
+    def _rebuild(self):
+        # new cell size, twice the closest distance, and the near pairs (vectorized)
+        ids = list(self.position)
+        xs = np.array([self.position[id][0] for id in ids])
+        ys = np.array([self.position[id][1] for id in ids])
+        try:
+            self.cell = 2 * gridClosestPair(xs, ys)[0]
+        except ValueError: # fewer than 2 distinct points, keep the cell size
+            pass
+
+        self.grid = {}
+        for id in ids:
+            self.grid.setdefault(self._cell(*self.position[id]), []).append(id)
+
+        self.heap = []
+        if len(ids) >= 2:
+            index = GridIndex(xs, ys, self.cell)
+            c2 = self.cell * self.cell
+            version = self.version
+            for i, j in index.neighbour_pairs():
+                d2 = squared_distances(index.points, i, j)
+                near = (d2 > 0) & (d2 <= c2)
+                for d, a, b in zip(d2[near].tolist(), i[near].tolist(), j[near].tolist()):
+                    a, b = ids[a], ids[b]
+                    self.heap.append((d, a, version[a], b, version[b]))
+        heapq.heapify(self.heap)
+        self.heap_limit = 2 * max(len(self.heap), len(ids), 16)
+        self.dirty = False
+        # the work until a crowded grid is rebuilt again
+        self.work = 0
+        self.budget = len(ids) // 2 + 64
+
+    def insert(self, x, y):
+        """ add the point (x, y), returns its id """
+        id = self.next_id
+        self.next_id += 1
+        self._add(id, x, y)
+        return id
+
+    def delete(self, id):
+        """ remove the point id """
+        self._remove(id)
+        # its heap entries are now stale
+        del self.version[id]
+
+    def move(self, id, x, y):
+        """ move the point id to (x, y) """
+        self._remove(id)
+        # a new version, so its heap entries are stale
+        self._add(id, x, y)
+
+    def closest(self):
+        """
+        returns a tuple of L2-distance and the ids of the closest pair: (dist, (id1, id2)),
+        or None if there are fewer than two distinct points
+        """
+        for attempt in range(2):
+            heap = self.heap
+            while heap and not self._valid(heap[0]):
+                heapq.heappop(heap)
+            # every pair within the cell size is in the heap - unless deletions left none,
+            # and the closest distance is now larger than the cell size
+            if heap and heap[0][0] <= self.cell * self.cell:
+                d2, a, _, b, _ = heap[0]
+                return d2 ** 0.5, (a, b)
+            if attempt == 0:
+                self._rebuild()
+        return None
+
+if __name__ == '__main__':
+    N = 1000
+    M = 50
+
+    for k in range(M):
+        os.system('cls')
+        print(f'running with set size of {N}, over {M} iterations...')
+        print(f'iteration {k+1}')
+
+        # generate random points
+        x = [random.randint(-1000, 1000) for _ in range(N)]
+        y = [random.randint(-1000, 1000) for _ in range(N)]
+
+        # initialize timers
+        base_time = 0
+        algo_time = 0
+        grid_time = 0
+
+        # find the closest pair
+        start = time.time()
+        min_dist = float('inf')
+        for i in range(len(x)):
+            for j in range(i+1, len(x)):
+                # points need to be distinct
+                if (x[i], y[i]) == (x[j], y[j]):
+                    continue
+                min_dist = min(min_dist,
+                               pow(pow(x[i] - x[j], 2) + pow(y[i] - y[j], 2), .5))
+        base_time += time.time() - start
+
+        # test algorithm O(n log n)
+        start = time.time()
+        dist, pair = closestSquaredDistance(x, y)
+        algo_time += time.time() - start
+        # print(time.time() - start)
+
+        # test the grid engine, expected O(n)
+        start = time.time()
+        grid_dist, _ = closestSquaredDistance(x, y, engine='grid')
+        grid_time += time.time() - start
+
+        if dist != min_dist or grid_dist != min_dist:
+            print('!!mismatch!!')
+            print(f'x={x}')
+            print(f'y={y}')
+            break
+    # contrast running time
+    os.system('cls')
+    print(f'running with set size of {N}, over {M} iterations... Done!')
+    print(f'naive approach: average of {1000*base_time / (k+1)}msec per iteration')
+    print(f'algorithm:      average of {1000*algo_time / (k+1)}msec per iteration')
+    print(f'grid engine:    average of {1000*grid_time / (k+1)}msec per iteration')
\ No newline at end of file
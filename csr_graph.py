@@ -0,0 +1,311 @@
+"""
+Compressed-Sparse-Row (CSR) graph representation.
+
+The out-edges of vertex v are stored contiguously:
+    targets[offsets[v]:offsets[v+1]]  - the head vertices
+    weights[offsets[v]:offsets[v+1]]  - the matching edge weights (optional)
+
+All the buffers are flat typed arrays (python's 'array' module, or any
+buffer/memoryview of the same typecode), instead of dicts of lists of tuples,
+so a graph of m edges costs ~12-16 bytes per edge instead of ~100+ bytes of
+python objects, and scanning a vertex's edges walks contiguous memory.
+
+Vertices are numbered 0..n-1. The 1-indexed input files of this repo simply
+leave vertex 0 without edges.
+
+A graph can be changed through set_weight and update_edges; every change
+increments its version, so results computed on it (e.g. cached shortest
+paths) can tell they're stale.
+
+See also https://en.wikipedia.org/wiki/Sparse_matrix#Compressed_sparse_row_(CSR,_CRS_or_Yale_format)
+"""
+
+from array import array
+
+# typecodes of the CSR buffers (fixed item sizes)
+OFFSET_TYPE = 'q'   # int64 - number of edges may exceed 2^31
+VERTEX_TYPE = 'i'   # int32 - vertex ids
+INT_WEIGHT_TYPE = 'q'
+FLOAT_WEIGHT_TYPE = 'd'
+
+
+class CSRGraph:
+    """
+    directed, optionally weighted, graph in CSR form.
+    an undirected graph is represented by storing each edge in both directions.
+
+    version - incremented by every change made through the graph's methods
+    """
+
+    def __init__(self, offsets, targets, weights=None):
+        """
+        offsets - n+1 non-decreasing edge indices, offsets[0] == 0
+        targets - m head vertices
+        weights - m edge weights, or None for an unweighted graph
+        """
+        if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(targets):
+            raise ValueError('offsets must start at 0 and end at len(targets)')
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError('weights and targets must have the same length')
+
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.n = len(offsets) - 1
+        self.m = len(targets)
+
+        # transposed graph, computed on demand (see reverse())
+        self._reverse = None
+        self.version = 0
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f'CSRGraph(n={self.n}, m={self.m}, weighted={self.weighted})'
+
+    @property
+    def weighted(self):
+        return self.weights is not None
+
+    @property
+    def weight_type(self):
+        """ typecode of the weights (INT_WEIGHT_TYPE for an unweighted graph) """
+        return INT_WEIGHT_TYPE if self.weights is None else _weight_type(self.weights)
+
+    @classmethod
+    def from_edges(cls, n, tails, heads, weights=None):
+        """
+        build a graph of n vertices from parallel sequences of edge tails,
+        heads and (optionally) weights, using a counting sort by tail - O(n + m).
+        the order of edges of each vertex is kept as in the input.
+        """
+        m = len(tails)
+        if len(heads) != m or (weights is not None and len(weights) != m):
+            raise ValueError('tails, heads and weights must have the same length')
+
+        # count out-degrees, shifted by one, then prefix-sum them into offsets
+        offsets = array(OFFSET_TYPE, [0]) * (n + 1)
+        for t in tails:
+            offsets[t + 1] += 1
+        for v in range(n):
+            offsets[v + 1] += offsets[v]
+
+        # scatter the edges into their slots
+        position = array(OFFSET_TYPE, offsets[:-1])
+        targets = array(VERTEX_TYPE, [0]) * m
+        if weights is not None:
+            typecode = _weight_type(weights)
+            w_out = array(typecode, [0]) * m
+            for t, h, w in zip(tails, heads, weights):
+                e = position[t]
+                targets[e] = h
+                w_out[e] = w
+                position[t] = e + 1
+        else:
+            w_out = None
+            for t, h in zip(tails, heads):
+                e = position[t]
+                targets[e] = h
+                position[t] = e + 1
+
+        return cls(offsets, targets, w_out)
+
+    @classmethod
+    def from_adjacency(cls, adj_list, n=None):
+        """
+        convert the adjacency lists used throughout this repo:
+          - dict {vertex: [(head, weight), ...]}  (Dijksra_ShortestPath.get_file)
+          - dict {vertex: [head, ...]}            (scc_kosaraju_algorithm.get_file)
+          - list [[(head, weight), ...], ...]     (prims_algorithm, index = vertex)
+        n - number of vertices; by default the largest vertex id seen + 1
+        """
+        items = adj_list.items() if isinstance(adj_list, dict) else enumerate(adj_list)
+
+        tails = array(VERTEX_TYPE)
+        heads = array(VERTEX_TYPE)
+        weights = []
+        weighted = None
+        max_id = -1
+        for v, edges in items:
+            if edges is None:
+                continue
+            max_id = max(max_id, v)
+            for edge in edges:
+                if weighted is None:
+                    weighted = isinstance(edge, tuple)
+                tails.append(v)
+                if weighted:
+                    heads.append(edge[0])
+                    weights.append(edge[1])
+                else:
+                    heads.append(edge)
+        if heads:
+            max_id = max(max_id, max(heads))
+
+        if n is None:
+            n = max_id + 1
+        elif n <= max_id:
+            raise ValueError(f'vertex {max_id} out of range for n={n}')
+
+        return cls.from_edges(n, tails, heads, weights if weighted else None)
+
+    def out_degree(self, v):
+        return self.offsets[v + 1] - self.offsets[v]
+
+    def neighbors(self, v):
+        """ head vertices of the edges directed from v """
+        return self.targets[self.offsets[v]:self.offsets[v + 1]]
+
+    def edges(self, v):
+        """ iterator of (head, weight) over the edges directed from v """
+        a, b = self.offsets[v], self.offsets[v + 1]
+        if self.weights is None:
+            return zip(self.targets[a:b], (1 for _ in range(b - a)))
+        return zip(self.targets[a:b], self.weights[a:b])
+
+    def reverse(self):
+        """
+        the transposed graph (tail<->head). computed once on first use and
+        cached, so algorithms that need it (e.g. Kosaraju) don't require the
+        caller to keep a second adjacency list around.
+        """
+        if self._reverse is None:
+            offsets, targets = self.offsets, self.targets
+            tails = array(VERTEX_TYPE, [0]) * self.m
+            for v in range(self.n):
+                for e in range(offsets[v], offsets[v + 1]):
+                    tails[e] = v
+            self._reverse = CSRGraph.from_edges(self.n, targets, tails, self.weights)
+            self._reverse._reverse = self
+        return self._reverse
+
+    def touch(self):
+        """
+        record a change of the graph: increment its version and drop the reversed
+        graph. the graph's methods call it, and so should code changing the
+        buffers directly
+        """
+        self.version += 1
+        if self._reverse is not None:
+            self._reverse._reverse = None
+            self._reverse = None
+
+    def _own_buffers(self):
+        # copy buffers which aren't arrays (e.g. read-only views of a mapped file) into arrays
+        for name in ('offsets', 'targets', 'weights'):
+            buf = getattr(self, name)
+            if buf is not None and not isinstance(buf, array):
+                copy = array(_weight_type(buf))
+                copy.frombytes(memoryview(buf).cast('B'))
+                setattr(self, name, copy)
+
+    def _has_edge(self, tail, head):
+        return any(self.targets[e] == head for e in range(self.offsets[tail], self.offsets[tail + 1]))
+
+    def _weight_type_for(self, new_weights):
+        """
+        typecode of the weights once new_weights are added: integer weights are
+        promoted to FLOAT_WEIGHT_TYPE by a float one
+        """
+        typecode = self.weight_type
+        if typecode not in ('f', 'd') and any(isinstance(w, float) for w in new_weights):
+            return FLOAT_WEIGHT_TYPE
+        return typecode
+
+    def set_weight(self, tail, head, weight):
+        """
+        set the weight of the edge tail -> head (of all of them, for parallel edges).
+        O(out-degree of tail). raises KeyError if there's no such edge
+        """
+        if self.weights is None:
+            raise ValueError('the graph is unweighted')
+        if not (0 <= tail < self.n and self._has_edge(tail, head)):
+            raise KeyError((tail, head))
+        self._own_buffers()
+        typecode = self._weight_type_for([weight])
+        if typecode != self.weights.typecode:
+            self.weights = array(typecode, self.weights)
+        for e in range(self.offsets[tail], self.offsets[tail + 1]):
+            if self.targets[e] == head:
+                self.weights[e] = weight
+        self.touch()
+
+    def update_edges(self, insert=(), delete=(), reweight=()):
+        """
+        apply a batch of changes, rebuilding the CSR arrays once - O(n + m + changes):
+          delete - (tail, head) pairs, removing all the edges tail -> head
+          insert - (tail, head, weight) edges to add ((tail, head) if unweighted),
+                   after the deletions (so an edge can be replaced)
+          reweight - (tail, head, weight), as set_weight, after the insertions
+        the vertices stay 0..n-1. the order of the remaining edges of a vertex is kept,
+        inserted edges come after them. a float weight makes integer weights floats.
+        the batch is checked first: on an error (ValueError, or KeyError for a reweight
+        of a missing edge) the graph is left unchanged
+        """
+        insert, delete = list(insert), set(delete)
+        n, weighted = self.n, self.weights is not None
+        for edge in insert:
+            if not (0 <= edge[0] < n and 0 <= edge[1] < n):
+                raise ValueError(f'edge {edge} out of range for n={n}')
+            if len(edge) != 2 + weighted:
+                raise ValueError(f'edge {edge} should be (tail, head{", weight" if weighted else ""})')
+        # the new weight of every reweighted (tail, head) pair, which must exist after
+        # the deletions and insertions
+        new_weight = {}
+        inserted = {(edge[0], edge[1]) for edge in insert}
+        for tail, head, weight in reweight:
+            if not weighted:
+                raise ValueError('the graph is unweighted')
+            pair = (tail, head)
+            if pair not in inserted and (pair in delete or not (0 <= tail < n and self._has_edge(tail, head))):
+                raise KeyError(pair)
+            new_weight[pair] = weight
+        typecode = self._weight_type_for([edge[2] for edge in insert] + list(new_weight.values())) \
+            if weighted else None
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        tails, heads = array(VERTEX_TYPE), array(VERTEX_TYPE)
+        new_weights = array(typecode) if weighted else None
+        for v in range(n):
+            for e in range(offsets[v], offsets[v + 1]):
+                head = targets[e]
+                if delete and (v, head) in delete:
+                    continue
+                tails.append(v)
+                heads.append(head)
+                if weighted:
+                    new_weights.append(new_weight.get((v, head), weights[e]))
+        for edge in insert:
+            tails.append(edge[0])
+            heads.append(edge[1])
+            if weighted:
+                new_weights.append(new_weight.get((edge[0], edge[1]), edge[2]))
+
+        rebuilt = CSRGraph.from_edges(n, tails, heads, new_weights)
+        self.offsets, self.targets, self.weights = rebuilt.offsets, rebuilt.targets, rebuilt.weights
+        self.m = rebuilt.m
+        self.touch()
+
+    def nbytes(self):
+        """ memory held by the CSR buffers, in bytes """
+        total = 0
+        for buf in (self.offsets, self.targets, self.weights):
+            if buf is not None:
+                total += len(buf) * buf.itemsize
+        return total
+
+
+def _weight_type(weights):
+    if isinstance(weights, (array, memoryview)):
+        return weights.typecode if isinstance(weights, array) else weights.format
+    return FLOAT_WEIGHT_TYPE if any(isinstance(w, float) for w in weights) else INT_WEIGHT_TYPE
+
+
+def as_csr(graph, n=None):
+    """
+    return graph as a CSRGraph, converting a legacy adjacency list if needed.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    return CSRGraph.from_adjacency(graph, n)
@@ -0,0 +1,256 @@
+"""
+Dynamic single-source shortest paths: keeps the distances and the shortest-path tree
+from a source up to date as edges are inserted, deleted or change weight, repairing
+only the vertices a batch of changes affects (in the spirit of Ramalingam and Reps'
+algorithm), instead of running Dijkstra on the whole graph again.
+
+  - an increased (or deleted) edge matters only if it's a tree edge: the vertices of
+    the subtree below it lose their distances, and get new ones from their edges coming
+    from the rest of the tree
+  - a decreased (or inserted) edge (u, v) matters only if it shortens the path to v
+  - both kinds of changes are then propagated with one Dijkstra run, seeded with those
+    vertices, which stops wherever distances don't change
+
+so a batch costs about the size of the subtrees below the changed tree edges and of the
+region whose distances improve (with their edges), rather than O(m log n). weights must
+be non-negative.
+
+the changes are kept in an overlay over the graph's CSR arrays, and applied to the graph
+(see commit) in batches, as rebuilding CSR arrays costs O(n + m). a commit also drops the
+graph's reversed graph, which the next batch that lengthens a tree edge rebuilds, in
+O(m) too. a DynamicShortestPaths commits once the overlay has m/16 changed edges, so both
+are amortized over those; updateShortestPaths commits its single batch, and so costs
+O(n + m) per call whatever the batch - for a stream of batches, keep a
+DynamicShortestPaths.
+
+See also https://en.wikipedia.org/wiki/Dynamic_problem_(algorithms)
+"""
+
+import heapq
+from array import array
+
+from csr_graph import as_csr, VERTEX_TYPE
+from Dijksra_ShortestPath import shortestPath, INF
+
+# the overlay is applied to the graph once it has this many changed edges, or 1/16 of them
+COMMIT_CHANGES = 1 << 12
+
+
+class DynamicShortestPaths:
+    """
+    the shortest paths from a source (or sources) over a changing graph.
+
+    the changes are made through update(), and the results read with distance(),
+    distances(), predecessors() and path(), as those of ShortestPathSearch.
+    """
+
+    def __init__(self, graph, source, distances=None, predecessors=None):
+        """
+        graph - the graph, as in shortestPath. a CSRGraph is changed in place (see commit)
+        source - the source vertex, or an iterable of sources (as in shortestPath)
+        distances, predecessors - the result of shortestPath(graph, source, predecessors=True)
+                                  over the whole graph (not stopped at targets), if already
+                                  computed; by default computed here
+        """
+        self.graph = as_csr(graph)
+        self.sources = {source} if isinstance(source, int) else set(source)
+        if distances is None or predecessors is None:
+            distances, predecessors = shortestPath(self.graph, self.sources, predecessors=True)
+        if len(distances) != self.graph.n or len(predecessors) != self.graph.n:
+            raise ValueError('distances and predecessors must have an entry per vertex')
+
+        # internally INF for unreachable vertices
+        self.dist = [INF if d == -1 else d for d in distances]
+        self.pred = array(VERTEX_TYPE, predecessors)
+
+        # the overlay: the current edges (their weights) of every changed (tail, head) pair,
+        # replacing the pair's edges in the graph, and the changed pairs by tail and by head
+        self.changed = {}
+        self.changed_out = {}
+        self.changed_in = {}
+
+    # the current graph
+
+    def _out_edges(self, v):
+        """ (head, weight) of the current edges from v """
+        heads = self.changed_out.get(v)
+        for head, w in self.graph.edges(v):
+            if heads is None or head not in heads:
+                yield head, w
+        if heads:
+            for head in heads:
+                for w in self.changed[v, head]:
+                    yield head, w
+
+    def _in_edges(self, v):
+        """ (tail, weight) of the current edges into v """
+        tails = self.changed_in.get(v)
+        for tail, w in self.graph.reverse().edges(v):
+            if tails is None or tail not in tails:
+                yield tail, w
+        if tails:
+            for tail in tails:
+                for w in self.changed[tail, v]:
+                    yield tail, w
+
+    def _weights(self, tail, head):
+        """ the current weights of the edges tail -> head """
+        weights = self.changed.get((tail, head))
+        if weights is None:
+            weights = [w for h, w in self.graph.edges(tail) if h == head]
+        return weights
+
+    def _set(self, tail, head, weights):
+        # replace the edges tail -> head
+        self.changed[tail, head] = weights
+        self.changed_out.setdefault(tail, set()).add(head)
+        self.changed_in.setdefault(head, set()).add(tail)
+
+    def commit(self):
+        """
+        apply the pending changes to the graph (CSRGraph.update_edges, which increments
+        its version) - O(n + m). update() does so by itself once there are many of them
+        """
+        if not self.changed:
+            return
+        weighted = self.graph.weighted
+        insert = [(tail, head, w) if weighted else (tail, head)
+                  for (tail, head), weights in self.changed.items() for w in weights]
+        self.graph.update_edges(insert=insert, delete=self.changed)
+        self.changed, self.changed_out, self.changed_in = {}, {}, {}
+
+    # updates
+
+    def update(self, insert=(), delete=(), reweight=()):
+        """
+        apply a batch of changes, as CSRGraph.update_edges:
+          delete - (tail, head) pairs, removing all the edges tail -> head
+          insert - (tail, head, weight) edges to add, after the deletions
+          reweight - (tail, head, weight), setting the weight of the edges tail -> head
+                     (of all of them, for parallel edges), after the insertions
+        and repair the shortest paths. returns the set of vertices whose distance changed
+        """
+        # the new weights of the changed pairs, checked before changing anything
+        n = self.graph.n
+        pairs = {}
+
+        def current(tail, head):
+            if not (0 <= tail < n and 0 <= head < n):
+                raise ValueError(f'edge ({tail}, {head}) out of range for n={n}')
+            return pairs[tail, head] if (tail, head) in pairs else self._weights(tail, head)
+
+        for tail, head in delete:
+            current(tail, head)
+            pairs[tail, head] = []
+        for tail, head, w in insert:
+            pairs[tail, head] = current(tail, head) + [w]
+        for tail, head, w in reweight:
+            weights = current(tail, head)
+            if not weights:
+                raise KeyError((tail, head))
+            pairs[tail, head] = [w] * len(weights)
+        for (tail, head), weights in pairs.items():
+            if any(w < 0 for w in weights):
+                raise ValueError(f'negative weight of edge ({tail}, {head})')
+        for (tail, head), weights in pairs.items():
+            self._set(tail, head, weights)
+
+        dist, pred = self.dist, self.pred
+        # the shortest of the edges of every changed pair, now
+        shortest = {pair: min(weights, default=INF) for pair, weights in pairs.items()}
+        # tree edges which got longer (or deleted): their subtrees lose their distances
+        roots = [head for (tail, head), w in shortest.items() if pred[head] == tail and dist[tail] + w > dist[head]]
+        old_dist = {}
+        affected = self._detach(roots, old_dist)
+
+        # seeds of the propagation: edges which shorten a path (or reach a vertex)...
+        frontier = [(dist[tail] + w, head, tail) for (tail, head), w in shortest.items()
+                    if dist[tail] + w < dist[head]]
+        for v in affected:
+            # ...and the edges into the detached subtrees from the rest of the tree
+            for tail, w in self._in_edges(v):
+                if tail not in affected and dist[tail] + w < INF:
+                    frontier.append((dist[tail] + w, v, tail))
+        self._propagate(frontier, old_dist)
+
+        if len(self.changed) > max(COMMIT_CHANGES, self.graph.m // 16):
+            self.commit()
+        return {v for v, d in old_dist.items() if dist[v] != d}
+
+    def _detach(self, roots, old_dist):
+        """
+        remove the subtrees of roots from the shortest-path tree, recording their old
+        distances in old_dist. returns the set of their vertices
+        """
+        dist, pred = self.dist, self.pred
+        affected = set()
+        stack = [v for v in roots if v not in self.sources]
+        while stack:
+            v = stack.pop()
+            if v in affected:
+                continue
+            affected.add(v)
+            for head, _ in self._out_edges(v):
+                if pred[head] == v and head not in affected:
+                    stack.append(head)
+        # the children of a vertex are found by its pred entry, so they're reset only now
+        for v in affected:
+            old_dist[v] = dist[v]
+            dist[v] = INF
+            pred[v] = -1
+        return affected
+
+    def _propagate(self, frontier, old_dist):
+        """ Dijkstra from the seeds (distance, vertex, predecessor) of frontier """
+        dist, pred = self.dist, self.pred
+        heapq.heapify(frontier)
+        while frontier:
+            key, v, tail = heapq.heappop(frontier)
+            if key >= dist[v]:
+                # stale, or no shorter than known
+                continue
+            old_dist.setdefault(v, dist[v])
+            dist[v] = key
+            pred[v] = tail
+            for head, w in self._out_edges(v):
+                if key + w < dist[head]:
+                    heapq.heappush(frontier, (key + w, head, v))
+
+    # results
+
+    def distance(self, v):
+        """ shortest path to v, -1 if unreachable """
+        d = self.dist[v]
+        return -1 if d == INF else d
+
+    def distances(self):
+        """ list of the shortest paths to all the vertices (-1 if unreachable) """
+        return [-1 if d == INF else d for d in self.dist]
+
+    def predecessors(self):
+        """ array of the previous vertex on the shortest path to every vertex (-1: none) """
+        return array(VERTEX_TYPE, self.pred)
+
+    def path(self, v):
+        """ the shortest path to v as a list of vertices from its source, or None if unreachable """
+        if self.dist[v] == INF:
+            return None
+        path = [v]
+        while self.pred[path[-1]] != -1:
+            path.append(self.pred[path[-1]])
+        path.reverse()
+        return path
+
+
+def updateShortestPaths(adj_list, source, distances, predecessors, insert=(), delete=(), reweight=()):
+    """
+    one batch of changes (as DynamicShortestPaths.update) to a graph, repairing the result
+    (distances, predecessors) of shortestPath(adj_list, source, predecessors=True).
+    returns the new (distances, predecessors). the changes are applied to a CSRGraph
+    adj_list in place, which costs O(n + m) however few vertices the batch affects
+    (see DynamicShortestPaths, which applies them in batches)
+    """
+    paths = DynamicShortestPaths(adj_list, source, distances, predecessors)
+    paths.update(insert, delete, reweight)
+    paths.commit()
+    return paths.distances(), paths.predecessors()
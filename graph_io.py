@@ -0,0 +1,308 @@
+"""
+Graph file loaders, producing CSRGraph objects (see csr_graph.py).
+
+Two text formats are used in this repo:
+  - adjacency format (dijkstraData.txt): each line is a vertex followed by
+    tab-separated 'head,weight' edges
+  - edge-list format (edges.txt, SCC.txt): each line is a space-separated
+    'tail head [weight]' edge, optionally after an 'n m' header line
+
+The files are read in large chunks and each chunk's numbers are parsed in one
+bulk int() pass into flat typed arrays, without building a tuple (or list)
+per edge.
+
+After parsing, a binary sidecar file (<filepath>.csr) is written next to the
+input. The sidecar holds the raw CSR buffers, so the next load of the same
+(unchanged) file simply memory-maps it, with no parsing at all.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+
+from csr_graph import CSRGraph, OFFSET_TYPE, VERTEX_TYPE, INT_WEIGHT_TYPE
+
+# chunk size for reading the text files
+CHUNK_SIZE = 1 << 24
+
+SIDECAR_SUFFIX = '.csr'
+SIDECAR_MAGIC = b'CSRG'
+SIDECAR_VERSION = 1
+# magic, version, n, m, weights typecode (b'-' if unweighted),
+# size and mtime of the source file, parsing options tag
+_HEADER = struct.Struct('<4sIqqc7xqq32s')
+
+
+def _chunks(f, carry=''):
+    """ yield pieces of the text file f, each ending at a line boundary """
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            if carry:
+                yield carry
+            return
+        chunk = carry + chunk
+        cut = chunk.rfind('\n') + 1
+        if cut == 0:
+            # a single line longer than the chunk size
+            carry = chunk
+            continue
+        carry = chunk[cut:]
+        yield chunk[:cut]
+
+
+def load_adjacency(filepath, cache=True):
+    """
+    load a file in the adjacency format of Dijksra_ShortestPath.get_file:
+      <vertex>\t<head>,<weight>\t<head>,<weight>\t...
+
+    returns a weighted CSRGraph with n = largest vertex id + 1
+    """
+    tag = 'adjacency'
+    if cache:
+        graph = _load_sidecar(filepath, tag)
+        if graph is not None:
+            return graph
+
+    sources = array(VERTEX_TYPE)
+    degrees = array(OFFSET_TYPE)
+    heads = array(VERTEX_TYPE)
+    weights = array(INT_WEIGHT_TYPE)
+
+    with open(filepath, 'r') as f:
+        for chunk in _chunks(f):
+            # split each line to its vertex and the (still unparsed) edges, and
+            # parse the edges of the whole chunk at once
+            edge_text = []
+            for line in chunk.splitlines():
+                source, _, edges = line.strip().partition('\t')
+                if not source:
+                    continue
+                sources.append(int(source))
+                degrees.append(edges.count(','))
+                edge_text.append(edges)
+            values = array(INT_WEIGHT_TYPE, map(int, ' '.join(edge_text).replace(',', ' ').split()))
+            heads.extend(array(VERTEX_TYPE, values[0::2]))
+            weights.extend(values[1::2])
+
+    n = max(max(sources, default=-1), max(heads, default=-1)) + 1
+
+    # the edges of each vertex are already grouped, only the vertices may
+    # come in any order, so offsets are built directly from the degrees
+    offsets = array(OFFSET_TYPE, [0]) * (n + 1)
+    if all(u < v for u, v in zip(sources, sources[1:])):
+        for v, d in zip(sources, degrees):
+            offsets[v + 1] = d
+        for v in range(n):
+            offsets[v + 1] += offsets[v]
+        graph = CSRGraph(offsets, heads, weights)
+    else:
+        tails = array(VERTEX_TYPE)
+        for v, d in zip(sources, degrees):
+            tails.extend(array(VERTEX_TYPE, [v]) * d)
+        graph = CSRGraph.from_edges(n, tails, heads, weights)
+
+    if cache:
+        _save_sidecar(graph, filepath, tag)
+    return graph
+
+
+def load_edge_list(filepath, n=None, undirected=False, header=False, cache=True):
+    """
+    load a file in the edge-list format:
+      <tail> <head> [<weight>]
+    n - number of vertices (ids 0..n-1); by default largest vertex id + 1,
+        or the header's vertex count + 1 (1-indexed vertices)
+    undirected - store every edge in both directions (e.g. edges.txt)
+    header - the first line is an '<n> <m>' header (e.g. edges.txt)
+
+    returns a CSRGraph, weighted if the lines have a third column
+    """
+    tag = f'edges:{n}:{int(undirected)}:{int(header)}'
+    if cache:
+        graph = _load_sidecar(filepath, tag)
+        if graph is not None:
+            return graph
+
+    tails = array(VERTEX_TYPE)
+    heads = array(VERTEX_TYPE)
+    weights = None
+    columns = None
+
+    with open(filepath, 'r') as f:
+        if header:
+            n_header = int(f.readline().split()[0])
+            if n is None:
+                n = n_header + 1
+
+        for chunk in _chunks(f):
+            if columns is None:
+                # the number of columns is set by the first edge line
+                first = next((line.split() for line in chunk.splitlines() if line.strip()), None)
+                if first is None:
+                    continue
+                columns = len(first)
+                if columns < 2:
+                    raise ValueError(f'{filepath}: expected at least 2 columns per edge')
+                if columns > 2:
+                    weights = array(INT_WEIGHT_TYPE)
+
+            values = array(INT_WEIGHT_TYPE, map(int, chunk.split()))
+            if len(values) % columns:
+                raise ValueError(f'{filepath}: inconsistent number of columns')
+            tails.extend(array(VERTEX_TYPE, values[0::columns]))
+            heads.extend(array(VERTEX_TYPE, values[1::columns]))
+            if weights is not None:
+                weights.extend(values[2::columns])
+
+    if undirected:
+        m = len(tails)
+        tails.extend(heads[:m])
+        heads.extend(tails[:m])
+        if weights is not None:
+            weights.extend(weights[:m])
+
+    if n is None:
+        n = max(max(tails, default=-1), max(heads, default=-1)) + 1
+    graph = CSRGraph.from_edges(n, tails, heads, weights)
+
+    if cache:
+        _save_sidecar(graph, filepath, tag)
+    return graph
+
+
+def _weight_type(graph):
+    weights = graph.weights
+    if weights is None:
+        return '-'
+    return weights.typecode if isinstance(weights, array) else weights.format
+
+
+def _pack_header(graph, source_stat=None, tag=''):
+    size, mtime = (source_stat.st_size, source_stat.st_mtime_ns) if source_stat else (0, 0)
+    return _HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, graph.n, graph.m,
+                        _weight_type(graph).encode(), size, mtime, tag.encode()[:32])
+
+
+def _buffers(graph):
+    """ the CSR buffers of graph, with their (8-byte aligned) positions """
+    pos = _HEADER.size
+    for buf in (graph.offsets, graph.targets, graph.weights):
+        if buf is None:
+            continue
+        yield pos, buf
+        pos += len(buf) * buf.itemsize
+        pos += -pos % 8
+
+
+def csr_nbytes(graph):
+    """ size, in bytes, of graph in the binary CSR layout """
+    end = _HEADER.size
+    for pos, buf in _buffers(graph):
+        end = pos + len(buf) * buf.itemsize
+    return end + -end % 8
+
+
+def write_csr(graph, out, tag=''):
+    """
+    write graph in the binary CSR layout into the writable buffer out (e.g.
+    shared memory, or a writable mmap) of at least csr_nbytes(graph) bytes
+    """
+    out = memoryview(out).cast('B')
+    out[:_HEADER.size] = _pack_header(graph, tag=tag)
+    for pos, buf in _buffers(graph):
+        data = memoryview(buf).cast('B')
+        out[pos:pos + len(data)] = data
+
+
+def read_csr(buf):
+    """
+    return a CSRGraph whose buffers are memoryviews over buf, which holds a
+    graph in the binary CSR layout (see save_csr / write_csr), and the layout's
+    header fields: (magic, version, n, m, weight type, source size, source mtime, tag)
+    """
+    view = memoryview(buf).cast('B')
+    header = _HEADER.unpack_from(view)
+    magic, version, n, m, weight_type = header[:5]
+    if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+        raise ValueError('not a CSR graph buffer')
+
+    pos = _HEADER.size
+
+    def take(typecode, count):
+        nonlocal pos
+        buf = view[pos:pos + count * struct.calcsize(typecode)].cast(typecode)
+        pos += len(buf) * buf.itemsize
+        pos += -pos % 8
+        return buf
+
+    offsets = take(OFFSET_TYPE, n + 1)
+    targets = take(VERTEX_TYPE, m)
+    weights = take(weight_type.decode(), m) if weight_type != b'-' else None
+    return CSRGraph(offsets, targets, weights), header
+
+
+def save_csr(graph, path, source_stat=None, tag=''):
+    """
+    write the CSR buffers of graph into a binary file, which map_csr can map
+    back without parsing. the buffers are 8-byte aligned.
+    """
+    # write to a temporary file first, so a concurrent reader never maps a
+    # partially written sidecar
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_pack_header(graph, source_stat, tag))
+            for pos, buf in _buffers(graph):
+                f.write(bytes(pos - f.tell()))
+                f.write(buf)
+            f.write(bytes(-f.tell() % 8))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def map_csr(path, source_stat=None, tag=None):
+    """
+    memory-map a file written by save_csr and return it as a CSRGraph whose
+    buffers are memoryviews over the mapping.
+    if source_stat/tag are given and don't match the file's header, returns None
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # check the header before read_csr exports buffers from the mapping, which
+    # couldn't be closed then
+    try:
+        magic, version = _HEADER.unpack_from(mm)[:2]
+    except struct.error:
+        magic = version = None
+    if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+        mm.close()
+        raise ValueError(f'{path}: not a CSR graph file')
+    size, mtime, file_tag = _HEADER.unpack_from(mm)[5:]
+    if (source_stat is not None and (size, mtime) != (source_stat.st_size, source_stat.st_mtime_ns)) \
+            or (tag is not None and file_tag.rstrip(b'\0') != tag.encode()[:32]):
+        mm.close()
+        return None
+    return read_csr(mm)[0]
+
+
+def _load_sidecar(filepath, tag):
+    sidecar = filepath + SIDECAR_SUFFIX
+    try:
+        return map_csr(sidecar, os.stat(filepath), tag)
+    except (OSError, ValueError, struct.error):
+        # missing, unreadable or corrupt sidecar - fall back to parsing
+        return None
+
+
+def _save_sidecar(graph, filepath, tag):
+    try:
+        save_csr(graph, filepath + SIDECAR_SUFFIX, os.stat(filepath), tag)
+    except OSError:
+        # read-only location etc. - caching is only an optimization
+        pass
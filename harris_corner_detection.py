@@ -1,70 +1,72 @@
 """
 Harris Corner Detection Implementation
 On Grayscale Images
+
+an interactive walk-through of the steps, with plots.
+usage: python harris_corner_detection.py <image file>
+for corner detection over many frames, see harris_pipeline.py
 """
 
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
 from CV_utils import *
+from harris_pipeline import SOBEL_5x5
 
-# Load Image
-filepath = '/content/drive/MyDrive/Colab Notebooks/Computer Vision Algorithms/'
-img = load_image(filepath+'lab.gif')
-
-pil_img = convert_to_PIL(img)
-pil_img
+if __name__ == '__main__':
+  # Load Image
+  filepath = sys.argv[1] if len(sys.argv) > 1 else 'lab.gif'
+  img = load_image(filepath)
 
-# using standard Sobel filter 
-sobel_5x5 = np.array([[-1, -2, 0, 2, 1],
-                      [-2, -3, 0, 3, 2],
-                      [-3, -5, 0, 5, 3],
-                      [-2, -3, 0, 3, 2],
-                      [-1, -2, 0, 2, 1]])
+  pil_img = convert_to_PIL(img)
+  pil_img
 
-sobel_3x3 = np.array([[-1, 0, 1],
-                      [-2, 0, 3],
-                      [-1, 0, 1]])
+  # using standard Sobel filter 
+  sobel_5x5 = SOBEL_5x5
 
-Ix = Conv2D(img, sobel_5x5)
-Iy = Conv2D(img, sobel_5x5.T)
+  sobel_3x3 = np.array([[-1, 0, 1],
+                        [-2, 0, 3],
+                        [-1, 0, 1]])
 
-# show gradient images
-pil_Ix = convert_to_PIL(255*abs(Ix)/np.max(abs(Ix)))
-pil_Ix
+  Ix = Conv2D(img, sobel_5x5)
+  Iy = Conv2D(img, sobel_5x5.T)
 
-pil_Iy = convert_to_PIL(255*abs(Iy)/np.max(abs(Iy)))
-pil_Iy
+  # show gradient images
+  pil_Ix = convert_to_PIL(255*abs(Ix)/np.max(abs(Ix)))
+  pil_Ix
 
-# Compute corner locations
-R = CornerDetection(Ix, Iy, w=7, k=0.06)
-R = (R - np.min(R)) / (np.max(R) - np.min(R))
-R = np.where(R>np.quantile(R, 0.95), R, 0)
+  pil_Iy = convert_to_PIL(255*abs(Iy)/np.max(abs(Iy)))
+  pil_Iy
 
-# show corner image ("blurred")
-pil_R = convert_to_PIL(255*R)
-pil_R
+  # Compute corner locations
+  R = CornerDetection(Ix, Iy, w=7, k=0.06)
+  R = (R - np.min(R)) / (np.max(R) - np.min(R))
+  R = np.where(R>np.quantile(R, 0.95), R, 0)
 
-# reduce corners using non-max suppression
-R_NMS = NonMaxSuppression(R, w=5)
+  # show corner image ("blurred")
+  pil_R = convert_to_PIL(255*R)
+  pil_R
 
-pil_R_NMS = convert_to_PIL(255*R_NMS)
-pil_R_NMS
+  # reduce corners using non-max suppression
+  R_NMS = NonMaxSuppression(R, w=5)
 
-# extract locations
-corners = np.argwhere(R_NMS>0)
+  pil_R_NMS = convert_to_PIL(255*R_NMS)
+  pil_R_NMS
 
-# plot image with computed corners
-img2 = plt.imread(filepath+'lab.gif')
+  # extract locations
+  corners = np.argwhere(R_NMS>0)
 
-fig,ax = plt.subplots(1)
-ax.set_aspect('equal')
+  # plot image with computed corners
+  img2 = plt.imread(filepath)
 
-ax.imshow(img2)
+  fig,ax = plt.subplots(1)
+  ax.set_aspect('equal')
 
-for x, y in corners:
-  circ = Circle((y, x), radius=5, fill=False, linestyle='solid')
-  ax.add_patch(circ)
+  ax.imshow(img2)
 
-plt.show()
+  for x, y in corners:
+    circ = Circle((y, x), radius=5, fill=False, linestyle='solid')
+    ax.add_patch(circ)
 
+  plt.show()
@@ -0,0 +1,117 @@
+"""
+Harris Corner Detection Pipeline
+Batched corner detection over many grayscale frames (a directory of images, or any
+stream of numpy arrays), with no plotting.
+
+frames are processed by a pool of worker threads (numpy releases the GIL in the heavy
+filters) or processes. only a bounded number of frames is in flight at any time, and
+each worker thread keeps its own CV_utils.Scratch, whose buffers (the gradients, the
+response and the filters' intermediates) are reused for every frame of the same shape,
+so there are no per-frame allocations and memory stays flat over tens of thousands of frames.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from CV_utils import load_image, thread_scratch, Conv2D, CornerDetection, NonMaxSuppression, TopCorners
+
+# standard Sobel filter
+SOBEL_5x5 = np.array([[-1, -2, 0, 2, 1],
+                      [-2, -3, 0, 3, 2],
+                      [-3, -5, 0, 5, 3],
+                      [-2, -3, 0, 3, 2],
+                      [-1, -2, 0, 2, 1]])
+
+IMAGE_EXTENSIONS = ('.gif', '.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pgm')
+
+def detect_corners(img, w=7, k=0.06, nms_window=5, max_corners=500, kernel=SOBEL_5x5,
+                   dtype=np.float64, scratch=None):
+  """
+  img - grayscale image (2-D array), or a path to load it from (as 8-bit pixels)
+  w, k - CornerDetection's window size and Harris coefficient
+  nms_window - NonMaxSuppression's window size
+  max_corners - number of strongest corners to return
+  dtype - working dtype of the filters, float64 or float32 (half the memory traffic)
+  scratch - CV_utils.Scratch to take every buffer from; the calling thread's by default
+
+  returns (coords, scores): (row, column) of up to max_corners corners and their normalized response
+  """
+  if isinstance(img, str):
+    img = load_image(img, dtype='uint8')
+  scratch = scratch or thread_scratch()
+  shape = img.shape
+
+  Ix = Conv2D(img, kernel, out=scratch.get('Ix', shape, dtype), scratch=scratch)
+  Iy = Conv2D(img, kernel.T, out=scratch.get('Iy', shape, dtype), scratch=scratch)
+
+  # corner response, normalized to [0, 1] (in place) as NonMaxSuppression expects
+  R = CornerDetection(Ix, Iy, w, k, out=scratch.get('R', shape, dtype), scratch=scratch)
+  low = R.min()
+  R -= low
+  span = R.max()
+  if span > 0:
+    R /= span
+  # only a positive raw response is a corner (it's ~0 on flat regions and negative on edges),
+  # where the normalized one is above that of a raw 0
+  threshold = max(-low / span, 0) if span > 0 else np.inf
+
+  R = NonMaxSuppression(R, nms_window, out=scratch.get('corners', shape, dtype), scratch=scratch)
+  return TopCorners(R, max_corners, threshold)
+
+def iter_frames(source):
+  """
+  source - a directory (its image files, sorted by name), or an iterable of frames
+  """
+  if isinstance(source, str):
+    names = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+    return (os.path.join(source, f) for f in names)
+  return iter(source)
+
+def _detect(index, frame, params):
+  return index, detect_corners(frame, **params)
+
+def detect_corners_batch(source, workers=None, processes=False, max_pending=None, **params):
+  """
+  source - a directory or an iterable of frames (see iter_frames). frames loaded from a
+           directory are read by the workers, so only paths are passed around
+  workers - pool size, os.cpu_count() by default
+  processes - use a process pool instead of threads
+  max_pending - maximal number of frames in flight (submitted and not yet yielded),
+                2 * workers by default
+  params - detect_corners' parameters
+
+  yields (frame index, coords, scores) as the frames are done, in completion order
+  """
+  workers = workers or os.cpu_count() or 1
+  max_pending = max_pending or 2 * workers
+  frames = enumerate(iter_frames(source))
+
+  pool_type = ProcessPoolExecutor if processes else ThreadPoolExecutor
+  with pool_type(max_workers=workers) as pool:
+    pending = set()
+    exhausted = False
+    while pending or not exhausted:
+      # keep the pool busy, without reading ahead more than max_pending frames
+      while not exhausted and len(pending) < max_pending:
+        item = next(frames, None)
+        if item is None:
+          exhausted = True
+        else:
+          pending.add(pool.submit(_detect, *item, params))
+      if not pending:
+        break
+
+      done, pending = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        index, (coords, scores) = future.result()
+        yield index, coords, scores
+
+
+if __name__ == '__main__':
+  # usage: python harris_pipeline.py <directory of frames> [workers]
+  directory = sys.argv[1]
+  workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+  for index, coords, scores in detect_corners_batch(directory, workers):
+    print(f'frame {index}: {len(coords)} corners')
@@ -0,0 +1,170 @@
+"""
+Indexed priority queue (min-heap) with a true decrease-key.
+
+Python's heapq doesn't support changing the key of an item already in the
+heap, so Dijkstra and Prim usually push a new (key, item) entry instead and
+skip the stale ones when they're popped ("lazy deletion"). On dense graphs
+the heap then grows to O(m) entries.
+
+IndexedHeap keeps, for every item 0..n-1, its position in the heap array, so
+decrease-key sifts the item up in place, and the heap never holds more than
+n items. Works as a binary heap (d=2) or as any d-ary heap, which has a
+shallower tree (fewer sift-up steps per decrease-key) at the cost of more
+comparisons per sift-down.
+
+Being pure python, it isn't a faster heap than heapq (written in C): on
+sparse graphs Dijkstra with lazy deletion is about twice as fast (100k
+vertices, 1M edges: 0.9s against 1.7s with d=2). It bounds the heap's size,
+and pays off where lazy deletion piles up stale entries - dense graphs, and
+Prim over undirected graphs, where every edge is seen from both ends (run
+this module to compare them).
+
+See also https://en.wikipedia.org/wiki/D-ary_heap
+"""
+
+from array import array
+
+
+class IndexedHeap:
+    """
+    min-heap of items 0..n-1, each with a key, supporting decrease-key.
+    """
+
+    def __init__(self, n, d=2):
+        if d < 2:
+            raise ValueError('heap arity d must be at least 2')
+        self.d = d
+        # heap array of items, and the keys of the items (by item)
+        self.heap = array('i')
+        self.keys = [None] * n
+        # position of each item in the heap array, -1 if not in the heap
+        self.pos = array('i', [-1]) * n
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return self.pos[item] != -1
+
+    def key(self, item):
+        return self.keys[item]
+
+    def peek(self):
+        """ (key, item) of the minimum, without removing it """
+        item = self.heap[0]
+        return self.keys[item], item
+
+    def push(self, item, key):
+        """ insert item, which must not be in the heap already """
+        self.keys[item] = key
+        self.heap.append(item)
+        self._sift_up(len(self.heap) - 1)
+
+    def decrease_key(self, item, key):
+        """ lower the key of item, which must be in the heap """
+        self.keys[item] = key
+        self._sift_up(self.pos[item])
+
+    def push_or_decrease(self, item, key):
+        """
+        insert item, or lower its key if it's already in the heap with a
+        larger key. returns True if the heap was changed
+        """
+        i = self.pos[item]
+        if i == -1:
+            self.push(item, key)
+            return True
+        if key < self.keys[item]:
+            self.keys[item] = key
+            self._sift_up(i)
+            return True
+        return False
+
+    def pop(self):
+        """ remove and return (key, item) of the minimum """
+        heap, pos = self.heap, self.pos
+        item = heap[0]
+        last = heap.pop()
+        pos[item] = -1
+        if heap:
+            heap[0] = last
+            pos[last] = 0
+            self._sift_down(0)
+        return self.keys[item], item
+
+    def clear(self):
+        """ empty the heap, in O(len(heap)) """
+        pos = self.pos
+        for item in self.heap:
+            pos[item] = -1
+        del self.heap[:]
+
+    def _sift_up(self, i):
+        heap, pos, keys, d = self.heap, self.pos, self.keys, self.d
+        item = heap[i]
+        key = keys[item]
+        while i > 0:
+            parent = (i - 1) // d
+            p_item = heap[parent]
+            if keys[p_item] <= key:
+                break
+            # move the parent down
+            heap[i] = p_item
+            pos[p_item] = i
+            i = parent
+        heap[i] = item
+        pos[item] = i
+
+    def _sift_down(self, i):
+        heap, pos, keys, d = self.heap, self.pos, self.keys, self.d
+        size = len(heap)
+        item = heap[i]
+        key = keys[item]
+        while True:
+            first = d * i + 1
+            if first >= size:
+                break
+            # smallest of the (up to d) children
+            child = first
+            child_key = keys[heap[first]]
+            for c in range(first + 1, min(first + d, size)):
+                c_key = keys[heap[c]]
+                if c_key < child_key:
+                    child, child_key = c, c_key
+            if key <= child_key:
+                break
+            # move the child up
+            c_item = heap[child]
+            heap[i] = c_item
+            pos[c_item] = i
+            i = child
+        heap[i] = item
+        pos[item] = i
+
+
+if __name__ == '__main__':
+    # compare the lazy-deletion heapq against the indexed heap, on Dijkstra
+    # and Prim over a random dense graph
+    import random
+    import time
+    from csr_graph import CSRGraph
+    from Dijksra_ShortestPath import shortestPath
+    from prims_algorithm import primMST
+
+    rng = random.Random(0)
+    n, m = 2000, 400000
+    tails = [rng.randrange(n) for _ in range(m)]
+    heads = [rng.randrange(n) for _ in range(m)]
+    weights = [rng.randrange(1, 10000) for _ in range(m)]
+    directed = CSRGraph.from_edges(n, tails, heads, weights)
+    undirected = CSRGraph.from_edges(n, tails + heads, heads + tails, weights + weights)
+    print(f'random graph: n={n}, m={m}')
+
+    runs = [('Dijkstra', lambda heap, d: shortestPath(directed, 0, heap=heap, arity=d)),
+            ('Prim', lambda heap, d: primMST(undirected, 0, heap, d))]
+    for name, run in runs:
+        for heap, d in [('lazy', 2), ('indexed', 2), ('indexed', 4), ('indexed', 8)]:
+            start = time.perf_counter()
+            run(heap, d)
+            label = 'lazy heapq' if heap == 'lazy' else f'indexed d={d}'
+            print(f'{name:8} {label:12} {1000*(time.perf_counter() - start):8.1f}msec')
@@ -0,0 +1,177 @@
+"""
+Minimum Spanning Tree (forest) engines for undirected weighted graphs, next
+to Prim's algorithm (prims_algorithm.py):
+
+- Kruskal: sorts the edges once and adds them in increasing cost order,
+  skipping edges that would close a cycle (checked with a union-find).
+  O(m log m), dominated by a single sort; a good fit for sparse graphs.
+- Boruvka: in every round, each component picks its cheapest outgoing edge
+  and all of them are added at once, at least halving the number of
+  components per round - O(m log n). The per-round scan of the edges is
+  independent per edge/component, so it parallelizes naturally.
+
+All the engines take the same graph input as primMST (a CSRGraph with each
+undirected edge stored in both directions, or an adjacency list), and return
+the tree's edges as tuples of (cost, vertex, vertex).
+
+See also https://en.wikipedia.org/wiki/Kruskal%27s_algorithm
+         https://en.wikipedia.org/wiki/Bor%C5%AFvka%27s_algorithm
+"""
+
+from array import array
+
+from csr_graph import as_csr, VERTEX_TYPE
+from prims_algorithm import primMST
+
+
+class UnionFind:
+    """
+    disjoint sets of the items 0..n-1, as flat parent/size arrays, with union
+    by size and path compression (path halving), for near O(1) amortized
+    find and union.
+    """
+
+    def __init__(self, n):
+        self.parent = array(VERTEX_TYPE, range(n))
+        self.size = array(VERTEX_TYPE, [1]) * n
+        self.count = n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            # point x to its grandparent, halving the path
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        """ merge the sets of x and y. returns False if already in the same set """
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return False
+        size = self.size
+        if size[x] < size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        size[x] += size[y]
+        self.count -= 1
+        return True
+
+
+def _edge_arrays(graph):
+    """
+    the undirected edges of graph, once each (tail < head, no self-loops),
+    as flat arrays of tails, heads and costs
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    tails, heads, costs = array(VERTEX_TYPE), array(VERTEX_TYPE), []
+    for v in range(graph.n):
+        for e in range(offsets[v], offsets[v + 1]):
+            w = targets[e]
+            if v < w:
+                tails.append(v)
+                heads.append(w)
+                costs.append(weights[e])
+    return tails, heads, costs
+
+
+def _spanning_size(graph):
+    """ number of edges of a spanning tree over the vertices that have edges """
+    return max(sum(1 for v in range(graph.n) if graph.out_degree(v)) - 1, 0)
+
+
+def kruskalMST(A):
+    """
+    A - the graph, as in primMST
+    returns the list of the MST's (forest's) edges, as (cost, vertex, vertex)
+    """
+    graph = as_csr(A)
+    tails, heads, costs = _edge_arrays(graph)
+
+    # sort the edge indices once by cost, instead of sorting edge tuples
+    order = sorted(range(len(costs)), key=costs.__getitem__)
+
+    components = UnionFind(graph.n)
+    T = []
+    size = _spanning_size(graph)
+    for e in order:
+        if components.union(tails[e], heads[e]):
+            T.append((costs[e], heads[e], tails[e]))
+            if len(T) == size:
+                # spanning tree complete
+                break
+    return T
+
+
+def boruvkaMST(A):
+    """
+    A - the graph, as in primMST
+    returns the list of the MST's (forest's) edges, as (cost, vertex, vertex)
+    """
+    graph = as_csr(A)
+    tails, heads, costs = _edge_arrays(graph)
+    m = len(costs)
+
+    components = UnionFind(graph.n)
+    find = components.find
+    T = []
+    # edges still connecting two different components
+    alive = list(range(m))
+    while alive:
+        # cheapest edge leaving each component (by component root).
+        # ties are broken by edge index, so that there are no cycles
+        cheapest = {}
+        still_alive = []
+        for e in alive:
+            a, b = find(tails[e]), find(heads[e])
+            if a == b:
+                # both ends already in one component
+                continue
+            still_alive.append(e)
+            key = (costs[e], e)
+            for c in (a, b):
+                best = cheapest.get(c)
+                if best is None or key < (costs[best], best):
+                    cheapest[c] = e
+        alive = still_alive
+
+        # add all the components' cheapest edges at once
+        for e in set(cheapest.values()):
+            if components.union(tails[e], heads[e]):
+                T.append((costs[e], heads[e], tails[e]))
+    return T
+
+
+ENGINES = {
+    'prim': primMST,
+    'kruskal': kruskalMST,
+    'boruvka': boruvkaMST,
+}
+
+
+def minimumSpanningTree(A, engine='prim', **options):
+    """
+    A - the graph, as in primMST
+    engine - 'prim', 'kruskal' or 'boruvka'
+    options - passed to the engine (e.g. heap='indexed' for Prim)
+
+    returns a tuple of (list of the tree's edges as (cost, vertex, vertex), total cost).
+    Prim's algorithm spans the connected component of its first vertex only,
+    Kruskal and Boruvka return a spanning forest of a disconnected graph.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown MST engine '{engine}', expected one of {sorted(ENGINES)}")
+    T = ENGINES[engine](A, **options)
+    return T, sum(c for c, _, _ in T)
+
+
+if __name__ == '__main__':
+    import time
+    from graph_io import load_edge_list
+
+    A = load_edge_list('edges.txt', undirected=True, header=True)
+    for engine in ENGINES:
+        start = time.perf_counter()
+        T, cost = minimumSpanningTree(A, engine)
+        print(f'{engine:8} MST cost: {cost}, {len(T)} edges, '
+              f'{1000*(time.perf_counter() - start):.1f}msec')
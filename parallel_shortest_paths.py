@@ -0,0 +1,140 @@
+"""
+All-pairs / many-sources shortest paths, running Dijkstra from every source
+in parallel over a process pool.
+
+The graph is copied once into a shared-memory segment (in the binary CSR
+layout of graph_io.py); every worker process maps that segment on start-up,
+so tasks only carry source vertex ids instead of pickling the graph.
+
+Results stream back, as they are completed, as rows of the distance matrix
+(one typed array of n distances per source, -1 for unreachable vertices), and
+can be written straight into a memory-mapped output file, so the matrix may
+be larger than the available memory.
+"""
+
+import mmap
+import os
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from csr_graph import as_csr
+from graph_io import csr_nbytes, write_csr, read_csr
+from Dijksra_ShortestPath import ShortestPathSearch
+
+# number of sources sent to a worker at once
+CHUNK_SIZE = 16
+
+# per-process state of the pool's workers, set by _init_worker
+_worker_shm = None
+_worker_search = None
+
+
+def _row_type(graph):
+    """ typecode of the distance rows - integer distances for integer weights """
+    weights = graph.weights
+    if weights is None:
+        return 'q'
+    typecode = weights.typecode if isinstance(weights, array) else weights.format
+    return 'd' if typecode in ('f', 'd') else 'q'
+
+
+def _distance_row(search, source, typecode):
+    search.run(source)
+    return array(typecode, search.distances())
+
+
+def _init_worker(shm_name):
+    global _worker_shm, _worker_search
+    # attach to the graph's shared memory; the CSR buffers are views into it
+    _worker_shm = SharedMemory(name=shm_name)
+    graph, _ = read_csr(_worker_shm.buf)
+    _worker_search = ShortestPathSearch(graph)
+
+
+def _run_sources(sources):
+    typecode = _row_type(_worker_search.graph)
+    return [(s, _distance_row(_worker_search, s, typecode).tobytes()) for s in sources]
+
+
+def shortestPathRows(adj_list, sources=None, processes=None, chunksize=CHUNK_SIZE):
+    """
+    adj_list - the graph (CSRGraph or adjacency list)
+    sources - iterable of source vertices, all the vertices by default
+    processes - number of worker processes, os.cpu_count() by default.
+                with processes=1 everything runs in the calling process
+
+    yields (source, row) pairs, in completion order, where row is an array of
+    the shortest paths from source to every vertex (-1 for unreachable)
+    """
+    graph = as_csr(adj_list)
+    if sources is None:
+        sources = range(graph.n)
+    sources = list(sources)
+    processes = processes or os.cpu_count() or 1
+    typecode = _row_type(graph)
+
+    if processes == 1 or len(sources) <= 1:
+        search = ShortestPathSearch(graph)
+        for s in sources:
+            yield s, _distance_row(search, s, typecode)
+        return
+
+    # copy the graph once into shared memory, for all the workers to map
+    shm = SharedMemory(create=True, size=csr_nbytes(graph))
+    try:
+        write_csr(graph, shm.buf)
+        chunks = [sources[i:i + chunksize] for i in range(0, len(sources), chunksize)]
+        with Pool(processes, initializer=_init_worker, initargs=(shm.name,)) as pool:
+            for results in pool.imap_unordered(_run_sources, chunks):
+                for s, row in results:
+                    yield s, array(typecode, row)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def allPairsShortestPaths(adj_list, sources=None, processes=None, out_path=None):
+    """
+    compute the distance matrix from sources (all the vertices by default) to
+    every vertex, row i being the distances from the i-th source.
+
+    without out_path returns a list of rows (arrays).
+    with out_path the matrix is written, row by row as they are completed,
+    into a memory-mapped file of len(sources) * n distances (raw native int64,
+    or float64 for float weights), and returned as a 2-D memoryview over it
+    (indexed by matrix[i, v]).
+    """
+    graph = as_csr(adj_list)
+    sources = list(range(graph.n) if sources is None else sources)
+    # the rows of every source (a source may be repeated), computed once per source
+    row_index = {}
+    for i, s in enumerate(sources):
+        row_index.setdefault(s, []).append(i)
+    n = graph.n
+
+    if out_path is None:
+        matrix = [None] * len(sources)
+        for s, row in shortestPathRows(graph, row_index, processes):
+            first, *others = row_index[s]
+            matrix[first] = row
+            for i in others:
+                matrix[i] = array(row.typecode, row)
+        return matrix
+
+    typecode = _row_type(graph)
+    itemsize = array(typecode).itemsize
+    row_bytes = n * itemsize
+    size = len(sources) * row_bytes
+    with open(out_path, 'w+b') as f:
+        f.truncate(size)
+        if size == 0:
+            return memoryview(b'').cast(typecode)
+        mm = mmap.mmap(f.fileno(), size)
+
+    for s, row in shortestPathRows(graph, row_index, processes):
+        data = row.tobytes()
+        for i in row_index[s]:
+            mm[i * row_bytes:(i + 1) * row_bytes] = data
+    mm.flush()
+    return memoryview(mm).cast(typecode, (len(sources), n))
@@ -1,79 +1,150 @@
-import random
-import heapq
-
-"""
-An implementation, using heaps, of Prim's Algorithm (running time O(m log n)
-for computing Minimum Cost Spanning Tree of an undirected connected acyclic 
-Graph G={V,E}.
-
-Graph G is represented using an Adjacency List.
-
-See also https://en.wikipedia.org/wiki/Prim%27s_algorithm
-"""
-
-# construct the adjacency list from file
-with open('edges.txt', 'r') as f:
-    n, m = list(map(int, f.readline().strip('\n').split(' ')))
-    # adjacency list representation of the graph
-    A = [None] + [[] for _ in range(n)]
-    # set of edges
-    E = set()
-    for line in f:
-        # each raw contains endpoint1, endpoint2 and the edge's cost
-        v, w, c = list(map(int, line.strip('\n').split(' ')))
-
-        E.add((c, v, w))
-        A[v].append((w, c))
-        A[w].append((v, c))
-
-# X - set of processed vertices
-X = set()
-# T - set of the MST's edges
-T = set()
-# maintain a fixed array to track vertices not yet in X
-V = [False] + [True for _ in range(n)]
-
-# pick first vertex arbitrarily
-s = random.randrange(1, 501)
-V[s] = False
-X.add(s)
-
-# initialize the heap
-# each vertex with no edge coming from X will have a priority (cost) of
-# +infinity. edges are stored as a tuple of (cost, vertex in V, vertex in X)
-heap = [(float('+inf'), v, None) for v in range(1, n+1)]
-
-# run through edges coming out of the first vertex s and add their end
-# vertex (not in X) to the heap with their cost as key. O(m log n)
-for v, c in A[s]:
-    # cost, destination vertex, source vertex
-    heap[v] = (c, v, s)
-
-heapq.heapify(heap)
-
-# main while loop
-while len(X) < n:
-    # extract-min: the lowest cost crossing edge from {X} to {V-X}
-    c, v, s = heapq.heappop(heap)
-    # make sure not to handle a vertex already in X
-    while not V[v]:
-        c, v, s = heapq.heappop(heap)
-
-    T.add((c, v, s))
-    X.add(v)
-    V[v] = False
-
-    for edge in A[v]:
-        w, c = edge
-        if V[w]:
-            # w not in X
-            # instead of deleting and re-inserting w from the heap,
-            # I'll just add it with its new priority (lower cost key) and
-            # consider that when popping item from the heap (above)
-            heapq.heappush(heap, (c, w, v))
-
-
-# count cost of the spanning tree T
-cost = sum(c for c, _, _ in T)
-
-print(f'MST cost: {cost}')
+import random
+import heapq
+from array import array
+
+from csr_graph import as_csr
+from graph_io import load_edge_list
+from indexed_heap import IndexedHeap
+from search_stats import phase
+
+"""
+An implementation, using heaps, of Prim's Algorithm (running time O(m log n)
+for computing Minimum Cost Spanning Tree of an undirected connected acyclic 
+Graph G={V,E}.
+
+Graph G is represented using an Adjacency List in CSR form (see csr_graph.py).
+
+See also mst.py for Kruskal's and Boruvka's algorithms, and for choosing
+between the three.
+
+See also https://en.wikipedia.org/wiki/Prim%27s_algorithm
+"""
+
+
+def primMST(A, s=None, heap='lazy', arity=2, stats=None):
+    """
+    A - the graph, a CSRGraph with each undirected edge stored in both directions,
+        or an adjacency list of (vertex, cost) tuples (see csr_graph.as_csr)
+    s - the first vertex; by default the first vertex that has any edges
+    heap - 'lazy': heapq, adding a crossing edge again whenever a cheaper one is
+           found and skipping the stale entries when popped (heap size O(m)), or
+           'indexed': an IndexedHeap with decrease-key (heap size O(n)), which
+           avoids the stale entries of every edge seen from both of its ends, and
+           measured faster here (unlike in Dijkstra, see indexed_heap)
+    arity - d of the indexed heap (2 = binary heap)
+    stats - optional search_stats.SearchStats, counting the heap operations, the
+            vertices added to the tree and the edges scanned from them, and
+            timing the 'setup' and 'search' phases
+
+    returns the list of the MST's edges, as tuples of
+    (cost, vertex, vertex already in the tree)
+    """
+    with phase(stats, 'setup'):
+        A = as_csr(A)
+    n = A.n
+    if n == 0:
+        return []
+    if s is None:
+        s = next((v for v in range(n) if A.out_degree(v)), 0)
+
+    with phase(stats, 'search'):
+        T = _prim(A, s, heap, arity, stats)
+    if stats is not None:
+        # every tree vertex's edges were scanned once
+        stats.settled += len(T) + 1
+        stats.relaxations += A.out_degree(s) + sum(A.out_degree(v) for _, v, _ in T)
+    return T
+
+
+def _prim(A, s, heap, arity, stats):
+    # the main loop of primMST
+    n = A.n
+
+    # the set of processed vertices (X), as a fixed array
+    X = bytearray(n)
+    X[s] = True
+    # T - the MST's edges
+    T = []
+
+    if heap == 'indexed':
+        # one heap entry per vertex not in X, keyed by its cheapest edge to X
+        frontier = IndexedHeap(n, arity)
+        if stats is not None:
+            frontier = stats.indexed_heap(frontier)
+        # the vertex in X at the other end of that cheapest edge
+        via = array('i', [-1]) * n
+
+        for v, c in A.edges(s):
+            # (not a self-loop of s)
+            if not X[v] and frontier.push_or_decrease(v, c):
+                via[v] = s
+
+        while frontier:
+            # extract-min: the lowest cost crossing edge from {X} to {V-X}
+            c, v = frontier.pop()
+            T.append((c, v, via[v]))
+            X[v] = True
+
+            for w, c in A.edges(v):
+                # w not in X, and v offers a cheaper edge to it
+                if not X[w] and frontier.push_or_decrease(w, c):
+                    via[w] = v
+        return T
+
+    if heap != 'lazy':
+        raise ValueError(f"unknown heap type '{heap}', expected 'lazy' or 'indexed'")
+
+    # run through edges coming out of the first vertex s and add their end
+    # vertex (not in X) to the heap with their cost as key.
+    # edges are stored as a tuple of (cost, vertex in V, vertex in X)
+    frontier = [(c, v, s) for v, c in A.edges(s)]
+    heapq.heapify(frontier)
+
+    # the heap operations, counted with stats
+    push, pop = heapq.heappush, heapq.heappop
+    if stats is not None:
+        push, pop = stats.heappush(), stats.heappop()
+        stats.pushes += len(frontier)
+        stats.track_depth('max_heap', len(frontier))
+        popped = stats.pops
+
+    # main while loop
+    while frontier:
+        # extract-min: the lowest cost crossing edge from {X} to {V-X}
+        c, v, u = pop(frontier)
+        # make sure not to handle a vertex already in X
+        if X[v]:
+            continue
+
+        T.append((c, v, u))
+        X[v] = True
+
+        for w, c in A.edges(v):
+            if not X[w]:
+                # w not in X
+                # instead of deleting and re-inserting w from the heap,
+                # I'll just add it with its new priority (lower cost key) and
+                # consider that when popping item from the heap (above)
+                push(frontier, (c, w, v))
+
+    if stats is not None:
+        # all but one entry of every vertex added to the tree were stale
+        stats.stale_pops += stats.pops - popped - len(T)
+    return T
+
+
+if __name__ == '__main__':
+    # construct the adjacency list from file (undirected edges, after an 'n m'
+    # header line); vertex 0 has no edges
+    A = load_edge_list('edges.txt', undirected=True, header=True)
+    n = A.n - 1
+
+    # pick first vertex arbitrarily
+    s = random.randrange(1, n+1)
+
+    T = primMST(A, s)
+
+    # count cost of the spanning tree T
+    cost = sum(c for c, _, _ in T)
+
+    print(f'MST cost: {cost}')
@@ -1,155 +1,190 @@
-
-"""
-SCC - Kosaraju algorithm.py
-An implementation of Kosaraju's linear-time Algorithm for finding directed graph's strongly-connected components.
-implemented both recursive and stacked version (to avoid python's recursive limits).
-"""
-
-import time
-from collections import deque
-
-def get_file(filepath, n):
-  """
-  each line in the input file is a directed edge, from the vertex represented 
-  in the first number to the vertex represented in the second.
-  
-  returns two adjacency lists, one "straight" and the other "reversed" (tail<->head)
-  """
-  
-  with open(filepath, 'r') as f:
-    file_lines = f.readlines()
-  f.close()
-
-  adj_list = {i: [] for i in range(1,n+1)} # adj_list[0] will stay an empty list []
-  rev_adj_list = {i: [] for i in range(1,n+1)}
-
-  for line in file_lines:
-    line = line.strip('\n')
-    edge = line.split(' ')[:2]
-
-    adj_list[int(edge[0])].append(int(edge[1]))
-    rev_adj_list[int(edge[1])].append(int(edge[0]))
-
-  return adj_list, rev_adj_list
-
-def DFS_recursive(G, i, leader, reversed):
-  """
-  G - graph represented by a dict, with keys as nodes and values for each outgoing directed edge from that node
-  i - the node from which to search the graph
-  leader - the node from which the routine was called
-  leaders_dict - a dict with key representing the leader node for each of the graph's SCCs,
-                with values of the vertices in the SCC
-  explored_list - a list describing which nodes already been explored
-  reversed - a boolian flag noting how to read the given edges
-
-  """
-  global leaders_dict, explored_list, finishing_time
-  # mark node i as explored
-  explored_list[i] = True
-
-  # set leader in the 2nd pass
-  if reversed==False: leaders_dict[leader].append(i)
-
-  for head in G[i]:
-    if not explored_list[head]: DFS(G, head, leader, reversed)
-  
-  # set finishing time in the 1st pass
-  if reversed: finishing_time.append(i)
-
-def DFS_stack(G, i, leader, reversed):
-  """
-  implementation using stack, instead of recursion. 
-  useful to avoid recursive limits in python for large graphs
-  """
-  global leaders_dict, explored_list, finishing_time
-  
-  # in order to aboid recursions (for handling "deep" graphs), use a LIFO stack (python list) instead.
-  # use faster list: 'deque' from python's 'collections' library, for faster "in and outs"
-  stack = deque([i])
-  explored_list[i] = True
-
-  while stack:
-    v = stack[-1]
-    not_explored = [head for head in G[v] if not explored_list[head]]
-
-    if not_explored: # additional deeper nodes
-      stack += deque(not_explored)
-      for head in not_explored:
-        explored_list[head] = True
-    
-    else: # update finishing time only when exhausted deepest route
-      stack.pop()
-      if reversed: finishing_time.append(v)
-      if reversed==False: leaders_dict[leader].append(v)
-
-def DFSLoop(G, n, order, reversed):
-  global leaders_dict, explored_list, finishing_time
-  
-  # initialize explored_list;
-  # in order to avoid O(n) search in sub-routine, should define a static list of 
-  # explored nodes (with sorted indices). length n+1 in order to keep indexing simple
-  explored_list = [False] * (n+1)
-  
-  for node in order:
-    if not explored_list[node]:
-      if reversed==False: leaders_dict[node] = []
-      DFS_stack(G, node, leader=node, reversed=reversed)
-
-def ComputeSCC(G, G_rev, n):
-  global leaders_dict, finishing_time
-  
-  # first pass DFS-Loop on reversed graph, in order to compute ordered list of nodes for the 2nd pass
-  order = list(range(1, n+1))
-  DFSLoop(G_rev, n, order, reversed=True)
-
-  # second pass of DFS-Loop on original graph, with reversed finishing_time order
-  order = reversed(finishing_time)
-  DFSLoop(G, n, order, reversed=False)
-
-
-if __name__ == '__main__':
-
-  # get files
-  filepath = 'Algorithms/'
-
-  n = 875714 # number of vertices in 'SCC.txt'
-  n1 = 9
-  n2 = 8
-  n3 = 8
-  n4 = 8
-  n5 = 12
-  test1_adjlist, test1_adjlist_rev = get_file(filepath + 'test1_33300.txt', n1)
-  test2_adjlist, test2_adjlist_rev = get_file(filepath + 'test2_33200.txt', n2)
-  test3_adjlist, test3_adjlist_rev = get_file(filepath + 'test3_33110.txt', n3)
-  test4_adjlist, test4_adjlist_rev = get_file(filepath + 'test4_71000.txt', n4)
-  test5_adjlist, test5_adjlist_rev = get_file(filepath + 'test5_63210.txt', n5)
-  SCC_list, SCC_list_rev = get_file(filepath + 'SCC.txt', n)
-
-  # defining global variables
-  explored_list = []
-  leaders_dict = {} # dictionary with each key represent a Strongly-Connected Component, with values as the nodes within this SCC
-  finishing_time = [] # a list of nodes with increasing order of finishing time
-
-  tic = time.time()
-
-  # ComputeSCC(test5_adjlist, test5_adjlist_rev, n5)
-  ComputeSCC(SCC_list, SCC_list_rev, n)
-
-  toc = time.time()
-
-  # evaluating running time
-  t = ((toc - tic)*1000//1)
-  sec = t/1000
-
-  print(f"running time: {sec}s")
-
-  # finding largest 5 SCCs
-  SCC_lengths = [0, 0, 0, 0, 0]
-
-  for key in leaders_dict.keys():
-    key_len = len(leaders_dict[key])
-    if key_len > min(SCC_lengths):
-      SCC_lengths.append(key_len)
-      SCC_lengths.remove(min(SCC_lengths))
-  SCC_lengths.sort(reverse=True)
-  print(SCC_lengths)
\ No newline at end of file
+
+"""
+SCC - Kosaraju algorithm.py
+An implementation of Kosaraju's linear-time Algorithm for finding directed graph's strongly-connected components.
+implemented with an explicit stack (to avoid python's recursive limits on deep graphs), over the
+graph's CSR arrays, and with no global state - compute_scc can be called concurrently on different graphs.
+"""
+
+import heapq
+import time
+from array import array
+
+from csr_graph import as_csr, VERTEX_TYPE, OFFSET_TYPE
+from graph_io import load_edge_list
+from search_stats import phase
+
+def get_file(filepath, n):
+  """
+  each line in the input file is a directed edge, from the vertex represented 
+  in the first number to the vertex represented in the second.
+  
+  returns two adjacency lists, one "straight" and the other "reversed" (tail<->head)
+
+  see also graph_io.load_edge_list, which loads the same format directly
+  into a (cached) CSRGraph, with the reversed graph computed on demand
+  """
+  
+  with open(filepath, 'r') as f:
+    file_lines = f.readlines()
+  f.close()
+
+  adj_list = {i: [] for i in range(1,n+1)} # adj_list[0] will stay an empty list []
+  rev_adj_list = {i: [] for i in range(1,n+1)}
+
+  for line in file_lines:
+    line = line.strip('\n')
+    edge = line.split(' ')[:2]
+
+    adj_list[int(edge[0])].append(int(edge[1]))
+    rev_adj_list[int(edge[1])].append(int(edge[0]))
+
+  return adj_list, rev_adj_list
+
+def finishing_order(G, stats=None):
+  """
+  G - graph in CSR form (see csr_graph.py)
+  stats - optional search_stats.SearchStats, counting the vertices, edges and the deepest stack
+
+  returns an array of all the vertices in increasing DFS finishing time (post-order),
+  running DFS-Loop over the vertices in increasing order.
+
+  the DFS uses an explicit stack of (vertex, index of the next edge to scan) pairs, kept as
+  two flat arrays, so each vertex is pushed once and the stack never exceeds the DFS depth
+  """
+  n = G.n
+  offsets, targets = G.offsets, G.targets
+
+  explored = bytearray(n)
+  order = array(VERTEX_TYPE)
+  stack_v = array(VERTEX_TYPE)
+  stack_e = array(OFFSET_TYPE)
+  # push on the stack, tracking its depth with stats
+  push_v = stack_v.append if stats is None else stats.stack_append(stack_v)
+
+  for root in range(n):
+    if explored[root]: continue
+
+    explored[root] = True
+    push_v(root)
+    stack_e.append(offsets[root])
+
+    while stack_v:
+      v = stack_v[-1]
+      e = stack_e[-1]
+      end = offsets[v+1]
+      # skip the already explored heads
+      while e < end and explored[targets[e]]:
+        e += 1
+
+      if e < end: # go deeper, remember where to continue scanning v's edges
+        head = targets[e]
+        stack_e[-1] = e + 1
+        explored[head] = True
+        push_v(head)
+        stack_e.append(offsets[head])
+
+      else: # all of v's edges are exhausted - v is finished
+        stack_v.pop()
+        stack_e.pop()
+        order.append(v)
+
+  if stats is not None:
+    # every vertex was finished, and every edge scanned, once
+    stats.settled += n
+    stats.relaxations += G.m
+  return order
+
+def compute_scc(G, G_rev=None, n=None, stats=None):
+  """
+  G - the graph, in CSR form or as an adjacency list (see get_file)
+  G_rev - the reversed graph; by default computed from G (see CSRGraph.reverse)
+  n - number of vertices, only needed for adjacency lists of 1-indexed vertices
+  stats - optional search_stats.SearchStats, counting both passes' vertices, edges and
+          deepest stack, and timing the 'setup', 'reverse', 'first_pass' and 'second_pass' phases
+
+  returns an array mapping every vertex to its component id (0..k-1, in the order the
+  components are found). for 1-indexed graphs, vertex 0 simply forms its own component
+  """
+  with phase(stats, 'setup'):
+    G = as_csr(G, None if n is None else n+1)
+  with phase(stats, 'reverse'):
+    G_rev = G.reverse() if G_rev is None else as_csr(G_rev, G.n)
+
+  # first pass DFS-Loop on reversed graph, in order to compute ordered list of nodes for the 2nd pass
+  with phase(stats, 'first_pass'):
+    order = finishing_order(G_rev, stats)
+
+  with phase(stats, 'second_pass'):
+    component = _label_components(G, order, stats)
+  return component
+
+def _label_components(G, order, stats):
+  # second pass on original graph, with reversed finishing_time order; every search
+  # from an unlabeled vertex labels exactly one SCC (the order of the search doesn't matter)
+  offsets, targets = G.offsets, G.targets
+  component = array(VERTEX_TYPE, [-1]) * G.n
+  stack = array(VERTEX_TYPE)
+  push = stack.append if stats is None else stats.stack_append(stack)
+  label = 0
+  for leader in reversed(order):
+    if component[leader] != -1: continue
+
+    component[leader] = label
+    push(leader)
+    while stack:
+      v = stack.pop()
+      for e in range(offsets[v], offsets[v+1]):
+        head = targets[e]
+        if component[head] == -1:
+          component[head] = label
+          push(head)
+    label += 1
+
+  if stats is not None:
+    stats.settled += G.n
+    stats.relaxations += G.m
+  return component
+
+def component_sizes(component):
+  """ array of the number of vertices in each component, by component id """
+  sizes = array(OFFSET_TYPE, [0]) * (max(component) + 1 if len(component) else 0)
+  for c in component:
+    sizes[c] += 1
+  return sizes
+
+
+if __name__ == '__main__':
+
+  # get files
+  filepath = 'Algorithms/'
+
+  n = 875714 # number of vertices in 'SCC.txt'
+  n1 = 9
+  n2 = 8
+  n3 = 8
+  n4 = 8
+  n5 = 12
+  test1 = load_edge_list(filepath + 'test1_33300.txt', n1+1)
+  test2 = load_edge_list(filepath + 'test2_33200.txt', n2+1)
+  test3 = load_edge_list(filepath + 'test3_33110.txt', n3+1)
+  test4 = load_edge_list(filepath + 'test4_71000.txt', n4+1)
+  test5 = load_edge_list(filepath + 'test5_63210.txt', n5+1)
+  SCC_graph = load_edge_list(filepath + 'SCC.txt', n+1)
+
+  tic = time.time()
+
+  # component = compute_scc(test5)
+  component = compute_scc(SCC_graph)
+
+  toc = time.time()
+
+  # evaluating running time
+  t = ((toc - tic)*1000//1)
+  sec = t/1000
+
+  print(f"running time: {sec}s")
+
+  # finding largest 5 SCCs
+  SCC_lengths = heapq.nlargest(5, component_sizes(component))
+  print(SCC_lengths)
@@ -0,0 +1,177 @@
+"""
+SCC - Tarjan's algorithm (Pearce's memory-efficient variant).
+A single-pass, linear-time algorithm for finding directed graph's strongly-connected components.
+unlike Kosaraju's algorithm (scc_kosaraju_algorithm.py), it needs only the graph itself (no reversed
+graph) and runs one DFS over it.
+
+Pearce's variant keeps a single integer per vertex (rindex) plus one bit per vertex instead of Tarjan's
+index, lowlink and on-stack flag. implemented with an explicit stack (to avoid python's recursive limits)
+over the graph's CSR arrays.
+
+See also https://en.wikipedia.org/wiki/Tarjan%27s_strongly_connected_components_algorithm
+         D. J. Pearce, "A space-efficient algorithm for finding strongly connected components", 2016
+"""
+
+import heapq
+import time
+from array import array
+
+from csr_graph import CSRGraph, as_csr, VERTEX_TYPE, OFFSET_TYPE
+from graph_io import load_edge_list
+from scc_kosaraju_algorithm import compute_scc, component_sizes
+
+def tarjan_scc(G, n=None):
+  """
+  G - the graph, in CSR form or as an adjacency list (see scc_kosaraju_algorithm.get_file)
+  n - number of vertices, only needed for adjacency lists of 1-indexed vertices
+
+  returns an array mapping every vertex to its component id (0..k-1). components are numbered in the
+  order they are completed, which is a reverse topological order of the condensation DAG: every edge
+  between two components goes from a higher id to a lower one
+  """
+  G = as_csr(G, None if n is None else n+1)
+  n = G.n
+  offsets, targets = G.offsets, G.targets
+
+  # rindex[v]: 0 - not visited yet; DFS index (1, 2, ...) while v's component is open (may be lowered to
+  # the smallest index reachable from v); c - component id counted down from n-1, once completed.
+  # completed ids are always larger than the open indices, so edges into completed components are ignored
+  rindex = array(OFFSET_TYPE, [0]) * n
+  # root[v] - v is (so far) the root of its component
+  root = bytearray(n)
+  index = 1
+  c = n - 1
+
+  # DFS call stack of (vertex, index of the next edge to scan), and the stack of visited vertices
+  # whose component is still open
+  stack_v = array(VERTEX_TYPE)
+  stack_e = array(OFFSET_TYPE)
+  open_stack = array(VERTEX_TYPE)
+
+  for r in range(n):
+    if rindex[r]: continue
+
+    root[r] = True
+    rindex[r] = index
+    index += 1
+    stack_v.append(r)
+    stack_e.append(offsets[r])
+
+    while stack_v:
+      v = stack_v[-1]
+      e = stack_e[-1]
+      end = offsets[v+1]
+
+      # scan v's edges until an unvisited head is found
+      descend = False
+      while e < end:
+        head = targets[e]
+        e += 1
+        if not rindex[head]: # go deeper, remember where to continue scanning v's edges
+          stack_e[-1] = e
+          root[head] = True
+          rindex[head] = index
+          index += 1
+          stack_v.append(head)
+          stack_e.append(offsets[head])
+          descend = True
+          break
+        if rindex[head] < rindex[v]:
+          rindex[v] = rindex[head]
+          root[v] = False
+      if descend: continue
+
+      # all of v's edges are exhausted
+      stack_v.pop()
+      stack_e.pop()
+      if root[v]:
+        # v is the root of a component - pop its members off the open stack
+        index -= 1
+        while open_stack and rindex[v] <= rindex[open_stack[-1]]:
+          w = open_stack.pop()
+          rindex[w] = c
+          index -= 1
+        rindex[v] = c
+        c -= 1
+      else:
+        open_stack.append(v)
+
+      if stack_v:
+        # back in the parent u, propagate the lowest index reached through v
+        u = stack_v[-1]
+        if rindex[v] < rindex[u]:
+          rindex[u] = rindex[v]
+          root[u] = False
+
+  # component ids counted down from n-1 -> 0..k-1 in completion order
+  return array(VERTEX_TYPE, [n - 1 - r for r in rindex])
+
+def condensation(G, component):
+  """
+  G - graph in CSR form (see csr_graph.py)
+  component - component id of every vertex (as returned by tarjan_scc / compute_scc)
+
+  returns the condensation DAG (each component contracted to a single vertex) as an unweighted
+  CSRGraph over the component ids, with no parallel edges and no self-loops
+  """
+  k = max(component) + 1 if len(component) else 0
+  offsets, targets = G.offsets, G.targets
+
+  # group the vertices by component (counting sort)
+  start = array(OFFSET_TYPE, [0]) * (k + 1)
+  for c in component:
+    start[c+1] += 1
+  for c in range(k):
+    start[c+1] += start[c]
+  position = array(OFFSET_TYPE, start[:-1])
+  members = array(VERTEX_TYPE, [0]) * len(component)
+  for v, c in enumerate(component):
+    members[position[c]] = v
+    position[c] += 1
+
+  # the edges leaving each component, with duplicates dropped using a per-component stamp
+  tails, heads = array(VERTEX_TYPE), array(VERTEX_TYPE)
+  last_seen = array(VERTEX_TYPE, [-1]) * k
+  for c in range(k):
+    for i in range(start[c], start[c+1]):
+      v = members[i]
+      for e in range(offsets[v], offsets[v+1]):
+        d = component[targets[e]]
+        if d != c and last_seen[d] != c:
+          last_seen[d] = c
+          tails.append(c)
+          heads.append(d)
+
+  return CSRGraph.from_edges(k, tails, heads)
+
+def scc_decomposition(G, engine='tarjan', n=None):
+  """
+  G - the graph, in CSR form or as an adjacency list
+  engine - 'tarjan' (single pass, no reversed graph) or 'kosaraju' (two passes)
+
+  returns a tuple of (component id of every vertex, size of every component, condensation DAG as a CSRGraph)
+  """
+  G = as_csr(G, None if n is None else n+1)
+  if engine == 'tarjan':
+    component = tarjan_scc(G)
+  elif engine == 'kosaraju':
+    component = compute_scc(G)
+  else:
+    raise ValueError(f"unknown SCC engine '{engine}', expected 'tarjan' or 'kosaraju'")
+  return component, component_sizes(component), condensation(G, component)
+
+
+if __name__ == '__main__':
+
+  n = 875714 # number of vertices in 'SCC.txt'
+  SCC_graph = load_edge_list('Algorithms/SCC.txt', n+1)
+
+  tic = time.time()
+  component, sizes, dag = scc_decomposition(SCC_graph)
+  toc = time.time()
+
+  print(f"running time: {toc - tic:.3f}s")
+  print(f"{len(sizes)} SCCs, condensation DAG with {dag.m} edges")
+
+  # finding largest 5 SCCs
+  print(heapq.nlargest(5, sizes))
@@ -0,0 +1,144 @@
+"""
+Optional instrumentation of the search loops - Dijkstra's ShortestPathSearch, primMST and
+Kosaraju's DFS passes: counters of heap and stack operations and of relaxations, and wall
+time per phase, to tell whether a slow run comes from the graph's shape (many vertices
+reached, a deep DFS) or from the implementation (e.g. many stale heap entries).
+
+the loops call their heap / stack / edge-scanning functions through local names, bound to
+the plain functions (heapq.heappush, range, ...) or, when a SearchStats is given, to the
+counting wrappers it makes. so without stats the loops run as they are - nothing is checked
+per iteration - and the counting is paid for only when asked for.
+"""
+
+import heapq
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class SearchStats:
+    """
+    counters of the runs it was passed to (accumulated, see reset):
+      settled - vertices processed (popped and settled, or finished by the DFS)
+      pushes, pops - heap entries pushed and popped (including the stale ones)
+      stale_pops - popped entries of vertices already processed (lazy heaps)
+      decrease_keys - decrease-key operations (indexed heaps)
+      relaxations - edges scanned from processed vertices
+      max_heap, max_stack - the largest heap, and the deepest DFS stack
+      phases - wall time of every phase, in seconds, by name (e.g. 'setup', 'search')
+
+    callback - optional callable(stats, phase, seconds), called at the end of every phase
+    """
+
+    COUNTERS = ('settled', 'pushes', 'pops', 'stale_pops', 'decrease_keys', 'relaxations',
+                'max_heap', 'max_stack')
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.phases = {}
+
+    def as_dict(self):
+        return dict({name: getattr(self, name) for name in self.COUNTERS}, phases=dict(self.phases))
+
+    def __repr__(self):
+        counters = ', '.join(f'{name}={getattr(self, name)}' for name in self.COUNTERS)
+        phases = ', '.join(f'{name}={seconds:.6f}s' for name, seconds in self.phases.items())
+        return f'SearchStats({counters}, phases: {phases or "-"})'
+
+    @contextmanager
+    def phase(self, name):
+        """ times the block, adding to phases[name] """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if self.callback is not None:
+                self.callback(self, name, elapsed)
+
+    def track_depth(self, name, size):
+        """ max-update the max_heap / max_stack counter name with a current size """
+        if size > getattr(self, name):
+            setattr(self, name, size)
+
+    # counting wrappers
+
+    def heappush(self):
+        """ heapq.heappush(heap, item), counting pushes and the heap's size """
+        def push(heap, item):
+            heapq.heappush(heap, item)
+            self.pushes += 1
+            if len(heap) > self.max_heap:
+                self.max_heap = len(heap)
+        return push
+
+    def heappop(self):
+        """ heapq.heappop, counting pops """
+        def pop(heap):
+            self.pops += 1
+            return heapq.heappop(heap)
+        return pop
+
+    def scan(self):
+        """ range(first edge, end) of a vertex's edges, counting it as settled and its edges as relaxed """
+        def edges(start, stop):
+            self.settled += 1
+            self.relaxations += stop - start
+            return range(start, stop)
+        return edges
+
+    def stack_append(self, stack):
+        """ stack.append, tracking the stack's depth """
+        def append(item):
+            stack.append(item)
+            if len(stack) > self.max_stack:
+                self.max_stack = len(stack)
+        return append
+
+    def indexed_heap(self, heap):
+        """ a view of an IndexedHeap counting its operations """
+        return _CountingIndexedHeap(heap, self)
+
+
+class _CountingIndexedHeap:
+    # the IndexedHeap operations used by the loops, counted
+    __slots__ = ('heap', 'stats')
+
+    def __init__(self, heap, stats):
+        self.heap, self.stats = heap, stats
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, item, key):
+        self.heap.push(item, key)
+        self.stats.pushes += 1
+        self.stats.track_depth('max_heap', len(self.heap))
+
+    def decrease_key(self, item, key):
+        self.heap.decrease_key(item, key)
+        self.stats.decrease_keys += 1
+
+    def push_or_decrease(self, item, key):
+        present = item in self.heap
+        changed = self.heap.push_or_decrease(item, key)
+        if changed and present:
+            self.stats.decrease_keys += 1
+        elif changed:
+            self.stats.pushes += 1
+            self.stats.track_depth('max_heap', len(self.heap))
+        return changed
+
+    def pop(self):
+        self.stats.pops += 1
+        return self.heap.pop()
+
+
+def phase(stats, name):
+    """ stats.phase(name), or a no-op context without stats """
+    return nullcontext() if stats is None else stats.phase(name)
@@ -0,0 +1,286 @@
+"""
+Spatial index over a fixed set of 2-D points: a uniform grid, built once (one sort of
+the points by cell) and then queried many times, for
+  - radius join: all pairs of points within distance r of each other
+  - the k closest pairs
+  - the nearest neighbour of query points
+
+the coordinates are kept in numpy arrays, and all comparisons are made on squared
+distances. a query only looks at the cells around the points it's about, so when the
+cell size is close to the typical query distance, a query costs about the size of its
+answer, and the O(n log n) build is amortized over all the queries.
+
+See also https://en.wikipedia.org/wiki/Grid_(spatial_index)
+"""
+
+import numpy as np
+
+# number of point pairs compared at once (bounds the temporary arrays)
+PAIR_BATCH = 1 << 22
+# number of cells along each axis is kept below this, so that cell keys fit in int64
+MAX_CELLS = 1 << 30
+
+
+def squared_distances(P, i, j):
+    """ squared distances between the points P[i] and P[j], for arrays of indices i, j """
+    d = P[i] - P[j]
+    return np.einsum('ij,ij->i', d, d)
+
+
+def block_pairs(startA, countA, startB, countB, same=False):
+    """
+    yields the (i, j) pairs of positions between the blocks [startA, startA + countA) and
+    [startB, startB + countB), for arrays of blocks, in batches of about PAIR_BATCH pairs.
+    same - the blocks are the same ones (e.g. a cell with itself), keep only i < j
+    """
+    sizes = countA * countB
+    ends = np.cumsum(sizes)
+    first = 0
+    while first < len(sizes):
+        base = ends[first] - sizes[first]
+        last = max(np.searchsorted(ends, base + PAIR_BATCH, side='right'), first + 1)
+        block_sizes = sizes[first:last]
+        block = np.repeat(np.arange(first, last), block_sizes)
+        r = np.arange(ends[last-1] - base) - np.repeat(ends[first:last] - block_sizes - base, block_sizes)
+        i = startA[block] + r // countB[block]
+        j = startB[block] + r % countB[block]
+        if same:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        yield i, j
+        first = last
+
+
+def _forward_offsets(reach):
+    # the cells within reach of a cell (along both axes), as (dx, dy), but only half of them -
+    # the other half see the cell as their neighbour. the cell itself isn't included
+    offsets = [(0, dy) for dy in range(1, reach + 1)]
+    offsets += [(dx, dy) for dx in range(1, reach + 1) for dy in range(-reach, reach + 1)]
+    return offsets
+
+
+class GridIndex:
+    """
+    uniform grid of square cells over a fixed set of 2-D points, which are sorted by
+    cell. points are referred to by their index in the input coordinates
+    """
+
+    def __init__(self, x, y, cell=None):
+        """
+        x, y - the points' coordinates (lists or arrays)
+        cell - side of the grid's cells, best about the typical query distance;
+               by default, about one point per cell
+        """
+        self.points = P = np.column_stack((np.asarray(x), np.asarray(y)))
+        n = len(P)
+        if n == 0:
+            raise ValueError('no points to index')
+        self.origin = P.min(axis=0)
+        extent = (P.max(axis=0) - self.origin).astype(np.float64)
+        if cell is None:
+            area = extent[0] * extent[1]
+            # (points on a line: n cells along it)
+            cell = (area / n) ** 0.5 if area > 0 else (extent.max() or 1.0) / n
+        # larger cells only cost more comparisons, never miss a pair
+        self.cell = max(float(cell), extent.max() / (MAX_CELLS - 2))
+        if not self.cell > 0:
+            raise ValueError('cell size must be positive')
+
+        cx, cy = self._cells(P)
+        self.shape = (int(cx.max()) + 1, int(cy.max()) + 1)
+        key = cx * self.shape[1] + cy
+        # positions of the points sorted by cell, and for every nonempty cell (sorted by key):
+        # its key, the position of its first point and its number of points
+        self.order = np.argsort(key)
+        key = key[self.order]
+        self.starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        self.counts = np.diff(np.append(self.starts, n))
+        self.keys = key[self.starts]
+        self.sorted_points = P[self.order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cells(self, P):
+        # cell coordinates of the points P (clipped far off the grid, so they stay int64)
+        c = np.clip(np.floor((P - self.origin) / self.cell), -MAX_CELLS, 2 * MAX_CELLS)
+        return c[:, 0].astype(np.int64), c[:, 1].astype(np.int64)
+
+    def _lookup(self, cx, cy):
+        # indices (into keys) of the cells (cx, cy); -1 for empty cells and cells off the grid
+        nx, ny = self.shape
+        key = cx * ny + cy
+        index = np.minimum(np.searchsorted(self.keys, key), len(self.keys) - 1)
+        found = (cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny) & (self.keys[index] == key)
+        return np.where(found, index, -1)
+
+    def _ring(self, qx, qy, rho):
+        """
+        the nonempty cells (indices into keys) at Chebyshev distance rho from the cells (qx, qy)
+        of a few query points, with the position in qx of the query each one is around.
+        the ring is clipped to the grid, so a far query costs as little as a near one
+        """
+        nx, ny = self.shape
+        # the ring's rows, below and above, and its columns, left and right (without the corners),
+        # as (fixed coordinate, first and last cell along it, the row / column is along x)
+        sides = [(qy - rho, qx - rho, qx + rho, True)]
+        if rho > 0:
+            sides += [(qy + rho, qx - rho, qx + rho, True),
+                      (qx - rho, qy - rho + 1, qy + rho - 1, False),
+                      (qx + rho, qy - rho + 1, qy + rho - 1, False)]
+        owners, cells = [], []
+        for fixed, lo, hi, along_x in sides:
+            size_along, size_fixed = (nx, ny) if along_x else (ny, nx)
+            lo, hi = np.maximum(lo, 0), np.minimum(hi, size_along - 1)
+            length = np.where((fixed >= 0) & (fixed < size_fixed), np.maximum(hi - lo + 1, 0), 0)
+            owner = np.repeat(np.arange(len(qx)), length)
+            along = np.repeat(lo, length) + np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+            fixed = np.repeat(fixed, length)
+            found = self._lookup(along, fixed) if along_x else self._lookup(fixed, along)
+            owners.append(owner[found >= 0])
+            cells.append(found[found >= 0])
+        return np.concatenate(owners), np.concatenate(cells)
+
+    def _unsearched_d2(self, Q, qx, qy, rho):
+        """
+        squared distance from the query points Q to the grid's cells outside the rings up to
+        rho around their cells (qx, qy) - to the closest of the grid's parts left and right
+        of them, and below and above them - or inf once the rings cover the grid.
+        in real distances, unlike rho * cell, so a query far off the grid (or clipped to
+        MAX_CELLS) stops a ring or two after reaching the points nearest to it
+        """
+        nx, ny = self.shape
+        zero, last_x, last_y = np.zeros_like(qx), np.full_like(qx, nx - 1), np.full_like(qy, ny - 1)
+        # (first x, last x, first y, last y) cells of every part
+        parts = [(np.maximum(qx + rho + 1, 0), last_x, zero, last_y),
+                 (zero, np.minimum(qx - rho - 1, nx - 1), zero, last_y),
+                 (zero, last_x, np.maximum(qy + rho + 1, 0), last_y),
+                 (zero, last_x, zero, np.minimum(qy - rho - 1, ny - 1))]
+        bound = np.full(len(Q), np.inf)
+        for x0, x1, y0, y1 in parts:
+            lo = self.origin + self.cell * np.column_stack((x0, y0))
+            hi = self.origin + self.cell * (np.column_stack((x1, y1)) + 1)
+            d = np.maximum(np.maximum(lo - Q, Q - hi), 0)
+            d2 = np.einsum('ij,ij->i', d, d)
+            bound = np.where((x0 <= x1) & (y0 <= y1), np.minimum(bound, d2), bound)
+        return bound
+
+    def neighbour_pairs(self, reach=1):
+        """
+        yields batches (i, j) of candidate pairs: every pair of points whose cells are at most
+        reach cells apart along both axes, once. any two points within distance reach * cell of
+        each other are among them
+        """
+        starts, counts, order = self.starts, self.counts, self.order
+        for i, j in block_pairs(starts, counts, starts, counts, same=True):
+            yield order[i], order[j]
+
+        ny = self.shape[1]
+        cx, cy = self.keys // ny, self.keys % ny
+        offsets = _forward_offsets(reach)
+        cells = len(self.keys)
+        if len(offsets) < cells:
+            # look every cell's neighbours up, one offset at a time
+            for dx, dy in offsets:
+                other = self._lookup(cx + dx, cy + dy)
+                a = np.flatnonzero(other >= 0)
+                b = other[a]
+                for i, j in block_pairs(starts[a], counts[a], starts[b], counts[b]):
+                    yield order[i], order[j]
+        else:
+            # a reach of many cells: it's cheaper to go over all the pairs of nonempty cells
+            single = np.zeros(1, dtype=np.int64), np.full(1, cells)
+            for a, b in block_pairs(*single, *single, same=True):
+                near = (np.abs(cx[a] - cx[b]) <= reach) & (np.abs(cy[a] - cy[b]) <= reach)
+                a, b = a[near], b[near]
+                for i, j in block_pairs(starts[a], counts[a], starts[b], counts[b]):
+                    yield order[i], order[j]
+
+    def radius_pairs(self, r):
+        """
+        radius join: all pairs of points within distance r of each other
+        returns arrays (i, j, d2): the pairs' point indices, with i < j, and squared distances
+        """
+        # a bit more than r / cell, so that rounding can't put such a pair one cell further apart
+        reach = int(r / self.cell * (1 + 1e-9)) + 1
+        r2 = r * r
+        I, J, D = [], [], []
+        for i, j in self.neighbour_pairs(reach):
+            d2 = squared_distances(self.points, i, j)
+            keep = d2 <= r2
+            I.append(i[keep])
+            J.append(j[keep])
+            D.append(d2[keep])
+        i, j = np.concatenate(I), np.concatenate(J)
+        return np.minimum(i, j), np.maximum(i, j), np.concatenate(D)
+
+    def k_closest_pairs(self, k):
+        """
+        the k closest pairs of points (duplicate points are pairs at distance 0)
+        returns arrays (i, j, d2) as radius_pairs, by increasing distance
+        """
+        n = len(self)
+        k = min(k, n * (n - 1) // 2)
+        if k <= 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, squared_distances(self.points, empty, empty)
+
+        # start from the radius holding about k pairs for uniformly spread points, and double it
+        # until it holds at least k pairs - the k closest ones
+        area = self.shape[0] * self.shape[1] * self.cell ** 2
+        r = (2 * k * area / (np.pi * n * n)) ** 0.5
+        while True:
+            i, j, d2 = self.radius_pairs(r)
+            if len(d2) >= k:
+                break
+            r *= 2
+        if k < len(d2):
+            top = np.argpartition(d2, k - 1)[:k]
+            i, j, d2 = i[top], j[top], d2[top]
+        order = np.lexsort((j, i, d2))
+        return i[order], j[order], d2[order]
+
+    def nearest(self, x, y):
+        """
+        nearest neighbour: the indexed point closest to every query point (a query at an
+        indexed point finds that point, at distance 0)
+        x, y - the query points' coordinates (scalars or arrays)
+        returns arrays (index, d2): the nearest points' indices and squared distances (floats)
+        """
+        Q = np.column_stack((np.atleast_1d(x), np.atleast_1d(y)))
+        m = len(Q)
+        qx, qy = self._cells(Q)
+        nx, ny = self.shape
+        best = np.full(m, np.inf)
+        index = np.zeros(m, dtype=np.int64)
+
+        # the cells are searched in rings around the query's cell, starting from the first ring
+        # which reaches the grid, until a point is found no farther than the rest of the grid
+        # (see _unsearched_d2), or the whole grid is searched
+        rho = np.maximum(np.maximum(-qx, qx - (nx - 1)), np.maximum(-qy, qy - (ny - 1)))
+        rho = np.maximum(rho, 0)
+        pending = np.arange(m)
+        while len(pending):
+            for ring in np.unique(rho[pending]):
+                q = pending[rho[pending] == ring]
+                owner, cells = self._ring(qx[q], qy[q], ring)
+                owner = q[owner]
+                ones = np.ones(len(owner), dtype=np.int64)
+                for a, p in block_pairs(np.arange(len(owner)), ones, self.starts[cells], self.counts[cells]):
+                    query = owner[a]
+                    d = self.sorted_points[p] - Q[query]
+                    d2 = np.einsum('ij,ij->i', d, d)
+                    # the closest of the batch, per query
+                    order = np.lexsort((d2, query))
+                    query, d2, p = query[order], d2[order], p[order]
+                    first = np.concatenate(([True], query[1:] != query[:-1]))
+                    query, d2, p = query[first], d2[first], p[first]
+                    better = d2 < best[query]
+                    best[query[better]] = d2[better]
+                    index[query[better]] = p[better]
+
+            done = best[pending] <= self._unsearched_d2(Q[pending], qx[pending], qy[pending], rho[pending])
+            rho[pending] += 1
+            pending = pending[~done]
+
+        return self.order[index], best
@@ -0,0 +1,343 @@
+"""
+Deterministic synthetic inputs for scale testing: weighted graphs (random, power-law,
+grid, road-like, deep chains), point sets (uniform, clustered, duplicate-heavy) and
+grayscale images, all reproducible from a seed.
+
+graphs are produced as a stream of edge blocks - (tails, heads, weights) numpy arrays,
+with 0-indexed vertices, ordered by tail, a vertex's edges never split across blocks -
+so they can be written straight to the on-disk formats the loaders read, at any size,
+without holding the graph in memory:
+  write_adjacency - Dijksra_ShortestPath.get_file / graph_io.load_adjacency
+  write_edge_list - scc_kosaraju_algorithm.get_file / graph_io.load_edge_list ('SCC.txt')
+  write_mst_edges - the 'edges.txt' format of prims_algorithm / mst.py (with its header)
+files use 1-indexed vertices, as the checked-in data files do. build_csr builds the
+CSRGraph in memory instead.
+
+usage: python synthetic_data.py <random|power_law|grid|road|chain> <size> <output file>
+                                [--format adjacency|edges|mst] [--seed SEED]
+"""
+
+import argparse
+import os
+from array import array
+
+import numpy as np
+from csr_graph import CSRGraph, OFFSET_TYPE, VERTEX_TYPE, INT_WEIGHT_TYPE
+
+# approximate number of edges per block
+BLOCK_EDGES = 1 << 20
+MAX_WEIGHT = 1000
+
+
+# graphs
+
+def _degree_blocks(rng, degrees, draw_heads, max_weight):
+    # edge blocks of vertices with the given out-degrees, heads drawn by draw_heads(size)
+    n = len(degrees)
+    ends = np.cumsum(degrees)
+    start = 0
+    while start < n:
+        done = ends[start - 1] if start else 0
+        stop = max(int(np.searchsorted(ends, done + BLOCK_EDGES, side='right')), start + 1)
+        tails = np.repeat(np.arange(start, stop), degrees[start:stop])
+        yield tails, draw_heads(len(tails)), rng.integers(1, max_weight + 1, len(tails))
+        start = stop
+
+
+def random_graph(n, m, seed=0, max_weight=MAX_WEIGHT):
+    """ n vertices and m directed edges between uniformly random vertices (self-loops possible) """
+    rng = np.random.default_rng(seed)
+    degrees = rng.multinomial(m, np.full(n, 1 / n))
+    return _degree_blocks(rng, degrees, lambda size: rng.integers(0, n, size), max_weight)
+
+
+def power_law_graph(n, m, seed=0, exponent=2.2, max_weight=MAX_WEIGHT):
+    """
+    n vertices and m directed edges whose endpoints are drawn with weights following a
+    power law (Chung-Lu): the degree distribution has a heavy tail with the given exponent,
+    a few hubs having a large share of the edges. the hubs are spread over the vertex ids
+    """
+    rng = np.random.default_rng(seed)
+    weight = np.arange(1, n + 1) ** (-1 / (exponent - 1))
+    p = weight[rng.permutation(n)]
+    p /= p.sum()
+    degrees = rng.multinomial(m, p)
+    cumulative = np.cumsum(p)
+    draw = lambda size: np.minimum(np.searchsorted(cumulative, rng.random(size) * cumulative[-1]), n - 1)
+    return _degree_blocks(rng, degrees, draw, max_weight)
+
+
+def chain_graph(n, seed=0, cycle=True, max_weight=MAX_WEIGHT):
+    """
+    the path 0 -> 1 -> ... -> n-1, closed into a cycle (a single strongly connected component)
+    if cycle: a DFS from 0 goes n levels deep, which breaks recursive implementations
+    """
+    rng = np.random.default_rng(seed)
+    block = BLOCK_EDGES
+    for start in range(0, n, block):
+        tails = np.arange(start, min(start + block, n))
+        heads = tails + 1
+        if cycle:
+            heads[heads == n] = 0
+        else:
+            tails, heads = tails[heads < n], heads[heads < n]
+        yield tails, heads, rng.integers(1, max_weight + 1, len(tails))
+
+
+def _lattice_row(seed, r, cols, road, max_weight):
+    """
+    the random attributes of row r of a lattice, from a generator of its own (so any row can
+    be regenerated): vertex positions, and for the edges it owns - to the right, down and (road
+    only) diagonally down-right - whether they exist and their weights
+    """
+    rng = np.random.default_rng([seed, r])
+    row = {'x': np.arange(cols, dtype=np.float64), 'y': np.full(cols, float(r))}
+    if road:
+        # jittered intersections; every row stays connected along it, and column 0 connects
+        # the rows, so the graph is connected
+        row['x'] += rng.uniform(-0.3, 0.3, cols)
+        row['y'] += rng.uniform(-0.3, 0.3, cols)
+        row['right'] = np.ones(cols - 1, dtype=bool)
+        row['down'] = rng.random(cols) < 0.8
+        row['down'][0] = True
+        row['diagonal'] = rng.random(cols - 1) < 0.1
+        # slow (local) and fast (arterial) roads
+        row['speed'] = {key: rng.choice([1.0, 1.0, 1.0, 2.0, 4.0], size) for key, size in
+                        [('right', cols - 1), ('down', cols), ('diagonal', cols - 1)]}
+    else:
+        row['right'] = np.ones(cols - 1, dtype=bool)
+        row['down'] = np.ones(cols, dtype=bool)
+        row['diagonal'] = np.zeros(cols - 1, dtype=bool)
+        row['weights'] = {key: rng.integers(1, max_weight + 1, size) for key, size in
+                          [('right', cols - 1), ('down', cols), ('diagonal', cols - 1)]}
+    return row
+
+
+def _lattice_weights(row, below, key, road, max_weight):
+    # weights of the row's own edges of a kind; road weights are travel times: length / speed
+    if not road:
+        return row['weights'][key]
+    x, y = row['x'], row['y']
+    if key == 'right':
+        dx, dy = x[1:] - x[:-1], y[1:] - y[:-1]
+    elif key == 'down':
+        dx, dy = below['x'] - x, below['y'] - y
+    else:
+        dx, dy = below['x'][1:] - x[:-1], below['y'][1:] - y[:-1]
+    scale = max_weight / 4
+    return np.maximum(np.rint(scale * np.hypot(dx, dy) / row['speed'][key]), 1).astype(np.int64)
+
+
+def _lattice(rows, cols, seed, road, max_weight):
+    # edges in both directions, each undirected edge owned (and generated) by its upper row
+    above, row = None, _lattice_row(seed, 0, cols, road, max_weight)
+    for r in range(rows):
+        below = _lattice_row(seed, r + 1, cols, road, max_weight) if r + 1 < rows else None
+        base = r * cols
+        c = np.arange(cols)
+        tails, heads, weights = [], [], []
+
+        def add(keep, tail_cols, head_base, head_cols, w):
+            tails.append(base + tail_cols[keep])
+            heads.append(head_base + head_cols[keep])
+            weights.append(w[keep])
+
+        right = _lattice_weights(row, below, 'right', road, max_weight)
+        add(row['right'], c[:-1], base, c[1:], right)
+        add(row['right'], c[1:], base, c[:-1], right)
+        if below is not None:
+            down = _lattice_weights(row, below, 'down', road, max_weight)
+            add(row['down'], c, base + cols, c, down)
+            diagonal = _lattice_weights(row, below, 'diagonal', road, max_weight)
+            add(row['diagonal'], c[:-1], base + cols, c[1:], diagonal)
+        if above is not None:
+            up = _lattice_weights(above, row, 'down', road, max_weight)
+            add(above['down'], c, base - cols, c, up)
+            diagonal = _lattice_weights(above, row, 'diagonal', road, max_weight)
+            add(above['diagonal'], c[1:], base - cols, c[:-1], diagonal)
+
+        tails, heads, weights = np.concatenate(tails), np.concatenate(heads), np.concatenate(weights)
+        order = np.argsort(tails, kind='stable')
+        yield tails[order], heads[order], weights[order]
+        above, row = row, below
+
+
+def grid_graph(rows, cols, seed=0, max_weight=MAX_WEIGHT):
+    """ a rows x cols lattice (vertex r*cols + c), edges between 4-neighbours in both directions """
+    return _lattice(rows, cols, seed, False, max_weight)
+
+
+def road_graph(rows, cols, seed=0, max_weight=MAX_WEIGHT):
+    """
+    a road-network-like graph: a rows x cols lattice of jittered intersections, with ~20% of
+    the north-south streets missing and a few diagonal shortcuts; edges in both directions,
+    weighted by travel time (length over a speed, a few roads being faster). it's connected,
+    planar-ish and has a large diameter, like road networks
+    """
+    return _lattice(rows, cols, seed, True, max_weight)
+
+
+def build_csr(n, blocks):
+    """ the graph of the edge blocks as a (weighted) CSRGraph, in memory """
+    parts = list(blocks)
+    if parts:
+        tails, heads, weights = (np.concatenate(arrays) for arrays in zip(*parts))
+    else:
+        tails = heads = weights = np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+    return CSRGraph(array(OFFSET_TYPE, offsets.tobytes()),
+                    array(VERTEX_TYPE, heads.astype(np.int32).tobytes()),
+                    array(INT_WEIGHT_TYPE, weights.astype(np.int64).tobytes()))
+
+
+# writers
+
+def _vertex_runs(tails):
+    # (start, stop) of every run of edges of the same tail
+    starts = np.flatnonzero(np.concatenate(([True], tails[1:] != tails[:-1]))).tolist()
+    return zip(starts, starts[1:] + [len(tails)])
+
+
+def write_adjacency(path, n, blocks):
+    """
+    writes the graph in the adjacency format of Dijksra_ShortestPath.get_file:
+      <vertex>\\t<head>,<weight>\\t<head>,<weight>\\t...
+    one line for every vertex 1..n (also those without edges)
+    """
+    with open(path, 'w') as f:
+        next_vertex = 0
+        for tails, heads, weights in blocks:
+            edges = [f'{h},{w}' for h, w in zip((heads + 1).tolist(), weights.tolist())]
+            lines = []
+            for start, stop in _vertex_runs(tails):
+                v = int(tails[start])
+                lines.extend(f'{u + 1}\t\n' for u in range(next_vertex, v))
+                lines.append(f'{v + 1}\t' + '\t'.join(edges[start:stop]) + '\t\n')
+                next_vertex = v + 1
+            f.write(''.join(lines))
+        f.write(''.join(f'{u + 1}\t\n' for u in range(next_vertex, n)))
+
+
+def write_edge_list(path, blocks, weighted=False):
+    """
+    writes the graph as an edge list, one '<tail> <head>' line per edge (the format of
+    'SCC.txt', read by scc_kosaraju_algorithm.get_file), or '<tail> <head> <weight>'
+    """
+    with open(path, 'w') as f:
+        for tails, heads, weights in blocks:
+            columns = [(tails + 1).tolist(), (heads + 1).tolist()]
+            if weighted:
+                columns.append(weights.tolist())
+            f.write(''.join(' '.join(map(str, edge)) + '\n' for edge in zip(*columns)))
+
+
+def write_mst_edges(path, n, blocks):
+    """
+    writes an undirected graph in the 'edges.txt' format: an '<n> <m>' header, then one
+    '<vertex> <vertex> <cost>' line per edge. every edge is given in both directions in the
+    blocks (as by grid_graph / road_graph), and written once. the edges are streamed to a
+    temporary file first, as the header needs their count
+    """
+    body = path + '.tmp'
+    m = 0
+    with open(body, 'w') as f:
+        for tails, heads, weights in blocks:
+            once = tails < heads
+            m += int(once.sum())
+            columns = ((tails[once] + 1).tolist(), (heads[once] + 1).tolist(), weights[once].tolist())
+            f.write(''.join(f'{t} {h} {w}\n' for t, h, w in zip(*columns)))
+    with open(path, 'w') as out, open(body) as f:
+        out.write(f'{n} {m}\n')
+        while True:
+            chunk = f.read(BLOCK_EDGES)
+            if not chunk:
+                break
+            out.write(chunk)
+    os.remove(body)
+
+
+# point sets
+
+def uniform_points(n, seed=0, extent=None):
+    """ n integer points, uniform over [0, extent)^2 (10n by default: few duplicates) """
+    rng = np.random.default_rng(seed)
+    extent = extent or 10 * n
+    return rng.integers(0, extent, n), rng.integers(0, extent, n)
+
+
+def clustered_points(n, seed=0, clusters=20, extent=None, spread=0.01):
+    """
+    n integer points in Gaussian clusters around random centers, of random sizes and radii
+    (up to spread * extent), over [0, extent)^2
+    """
+    rng = np.random.default_rng(seed)
+    extent = extent or 10 * n
+    centers = rng.uniform(0, extent, (clusters, 2))
+    radii = rng.uniform(0.1, 1, clusters) * spread * extent
+    cluster = rng.choice(clusters, n, p=rng.dirichlet(np.ones(clusters)))
+    points = centers[cluster] + rng.normal(size=(n, 2)) * radii[cluster, None]
+    points = np.clip(np.rint(points), 0, extent - 1).astype(np.int64)
+    return points[:, 0], points[:, 1]
+
+
+def duplicate_points(n, seed=0, distinct=None, extent=None):
+    """ n integer points drawn (with repetition) from a few distinct ones (n / 10 by default) """
+    rng = np.random.default_rng(seed)
+    distinct = distinct or max(n // 10, 2)
+    x, y = uniform_points(distinct, seed + 1, extent or 10 * n)
+    pick = rng.integers(0, distinct, n)
+    return x[pick], y[pick]
+
+
+# images
+
+def synthetic_image(shape, seed=0):
+    """
+    a grayscale (uint8) image of random rectangles over smooth noise, so it has edges and
+    corners at all scales
+    """
+    rng = np.random.default_rng(seed)
+    N, M = shape
+    image = np.empty(shape)
+    image[...] = rng.uniform(60, 120, (N // 8 + 1, M // 8 + 1)).repeat(8, 0).repeat(8, 1)[:N, :M]
+    for _ in range(max(N * M // 20000, 4)):
+        top, left = rng.integers(0, N), rng.integers(0, M)
+        height, width = rng.integers(4, max(N // 8, 5)), rng.integers(4, max(M // 8, 5))
+        image[top:top + height, left:left + width] = rng.uniform(0, 255)
+    image += rng.normal(0, 4, shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def _graph(kind, size, seed):
+    # (n, edge blocks) of a graph of about size edges
+    if kind in ('grid', 'road'):
+        side = max(int((size / 4) ** 0.5), 2)
+        make = grid_graph if kind == 'grid' else road_graph
+        return side * side, make(side, side, seed)
+    if kind == 'chain':
+        return size, chain_graph(size, seed)
+    n = max(size // 8, 2)
+    make = random_graph if kind == 'random' else power_law_graph
+    return n, make(n, size, seed)
+
+
+GRAPH_KINDS = ('random', 'power_law', 'grid', 'road', 'chain')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='write a synthetic graph in one of the data file formats')
+    parser.add_argument('kind', choices=GRAPH_KINDS)
+    parser.add_argument('size', type=int, help='approximate number of (directed) edges')
+    parser.add_argument('output')
+    parser.add_argument('--format', choices=['adjacency', 'edges', 'mst'], default='adjacency')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    n, blocks = _graph(args.kind, args.size, args.seed)
+    if args.format == 'adjacency':
+        write_adjacency(args.output, n, blocks)
+    elif args.format == 'edges':
+        write_edge_list(args.output, blocks)
+    else:
+        write_mst_edges(args.output, n, blocks)
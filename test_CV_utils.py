@@ -0,0 +1,180 @@
+import numpy as np
+from CV_utils import Scratch, Conv2D, CornerDetection, NonMaxSuppression, TopCorners, EdgeThresholding, save_image
+from harris_pipeline import detect_corners, detect_corners_batch
+from CV_tiling import open_raw, PILImageReader, TiledConv2D, TiledCornerDetection, TiledNonMaxSuppression
+
+SOBEL_5x5 = np.array([[-1, -2, 0, 2, 1],
+                      [-2, -3, 0, 3, 2],
+                      [-3, -5, 0, 5, 3],
+                      [-2, -3, 0, 3, 2],
+                      [-1, -2, 0, 2, 1]])
+
+def reference_conv(in_image, kernel):
+    # per-pixel correlation over the edge-replicated image
+    k = kernel.shape[0]
+    p = (k - 1) // 2
+    image = np.pad(in_image.astype(float), p, mode='edge')
+    out = np.zeros(in_image.shape)
+    for i in range(in_image.shape[0]):
+        for j in range(in_image.shape[1]):
+            out[i, j] = np.sum(kernel * image[i:i+k, j:j+k])
+    return out
+
+def test_conv2d():
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (23, 31)).astype(np.int32)
+
+    for kernel in [SOBEL_5x5, SOBEL_5x5.T, np.outer([1, 2, 1], [-1, 0, 1]), np.ones((1, 1))]:
+        assert np.array_equal(Conv2D(img, kernel), reference_conv(img, kernel))
+    # integer rank-1 kernels whose rows aren't primitive integer vectors: the two passes are
+    # exact too
+    for kernel in [np.outer([3, 5, 3], [1, 1, 1]), np.outer([11, 11, 5], [11, 13, 7])]:
+        expected = reference_conv(img, kernel)
+        for method in ['auto', 'separable', 'direct']:
+            assert np.array_equal(Conv2D(img, kernel, method), expected)
+    large = rng.normal(size=(15, 15))
+    for method in ['auto', 'direct', 'fft']:
+        assert np.allclose(Conv2D(img, large, method), reference_conv(img, large))
+
+def reference_corners(Ix, Iy, w, k):
+    # per-pixel Harris response over zero-padded gradients, via the eigenvalues
+    p = (w - 1) // 2
+    Ixp, Iyp = np.pad(Ix, p), np.pad(Iy, p)
+    R = np.zeros(Ix.shape)
+    for i in range(Ix.shape[0]):
+        for j in range(Ix.shape[1]):
+            x, y = Ixp[i:i+w, j:j+w], Iyp[i:i+w, j:j+w]
+            l1, l2 = np.linalg.eigvalsh([[np.sum(x*x), np.sum(x*y)], [np.sum(x*y), np.sum(y*y)]])
+            R[i, j] = l1 * l2 - k * (l1 + l2)**2
+    return R
+
+def test_corner_detection():
+    rng = np.random.default_rng(1)
+    img = rng.integers(0, 256, (20, 27))
+    Ix, Iy = Conv2D(img, SOBEL_5x5), Conv2D(img, SOBEL_5x5.T)
+
+    for w in [3, 7]:
+        R = CornerDetection(Ix, Iy, w, 0.06)
+        expected = reference_corners(Ix, Iy, w, 0.06)
+        assert np.allclose(R, expected, rtol=1e-9, atol=1e-9 * np.abs(expected).max())
+
+def test_non_max_suppression():
+    rng = np.random.default_rng(2)
+    img = np.where(rng.random((25, 33)) > 0.6, rng.random((25, 33)), 0)
+    img[3:6, 3:6] = 1 # a plateau keeps all of its pixels
+
+    for w in [3, 5, 9]:
+        p = (w - 1) // 2
+        padded = np.pad(img, p)
+        expected = np.zeros(img.shape)
+        for i in range(img.shape[0]):
+            for j in range(img.shape[1]):
+                if img[i, j] == np.max(padded[i:i+w, j:j+w]):
+                    expected[i, j] = img[i, j]
+        assert np.array_equal(NonMaxSuppression(img, w), expected)
+
+def test_top_corners():
+    R = np.zeros((4, 5))
+    R[0, 1], R[2, 3], R[3, 0], R[1, 1] = 0.5, 0.9, 0.7, 0.1
+
+    coords, scores = TopCorners(R, 3)
+    assert coords.tolist() == [[2, 3], [3, 0], [0, 1]]
+    assert scores.tolist() == [0.9, 0.7, 0.5]
+    assert len(TopCorners(R, 10)[0]) == 4
+    assert len(TopCorners(R, 10, threshold=0.6)[0]) == 2
+    coords, scores = TopCorners(np.ones((3, 3)), 0)
+    assert coords.shape == (0, 2) and scores.shape == (0,)
+
+def test_edge_thresholding():
+    # a weak chain along the top row and down the right side, which reaches
+    # the strong pixel only at its (raster-order) end; an isolated weak pixel
+    img = np.array([[.5, .5, .5, .5, .5],
+                    [0., 0., 0., 0., .5],
+                    [.5, 0., 0., 0., .5],
+                    [0., 0., 0., 0., .9],
+                    [120, 0., 0., 0., .2]])
+
+    expected = np.array([[1, 1, 1, 1, 1],
+                         [0, 0, 0, 0, 1],
+                         [0, 0, 0, 0, 1],
+                         [0, 0, 0, 0, 1],
+                         [1, 0, 0, 0, 0]])
+    assert np.array_equal(EdgeThresholding(img, 0.3, 0.8), expected)
+
+def test_dtypes_and_scratch():
+    rng = np.random.default_rng(4)
+    img = rng.integers(0, 256, (45, 60)).astype(np.uint8)
+    Ix, Iy = Conv2D(img, SOBEL_5x5), Conv2D(img, SOBEL_5x5.T)
+    R = CornerDetection(Ix, Iy, 7, 0.06)
+
+    # float32 working dtype: the same results up to float32 rounding
+    scratch = Scratch()
+    Ix32 = Conv2D(img, SOBEL_5x5, dtype=np.float32, scratch=scratch)
+    assert Ix32.dtype == np.float32 and np.array_equal(Ix32, Ix)
+    R32 = CornerDetection(Ix32, Iy, 7, 0.06, dtype=np.float32, scratch=scratch)
+    assert R32.dtype == np.float32 and np.allclose(R32, R, rtol=1e-5, atol=1e-5 * np.abs(R).max())
+
+    # uint8 in and out
+    nms = NonMaxSuppression(img, 5, dtype=np.uint8, scratch=scratch)
+    assert nms.dtype == np.uint8 and np.array_equal(nms, NonMaxSuppression(img, 5))
+    edges = EdgeThresholding(img, 100, 200, dtype=np.uint8, scratch=scratch)
+    assert edges.dtype == np.uint8 and np.array_equal(edges, EdgeThresholding(img, 100, 200))
+
+    # out= is written and returned, and a second pass allocates no new buffers
+    buffers = dict(scratch.buffers)
+    out = np.empty(img.shape, np.float32)
+    assert Conv2D(img, SOBEL_5x5, out=out, scratch=scratch) is out and np.array_equal(out, Ix)
+    assert CornerDetection(out, Iy.astype(np.float32), 7, 0.06, out=out, scratch=scratch) is out
+    assert np.array_equal(out, R32)
+    assert all(scratch.buffers[name] is buffer for name, buffer in buffers.items())
+
+def test_harris_pipeline(tmp_path):
+    # frames with a bright square at different places; its 4 corners are the strongest corners
+    frames = []
+    for shift in range(4):
+        frame = np.zeros((40, 50), dtype=np.int32)
+        frame[10+shift:25+shift, 12+2*shift:30+2*shift] = 200
+        frames.append(frame)
+        save_image(frame, str(tmp_path / f'frame{shift}.png'))
+
+    expected = [detect_corners(frame, max_corners=4) for frame in frames]
+    for index, (coords, _) in enumerate(expected):
+        corners = {(10+index, 12+2*index), (24+index, 12+2*index), (10+index, 29+2*index), (24+index, 29+2*index)}
+        assert all(min(abs(r-i) + abs(c-j) for i, j in corners) <= 4 for r, c in coords)
+
+    for source, processes in [(frames, False), (str(tmp_path), True)]:
+        results = detect_corners_batch(source, workers=2, processes=processes, max_pending=2, max_corners=4)
+        results = sorted(results, key=lambda result: result[0])
+        assert [index for index, _, _ in results] == [0, 1, 2, 3]
+        for (_, coords, scores), (exp_coords, exp_scores) in zip(results, expected):
+            assert np.array_equal(coords, exp_coords) and np.allclose(scores, exp_scores)
+
+    coords, _ = detect_corners(frames[0], max_corners=4, dtype=np.float32)
+    assert np.array_equal(coords, expected[0][0])
+
+    # more corners asked for than there are: only the real ones, no flat background
+    for dtype in [np.float64, np.float32]:
+        coords, _ = detect_corners(frames[0], max_corners=50, dtype=dtype)
+        assert np.array_equal(coords, expected[0][0])
+    assert len(detect_corners(np.zeros((32, 32)), max_corners=10)[0]) == 0
+
+def test_tiled_filters(tmp_path):
+    rng = np.random.default_rng(3)
+    img = rng.integers(0, 256, (70, 95)).astype(np.uint8)
+    img.tofile(str(tmp_path / 'image.raw'))
+    save_image(img, str(tmp_path / 'image.png'))
+
+    Ix = Conv2D(img, SOBEL_5x5)
+    for source in [open_raw(str(tmp_path / 'image.raw'), img.shape), PILImageReader(str(tmp_path / 'image.png'))]:
+        tiled = TiledConv2D(source, SOBEL_5x5, out=str(tmp_path / 'Ix.npy'), tile_size=16, workers=3)
+        assert np.array_equal(tiled, Ix)
+    assert np.array_equal(np.load(str(tmp_path / 'Ix.npy')), Ix)
+
+    Iy = Conv2D(img, SOBEL_5x5.T)
+    R = CornerDetection(Ix, Iy, 7, 0.06)
+    # float inputs: the same up to rounding
+    assert np.allclose(TiledCornerDetection(Ix, Iy, 7, 0.06, tile_size=20), R, rtol=1e-9, atol=1e-9 * np.abs(R).max())
+    noisy = img + rng.normal(size=img.shape)
+    assert np.allclose(TiledConv2D(noisy, SOBEL_5x5, tile_size=16), Conv2D(noisy, SOBEL_5x5))
+    R = np.clip(R / np.abs(R).max(), 0, 1)
+    assert np.array_equal(TiledNonMaxSuppression(R, 5, tile_size=9), NonMaxSuppression(R, 5))
@@ -1,17 +1,168 @@
-from Dijksra_ShortestPath import get_file, shortestPath
-
-def test_simple():
-    filepath='DijkstraTest.txt'
-    adj_list = get_file(filepath)
-
-    assert shortestPath(adj_list) == [-1, 0, 1, 3, 6]
-
-def test_full():
-    filepath = 'DijkstraData.txt'
-    adj_list = get_file(filepath)
-
-    results = shortestPath(adj_list)
-    selected_nodes = [7,37,59,82,99,115,133,165,188,197]
-    paths = [results[node] for node in selected_nodes]
-    assert paths == [2599,2610,2947,2052,2367,2399,2029,2442,2505,3068]
-
+import random
+
+from Dijksra_ShortestPath import get_file, shortestPath, batchShortestPaths, reconstructPath, \
+    bidirectionalShortestPath, astarShortestPath, ShortestPathCache
+from csr_graph import CSRGraph
+from graph_io import load_adjacency
+from parallel_shortest_paths import allPairsShortestPaths
+from dynamic_shortest_paths import DynamicShortestPaths, updateShortestPaths
+
+def test_simple():
+    filepath='DijkstraTest.txt'
+    adj_list = get_file(filepath)
+
+    assert shortestPath(adj_list) == [-1, 0, 1, 3, 6]
+
+def test_full():
+    filepath = 'DijkstraData.txt'
+    adj_list = get_file(filepath)
+
+    results = shortestPath(adj_list)
+    selected_nodes = [7,37,59,82,99,115,133,165,188,197]
+    paths = [results[node] for node in selected_nodes]
+    assert paths == [2599,2610,2947,2052,2367,2399,2029,2442,2505,3068]
+
+def test_sources_and_targets():
+    adj_list = get_file('DijkstraTest.txt')
+
+    assert shortestPath(adj_list, source=2) == [-1, -1, 0, 2, 5]
+    # multi-source: distance to the nearest source
+    assert shortestPath(adj_list, source=[1, 3]) == [-1, 0, 1, 0, 3]
+    # early termination: vertex 4 (the farthest) is never processed
+    assert shortestPath(adj_list, source=1, targets=[2, 3]) == [-1, 0, 1, 3, -1]
+
+def test_batch():
+    adj_list = load_adjacency('dijkstraData.txt', cache=False)
+    queries = [(1, [7, 37]), (37, [1]), ([7, 37], None), (1, [7, 37])]
+
+    results = list(batchShortestPaths(adj_list, queries))
+    assert results[0] == results[3] == [2599, 2610]
+    assert results[1] == [shortestPath(adj_list, source=37)[1]]
+    assert results[2] == shortestPath(adj_list, source=[7, 37])
+
+def test_all_pairs(tmp_path):
+    adj_list = get_file('DijkstraTest.txt')
+
+    expected = [shortestPath(adj_list, source=s) for s in range(5)]
+    matrix = allPairsShortestPaths(adj_list, processes=2)
+    assert [list(row) for row in matrix] == expected
+
+    matrix = allPairsShortestPaths(adj_list, sources=[4, 1], processes=2,
+                                   out_path=str(tmp_path / 'apsp.bin'))
+    assert matrix.tolist() == [expected[4], expected[1]]
+
+    # repeated sources get all their rows
+    for processes in [1, 2]:
+        matrix = allPairsShortestPaths(adj_list, sources=[1, 1, 2], processes=processes)
+        assert [list(row) for row in matrix] == [expected[1], expected[1], expected[2]]
+        matrix = allPairsShortestPaths(adj_list, sources=[1, 1, 2], processes=processes,
+                                       out_path=str(tmp_path / 'apsp.bin'))
+        assert matrix.tolist() == [expected[1], expected[1], expected[2]]
+
+def test_paths():
+    adj_list = get_file('DijkstraTest.txt')
+
+    dist, pred = shortestPath(adj_list, predecessors=True)
+    assert dist == [-1, 0, 1, 3, 6]
+    assert list(pred) == [-1, -1, 1, 2, 3]
+    assert reconstructPath(pred, 4, dist) == [1, 2, 3, 4]
+    assert reconstructPath(pred, 1, dist) == [1]
+    # unreachable: vertex 0 has no predecessor either, as the source
+    assert reconstructPath(pred, 0, dist) is None
+
+    # every edge of a reconstructed path adds up to the distance
+    adj_list = load_adjacency('dijkstraData.txt', cache=False)
+    dist, pred = shortestPath(adj_list, predecessors=True)
+    path = reconstructPath(pred, 197, dist)
+    assert sum(dict(adj_list.edges(u))[v] for u, v in zip(path, path[1:])) == dist[197]
+
+def test_point_to_point():
+    adj_list = load_adjacency('dijkstraData.txt', cache=False)
+    target = 197
+
+    # exact distances to target, for an admissible heuristic (half of them)
+    to_target = shortestPath(adj_list.reverse(), source=target)
+    heuristic = lambda v: to_target[v] // 2
+
+    for source in [1, 7, 82, 133, 200]:
+        expected = shortestPath(adj_list, source=source)[target]
+        assert bidirectionalShortestPath(adj_list, source, target) == expected
+        assert astarShortestPath(adj_list, source, target, heuristic) == expected
+        assert astarShortestPath(adj_list, source, target) == expected
+
+    adj_list = get_file('DijkstraTest.txt')
+    assert bidirectionalShortestPath(adj_list, 4, 1) == -1
+    assert astarShortestPath(adj_list, 4, 1) == -1
+
+def test_indexed_heap():
+    adj_list = load_adjacency('dijkstraData.txt', cache=False)
+
+    expected = shortestPath(adj_list, predecessors=True)
+    for arity in [2, 4]:
+        assert shortestPath(adj_list, heap='indexed', arity=arity) == expected[0]
+    dist, pred = shortestPath(adj_list, targets=[197], predecessors=True, heap='indexed')
+    assert dist[197] == expected[0][197]
+    assert reconstructPath(pred, 197, dist)[0] == 1
+
+def test_cache():
+    adj_list = load_adjacency('dijkstraData.txt', cache=False)
+    # room for two sources' distances
+    cache = ShortestPathCache(adj_list, max_bytes=2 * 8 * adj_list.n)
+
+    for source in [1, 7, 1, 37, 1]:
+        assert list(cache.distances(source)) == shortestPath(adj_list, source)
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 3, 1)
+    assert 1 in cache and 37 in cache and 7 not in cache
+    assert cache.distance(1, 7) == 2599 and cache.hits == 3
+
+    # a change of the graph invalidates all the entries
+    head, weight = next(adj_list.edges(1))
+    adj_list.set_weight(1, head, weight + 1000)
+    assert 1 not in cache
+    assert list(cache.distances(1)) == shortestPath(adj_list, 1) and len(cache) == 1
+    adj_list.update_edges(insert=[(1, 7, 1)])
+    assert cache.distance(1, 7) == 1 and cache.misses == 5
+
+def test_dynamic():
+    graph = load_adjacency('dijkstraData.txt', cache=False)
+    reference = {v: list(graph.edges(v)) for v in range(graph.n)}
+    dynamic = DynamicShortestPaths(graph, 1)
+    rng = random.Random(4)
+    for _ in range(60):
+        # a batch of deletions, insertions and weight changes
+        tails = rng.sample(range(1, graph.n), 3)
+        delete = [(tails[0], rng.choice(reference[tails[0]])[0])]
+        insert = [(tails[1], rng.randrange(1, graph.n), rng.randint(1, 3000))]
+        head = rng.choice(reference[tails[2]])[0]
+        reweight = [(tails[2], head, rng.randint(1, 3000))]
+        dynamic.update(insert, delete, reweight)
+
+        reference[tails[0]] = [(h, w) for h, w in reference[tails[0]] if h != delete[0][1]]
+        reference[tails[1]].append(insert[0][1:])
+        reference[tails[2]] = [(h, reweight[0][2] if h == head else w) for h, w in reference[tails[2]]]
+        expected = shortestPath(reference, 1)
+        assert dynamic.distances() == expected
+        path = dynamic.path(7)
+        assert path[0] == 1 and sum(min(w for h, w in reference[u] if h == v) for u, v in zip(path, path[1:])) == expected[7]
+
+    # the changes reach the graph itself
+    dynamic.commit()
+    assert graph.version == 1 and shortestPath(graph, 1) == dynamic.distances()
+    distances, predecessors = updateShortestPaths(graph, 1, *shortestPath(graph, 1, predecessors=True), delete=[(1, path[1])])
+    assert distances == shortestPath(graph, 1) and predecessors[path[1]] != 1
+
+def test_dynamic_work():
+    # a path 0 -> 1 -> ... -> 999: a batch near its end only scans the vertices after it
+    n = 1000
+    graph = CSRGraph.from_edges(n, range(n - 1), range(1, n), [1] * (n - 1))
+    dynamic = DynamicShortestPaths(graph, 0)
+    scanned = []
+    out_edges = dynamic._out_edges
+    dynamic._out_edges = lambda v: (scanned.append(v), out_edges(v))[1]
+
+    # a longer tree edge, then a shortcut
+    assert dynamic.update(reweight=[(995, 996, 3)]) == {996, 997, 998, 999}
+    assert dynamic.update(insert=[(990, 998, 1)]) == {998, 999}
+    assert set(scanned) <= set(range(996, n)) and len(scanned) <= 12
+    # not committed: the graph itself is untouched
+    assert dynamic.distance(999) == 992 and graph.version == 0
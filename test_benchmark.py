@@ -0,0 +1,30 @@
+import copy
+
+from benchmark import run_benchmarks, save_results, load_results, compare, scaling_exponent, MIN_TIME
+
+def test_scaling_exponent():
+    sizes = [1000, 2000, 4000, 8000]
+    assert abs(scaling_exponent(sizes, [1e-6 * n for n in sizes]) - 1) < 1e-9
+    assert abs(scaling_exponent(sizes, [1e-9 * n * n for n in sizes]) - 2) < 1e-9
+    assert scaling_exponent([1000], [1.0]) is None
+
+def test_baseline_comparison(tmp_path):
+    results = run_benchmarks(['kosaraju_scc', 'conv2d'], 'smoke', repeat=1, report=None)
+    for name in ['kosaraju_scc', 'conv2d']:
+        sizes = results['benchmarks'][name]['sizes']
+        assert len(sizes) == 2 and all(entry['time'] > 0 and entry['peak_bytes'] > 0 for entry in sizes)
+
+    path = str(tmp_path / 'baseline.json')
+    save_results(results, path)
+    baseline = load_results(path)
+    assert baseline == results
+    assert compare(results, baseline) == []
+
+    # a baseline twice as fast, and using half the memory, for one size
+    faster = copy.deepcopy(baseline)
+    entry = faster['benchmarks']['conv2d']['sizes'][1]
+    entry['time'] = min(entry['time'], MIN_TIME) / 2
+    results['benchmarks']['conv2d']['sizes'][1]['time'] = MIN_TIME
+    entry['peak_bytes'] //= 2
+    regressions = compare(results, faster)
+    assert len(regressions) == 2 and all(r.startswith('conv2d [128x128]') for r in regressions)
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+from closestPair import closestSquaredDistance, DynamicClosestPair
+
+def brute_force(x, y):
+    points = list(set(zip(x, y)))
+    return min(pow(pow(p[0] - q[0], 2) + pow(p[1] - q[1], 2), .5)
+               for i, p in enumerate(points) for q in points[i+1:])
+
+def test_engines_agree():
+    rng = random.Random(5)
+    for _ in range(100):
+        n = rng.randint(2, 400)
+        # small ranges give many duplicate points
+        R = rng.choice([3, 50, 1000, 10**6])
+        x = [rng.randint(-R, R) for _ in range(n)]
+        y = [rng.randint(-R, R) for _ in range(n)]
+        if len(set(zip(x, y))) < 2:
+            continue
+
+        expected = brute_force(x, y)
+        for engine in ['divide', 'grid']:
+            dist, (p, q) = closestSquaredDistance(x, y, engine)
+            assert dist == expected
+            assert p != q and p in zip(x, y) and q in zip(x, y)
+            assert pow(pow(p[0] - q[0], 2) + pow(p[1] - q[1], 2), .5) == dist
+
+def test_grid_large():
+    rng = np.random.default_rng(6)
+    x, y = rng.random(50000), rng.random(50000)
+    # plant a pair closer than any other
+    x[10], y[10] = x[20] + 1e-9, y[20]
+    dist, pair = closestSquaredDistance(x, y, 'grid')
+    assert sorted(pair) == sorted([(x[10], y[10]), (x[20], y[20])])
+    assert dist == closestSquaredDistance(x[10:21:10].tolist(), y[10:21:10].tolist())[0]
+
+    # without it, the same closest pair as divide and conquer
+    x, y = x[100:20100], y[100:20100]
+    grid_dist, grid_pair = closestSquaredDistance(x, y, 'grid')
+    dist, pair = closestSquaredDistance(x.tolist(), y.tolist())
+    assert grid_dist == dist and sorted(grid_pair) == sorted(pair)
+
+def test_dynamic_closest_pair():
+    rng = random.Random(9)
+    x = [rng.randint(0, 10000) for _ in range(300)]
+    y = [rng.randint(0, 10000) for _ in range(300)]
+    dynamic = DynamicClosestPair(x, y)
+    points = dict(enumerate(zip(x, y)))
+
+    for step in range(1500):
+        op = rng.random()
+        if op < 0.3 or len(points) < 3:
+            # new points, sometimes very close to (or at) an existing one
+            px, py = rng.choice(list(points.values()))
+            p = rng.choice([(rng.randint(0, 10000), rng.randint(0, 10000)),
+                            (px + rng.randint(-2, 2), py + rng.randint(-2, 2))])
+            points[dynamic.insert(*p)] = p
+        elif op < 0.6:
+            id = rng.choice(list(points))
+            dynamic.delete(id)
+            del points[id]
+        else:
+            id = rng.choice(list(points))
+            p = (rng.randint(0, 10000), rng.randint(0, 10000))
+            dynamic.move(id, *p)
+            points[id] = p
+
+        result = dynamic.closest()
+        xs, ys = zip(*points.values())
+        if len(set(points.values())) < 2:
+            assert result is None
+            continue
+        dist, (a, b) = result
+        assert dist == closestSquaredDistance(xs, ys)[0]
+        assert pow(pow(points[a][0] - points[b][0], 2) + pow(points[a][1] - points[b][1], 2), .5) == dist
+
+def test_dynamic_closest_pair_rebuilds():
+    # points 100 apart, but for a pair at distance 1: deleting one of the pair and inserting
+    # it back, over and over, must not rebuild the grid every time
+    x = [100 * i for i in range(200)] + [1]
+    y = [0] * 201
+    dynamic = DynamicClosestPair(x, y)
+    rebuilds = []
+    rebuild = dynamic._rebuild
+    dynamic._rebuild = lambda: (rebuilds.append(1), rebuild())
+
+    id = 200
+    for step in range(400):
+        dynamic.delete(id)
+        assert dynamic.closest()[0] == 100
+        id = dynamic.insert(101 if step % 2 else 1, 0)
+        assert dynamic.closest()[0] == 1
+    # once per O(n) work: a couple of rebuilds every few dozen steps, not two per step
+    assert len(rebuilds) <= 50
+    # deleted points leave nothing behind
+    assert len(dynamic.version) == len(dynamic) == 201
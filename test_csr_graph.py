@@ -0,0 +1,79 @@
+import mmap
+
+import pytest
+
+from csr_graph import CSRGraph, as_csr
+from Dijksra_ShortestPath import get_file
+from graph_io import load_edge_list, map_csr, SIDECAR_SUFFIX
+
+def test_from_adjacency():
+    adj_list = get_file('DijkstraTest.txt')
+    graph = as_csr(adj_list)
+
+    assert (graph.n, graph.m) == (5, 5)
+    assert list(graph.edges(1)) == [(2, 1), (3, 4)]
+    assert list(graph.neighbors(4)) == []
+    assert as_csr(graph) is graph
+
+def test_unweighted_and_reverse():
+    graph = CSRGraph.from_adjacency({1: [2, 3], 2: [3], 3: [1]})
+
+    assert not graph.weighted
+    rev = graph.reverse()
+    assert [sorted(rev.neighbors(v)) for v in range(4)] == [[], [3], [1], [1, 2]]
+    assert rev.reverse() is graph
+
+def test_loader_sidecar(tmp_path, monkeypatch):
+    filepath = tmp_path / 'edges.txt'
+    filepath.write_text('3 3\n1 2 5\n2 3 -1\n1 3 7\n')
+
+    parsed = load_edge_list(str(filepath), undirected=True, header=True)
+    mapped = load_edge_list(str(filepath), undirected=True, header=True)
+
+    assert isinstance(mapped.targets, memoryview)
+    assert (mapped.n, mapped.m) == (4, 6)
+    for v in range(4):
+        assert list(mapped.edges(v)) == list(parsed.edges(v))
+    assert sorted(mapped.edges(3)) == [(1, 7), (2, -1)]
+
+    # a stale sidecar, or a file which isn't one, is unmapped right away
+    maps = []
+    real_mmap = mmap.mmap
+    monkeypatch.setattr(mmap, 'mmap', lambda *args, **kwargs: maps.append(real_mmap(*args, **kwargs)) or maps[-1])
+    assert map_csr(str(filepath) + SIDECAR_SUFFIX, tag='other') is None
+    with pytest.raises(ValueError):
+        map_csr(str(filepath))
+    assert len(maps) == 2 and all(mm.closed for mm in maps)
+
+def test_updates(tmp_path):
+    filepath = tmp_path / 'edges.txt'
+    filepath.write_text('3 3\n1 2 5\n2 3 -1\n1 3 7\n')
+    load_edge_list(str(filepath), undirected=True, header=True)
+    graph = load_edge_list(str(filepath), undirected=True, header=True)
+    rev = graph.reverse()
+
+    # a graph on a (read-only) mapped file is copied on its first change
+    graph.set_weight(1, 3, 4)
+    assert graph.version == 1 and sorted(graph.edges(1)) == [(2, 5), (3, 4)]
+    assert graph.reverse() is not rev and sorted(graph.reverse().edges(3)) == [(1, 4), (2, -1)]
+
+    graph.update_edges(insert=[(3, 0, 2), (1, 2, 9)], delete=[(1, 2), (2, 3)], reweight=[(3, 2, 8)])
+    assert graph.version == 2 and graph.m == 6
+    edges = [[], [(2, 9), (3, 4)], [(1, 5)], [(0, 2), (1, 7), (2, 8)]]
+    assert [sorted(graph.edges(v)) for v in range(4)] == edges
+
+    # a failing batch changes nothing
+    with pytest.raises(KeyError):
+        graph.set_weight(0, 1, 1)
+    with pytest.raises(ValueError):
+        graph.update_edges(insert=[(1, 4, 1)])
+    with pytest.raises(KeyError):
+        graph.update_edges(insert=[(0, 1, 3)], delete=[(1, 3)], reweight=[(1, 3, 1)])
+    assert graph.version == 2 and [sorted(graph.edges(v)) for v in range(4)] == edges
+
+    # a float weight makes the weights floats
+    graph.update_edges(insert=[(0, 1, 3)], reweight=[(0, 1, 2.5), (2, 1, 1)])
+    assert graph.version == 3 and graph.weight_type == 'd'
+    assert list(graph.edges(0)) == [(1, 2.5)] and list(graph.edges(2)) == [(1, 1.0)]
+    graph.set_weight(1, 3, 0.5)
+    assert sorted(graph.edges(1)) == [(2, 9.0), (3, 0.5)]
@@ -0,0 +1,22 @@
+import random
+from indexed_heap import IndexedHeap
+
+def test_decrease_key_order():
+    rng = random.Random(1)
+    for d in [2, 3, 4]:
+        heap = IndexedHeap(100, d)
+        keys = {}
+        for item in rng.sample(range(100), 60):
+            keys[item] = rng.randrange(1000)
+            heap.push(item, keys[item])
+        for item in rng.sample(sorted(keys), 30):
+            keys[item] -= rng.randrange(1, 500)
+            assert heap.push_or_decrease(item, keys[item])
+        # a larger key is not a decrease
+        assert not heap.push_or_decrease(item, keys[item] + 1)
+
+        assert len(heap) == 60
+        popped = [heap.pop() for _ in range(60)]
+        assert [k for k, _ in popped] == sorted(keys.values())
+        assert all(keys[item] == k for k, item in popped)
+        assert 0 not in heap and not heap
@@ -0,0 +1,39 @@
+from graph_io import load_edge_list
+from mst import minimumSpanningTree, UnionFind
+
+def test_engines_agree():
+    A = load_edge_list('edges.txt', undirected=True, header=True, cache=False)
+
+    for engine, options in [('prim', {}), ('prim', {'heap': 'indexed'}),
+                            ('kruskal', {}), ('boruvka', {})]:
+        T, cost = minimumSpanningTree(A, engine, **options)
+        assert cost == -3612829
+        assert len(T) == 499
+
+def test_forest():
+    # two components: a triangle and a single edge
+    adj_list = [[], [(2, 1), (3, 5)], [(1, 1), (3, 2)], [(1, 5), (2, 2)],
+                [(5, 7)], [(4, 7)]]
+
+    for engine in ['kruskal', 'boruvka']:
+        T, cost = minimumSpanningTree(adj_list, engine)
+        assert sorted(c for c, _, _ in T) == [1, 2, 7]
+    T, cost = minimumSpanningTree(adj_list, 'prim')
+    assert cost == 3
+
+def test_self_loops():
+    # self-loops, at the start vertex too, are never tree edges
+    adj_list = {0: [(0, 1), (1, 5), (2, 3)], 1: [(0, 5), (1, 2), (2, 4)], 2: [(0, 3), (1, 4)]}
+    expected = minimumSpanningTree(adj_list, 'kruskal')[1]
+    assert expected == 7
+    for engine, options in [('prim', {}), ('prim', {'heap': 'indexed'}), ('boruvka', {})]:
+        # (Prim starts from vertex 0)
+        T, cost = minimumSpanningTree(adj_list, engine, **options)
+        assert cost == expected and all(u != v for _, u, v in T)
+
+def test_union_find():
+    uf = UnionFind(6)
+    assert uf.union(0, 1) and uf.union(2, 3) and uf.union(1, 3)
+    assert not uf.union(0, 2)
+    assert uf.find(0) == uf.find(3) != uf.find(4)
+    assert uf.count == 3
@@ -0,0 +1,71 @@
+import random
+from csr_graph import CSRGraph
+from scc_kosaraju_algorithm import compute_scc, component_sizes
+from scc_tarjan_algorithm import tarjan_scc, scc_decomposition
+
+# SCCs of sizes 3, 3, 3
+EDGES = [(1, 4), (4, 7), (7, 1), (9, 7), (9, 3), (3, 6), (6, 9), (8, 6), (2, 8), (5, 2), (8, 5)]
+
+def same_partition(component, expected_groups):
+    return sorted(sorted(v for v in range(len(component)) if component[v] == c)
+                  for c in set(component)) == sorted(map(sorted, expected_groups))
+
+def test_small():
+    adj_list = {i: [] for i in range(1, 10)}
+    for tail, head in EDGES:
+        adj_list[tail].append(head)
+
+    component = compute_scc(adj_list, n=9)
+    assert same_partition(component, [[0], [1, 4, 7], [3, 6, 9], [2, 5, 8]])
+    assert sorted(component_sizes(component)) == [1, 3, 3, 3]
+
+def test_deep_chain():
+    # a single cycle through 200,000 vertices would overflow a recursive DFS
+    n = 200000
+    graph = CSRGraph.from_edges(n, list(range(n)), [(v + 1) % n for v in range(n)])
+    assert list(component_sizes(compute_scc(graph))) == [n]
+
+def test_random_against_reachability():
+    rng = random.Random(3)
+    n = 40
+    tails = [rng.randrange(n) for _ in range(70)]
+    heads = [rng.randrange(n) for _ in range(70)]
+    graph = CSRGraph.from_edges(n, tails, heads)
+
+    def reachable(s):
+        seen, stack = {s}, [s]
+        while stack:
+            for w in graph.neighbors(stack.pop()):
+                if w not in seen:
+                    seen.add(w)
+                    stack.append(w)
+        return seen
+
+    reach = [reachable(v) for v in range(n)]
+    groups = {frozenset(w for w in reach[v] if v in reach[w]) for v in range(n)}
+    assert same_partition(compute_scc(graph), groups)
+
+def test_tarjan_and_condensation():
+    rng = random.Random(5)
+    n = 300
+    tails = [rng.randrange(n) for _ in range(450)]
+    heads = [rng.randrange(n) for _ in range(450)]
+    graph = CSRGraph.from_edges(n, tails, heads)
+
+    component, sizes, dag = scc_decomposition(graph)
+    kosaraju = compute_scc(graph)
+    groups = [[v for v in range(n) if kosaraju[v] == c] for c in set(kosaraju)]
+    assert same_partition(component, groups)
+    assert sum(sizes) == n and len(sizes) == dag.n == len(groups)
+
+    # every DAG edge goes from a higher component id to a lower one, once
+    for c in range(dag.n):
+        assert all(d < c for d in dag.neighbors(c))
+        assert len(set(dag.neighbors(c))) == dag.out_degree(c)
+    cross = {(component[t], component[h]) for t, h in zip(tails, heads) if component[t] != component[h]}
+    assert cross == {(c, d) for c in range(dag.n) for d in dag.neighbors(c)}
+
+def test_tarjan_deep_chain():
+    n = 200000
+    graph = CSRGraph.from_edges(n, list(range(n - 1)), list(range(1, n)))
+    assert len(set(tarjan_scc(graph))) == n
@@ -0,0 +1,42 @@
+from search_stats import SearchStats
+from synthetic_data import random_graph, road_graph, chain_graph, build_csr
+from Dijksra_ShortestPath import shortestPath, ShortestPathSearch
+from prims_algorithm import primMST
+from scc_kosaraju_algorithm import compute_scc
+
+def test_dijkstra_stats():
+    graph = build_csr(500, random_graph(500, 4000, 1))
+    reachable = sum(d != -1 for d in shortestPath(graph, 0))
+    for heap in ['lazy', 'indexed']:
+        stats = SearchStats()
+        assert shortestPath(graph, 0, heap=heap, stats=stats) == shortestPath(graph, 0)
+        assert stats.settled == reachable
+        assert stats.relaxations == sum(graph.out_degree(v) for v, d in enumerate(shortestPath(graph, 0)) if d != -1)
+        assert stats.pops == stats.settled + stats.stale_pops
+        assert stats.pushes == stats.pops and 0 < stats.max_heap <= stats.pushes
+        assert (stats.stale_pops > 0) == (heap == 'lazy') and (stats.decrease_keys > 0) == (heap == 'indexed')
+        assert set(stats.phases) == {'setup', 'search'}
+
+    # accumulated over the queries, the last one stopping early
+    phases = []
+    stats = SearchStats(callback=lambda stats, name, seconds: phases.append(name))
+    search = ShortestPathSearch(graph, stats=stats)
+    search.run(0)
+    search.run(0, targets=[0])
+    assert stats.settled == reachable + 1 and phases == ['setup', 'search', 'search']
+    stats.reset()
+    assert stats.as_dict() == dict({name: 0 for name in SearchStats.COUNTERS}, phases={})
+
+def test_prim_and_kosaraju_stats():
+    graph = build_csr(100, road_graph(10, 10, 2))
+    for heap in ['lazy', 'indexed']:
+        stats = SearchStats()
+        assert primMST(graph, 0, heap, stats=stats) == primMST(graph, 0, heap)
+        assert stats.settled == 100 and stats.relaxations == graph.m
+        assert stats.pops == 99 + stats.stale_pops and stats.pushes == stats.pops
+
+    # the first pass's stack holds the whole chain
+    stats = SearchStats()
+    compute_scc(build_csr(1000, chain_graph(1000)), stats=stats)
+    assert stats.max_stack == 1000 and stats.settled == 2000 and stats.relaxations == 2000
+    assert set(stats.phases) == {'setup', 'reverse', 'first_pass', 'second_pass'}
@@ -0,0 +1,49 @@
+import numpy as np
+from spatial_index import GridIndex
+
+def all_pairs(x, y):
+    i, j = np.triu_indices(len(x), 1)
+    return i, j, (x[i] - x[j])**2 + (y[i] - y[j])**2
+
+def test_radius_and_k_closest_pairs():
+    rng = np.random.default_rng(7)
+    # clustered points, with duplicates
+    x = np.concatenate((rng.integers(0, 1000, 300), rng.integers(0, 20, 100), [5, 5]))
+    y = np.concatenate((rng.integers(0, 1000, 300), rng.integers(0, 20, 100), [7, 7]))
+    I, J, D = all_pairs(x, y)
+
+    for cell in [None, 3.0, 100.0]:
+        index = GridIndex(x, y, cell)
+        for r in [0, 1, 25, 90.5, 2000]:
+            i, j, d2 = index.radius_pairs(r)
+            assert sorted(zip(i, j, d2)) == sorted(zip(I[D <= r*r], J[D <= r*r], D[D <= r*r]))
+
+        for k in [1, 10, 500, len(D) + 10]:
+            i, j, d2 = index.k_closest_pairs(k)
+            assert len(d2) == min(k, len(D))
+            assert np.array_equal(d2, np.sort(D)[:k])
+            assert np.array_equal(d2, (x[i] - x[j])**2 + (y[i] - y[j])**2)
+
+def test_nearest():
+    rng = np.random.default_rng(8)
+    x, y = rng.random(2000) * 10, rng.random(2000)
+    index = GridIndex(x, y)
+    # queries inside the grid, far outside, and at indexed points
+    qx = np.concatenate((rng.random(300) * 10, [-50, 300, 1e6], x[:5]))
+    qy = np.concatenate((rng.random(300), [0.5, -80, 3], y[:5]))
+    nearest, d2 = index.nearest(qx, qy)
+
+    expected = ((qx[:, None] - x)**2 + (qy[:, None] - y)**2).min(axis=1)
+    assert np.array_equal(d2, expected)
+    assert np.array_equal((qx - x[nearest])**2 + (qy - y[nearest])**2, expected)
+    assert np.array_equal(nearest[-5:], np.arange(5))
+
+    # a query far off the grid, diagonally or beyond MAX_CELLS, stops soon after reaching it
+    rings = []
+    ring = index._ring
+    index._ring = lambda *args: (rings.append(args[2]), ring(*args))[1]
+    for q in [(1e4, 1e4), (-1e15, 1e15)]:
+        rings.clear()
+        nearest, d2 = index.nearest(*q)
+        assert d2[0] == ((q[0] - x)**2 + (q[1] - y)**2).min()
+        assert len(rings) <= 4
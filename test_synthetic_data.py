@@ -0,0 +1,57 @@
+import numpy as np
+from synthetic_data import (random_graph, power_law_graph, grid_graph, road_graph, chain_graph, build_csr,
+                            write_adjacency, write_edge_list, write_mst_edges,
+                            clustered_points, duplicate_points)
+from graph_io import load_edge_list
+from Dijksra_ShortestPath import get_file, shortestPath
+from scc_kosaraju_algorithm import get_file as get_scc_file, compute_scc, component_sizes
+from mst import minimumSpanningTree
+
+def graphs(seed):
+    return {'random': (300, random_graph(300, 2400, seed)),
+            'power_law': (300, power_law_graph(300, 2400, seed)),
+            'grid': (20 * 15, grid_graph(20, 15, seed)),
+            'road': (20 * 15, road_graph(20, 15, seed)),
+            'chain': (300, chain_graph(300, seed))}
+
+def test_deterministic():
+    for (name, (n, a)), (_, b) in zip(graphs(1).items(), graphs(1).values()):
+        for x, y in zip(a, b):
+            assert all(np.array_equal(u, v) for u, v in zip(x, y)), name
+    assert not np.array_equal(next(random_graph(300, 2400, 1))[1], next(random_graph(300, 2400, 2))[1])
+    for points in (clustered_points, duplicate_points):
+        assert all(np.array_equal(u, v) for u, v in zip(points(1000, 3), points(1000, 3)))
+
+def test_files_round_trip(tmp_path):
+    adjacency, edges, mst_edges = (str(tmp_path / name) for name in ['adjacency.txt', 'SCC.txt', 'edges.txt'])
+    for name, (n, blocks) in graphs(4).items():
+        blocks = list(blocks)
+        graph = build_csr(n, blocks)
+
+        # Dijkstra's format: the legacy reader, and the same distances as in memory (1-indexed)
+        write_adjacency(adjacency, n, iter(blocks))
+        legacy = get_file(adjacency)
+        assert len(legacy) == n and sum(len(heads) for heads in legacy.values()) == graph.m
+        assert list(shortestPath(legacy, 1))[1:] == list(shortestPath(graph, 0)), name
+
+        write_edge_list(edges, iter(blocks))
+        G, G_rev = get_scc_file(edges, n)
+        assert sum(map(len, G.values())) == graph.m
+        assert sorted(component_sizes(compute_scc(load_edge_list(edges, n + 1, cache=False))))[1:] == \
+            sorted(component_sizes(compute_scc(graph)))
+
+        if name in ('grid', 'road'):
+            # undirected, and connected
+            write_mst_edges(mst_edges, n, iter(blocks))
+            with open(mst_edges) as f:
+                assert f.readline() == f'{n} {graph.m // 2}\n'
+            tree, cost = minimumSpanningTree(load_edge_list(mst_edges, undirected=True, header=True, cache=False))
+            assert len(tree) == n - 1
+    # a single component, n levels deep
+    assert component_sizes(compute_scc(build_csr(300, chain_graph(300)))).tolist() == [300]
+
+def test_point_sets():
+    x, y = duplicate_points(10000, 5, distinct=100)
+    assert len(set(zip(x.tolist(), y.tolist()))) <= 100
+    x, y = clustered_points(10000, 5, clusters=3, extent=10**6)
+    assert len(x) == 10000 and x.min() >= 0 and y.max() < 10**6